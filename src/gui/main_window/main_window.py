@@ -4,6 +4,7 @@ import os
 import sys
 import logging
 from src.gui.other.text_redirector import TextRedirector
+from src.utils.execution import ExecutionContext
 import src.gui.main_window.main_window_actions as actions
 
 # Main GUI
@@ -12,10 +13,17 @@ class MainWindow(tk.Tk):
         super().__init__()
         self.report_dict = None
         self.comparison_mode = False
+        self.context = ExecutionContext() # Worker pools reused across parses
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.configure_ui()
         self.create_widgets()
         self.load_icon()
 
+    # Shut down the worker pools before closing
+    def on_close(self):
+        self.context.close()
+        self.destroy()
+
     # Set the GUI elements
     def configure_ui(self):
         self.title("Quickparse")
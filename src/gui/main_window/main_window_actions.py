@@ -47,9 +47,11 @@ def parse_action(parent):
             pattern_file=pattern_file,
             target_folder_path=target_folder,
             reference_folder_path=reference_folder,
-            window=window
+            window=window,
+            context=parent.context
         )
-        print(report_string)
+        if report_string is not None:
+            print(report_string)
         parent.report_dict = report_dict
 
     # Validate file and folder paths
@@ -5,6 +5,7 @@ import xml.dom.minidom
 import logging
 import dicttoxml
 import yaml
+from src.utils.quickparser import ReportDumper
 
 # Turn off dicttoxml's default logging
 dicttoxml.LOG.setLevel(logging.ERROR)
@@ -100,7 +101,11 @@ def save_action(mode, save_window, report_dict, report_string):
         if mode == "YAML":
             with open(file_path, 'w', encoding='utf-8') as file:
                 yaml.dump(
-                    report_dict, file, default_flow_style=False, indent=4
+                    report_dict, 
+                    file, 
+                    Dumper=ReportDumper, 
+                    default_flow_style=False, 
+                    indent=4
                 )
         elif mode == "JSON":
             with open(file_path, 'w', encoding='utf-8') as file:
@@ -0,0 +1,108 @@
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import AsyncIterator, Optional
+from src.utils.parsing_helpers import (
+    FileResult,
+    ParsingError,
+    get_set_of_files,
+    parse_path,
+    parse_text as _parse_text,
+)
+from src.utils.tuning import parse_workers
+
+# asyncio front end: regex work always runs in an executor so the event loop
+# is never blocked. Pass a ProcessPoolExecutor to spread work across cores;
+# each worker loads and compiles the pattern file once through its cache.
+
+async def parse_text(
+    text: str,
+    pattern_file: str,
+    keyword: str = "Keyword",
+    collapse: bool = False,
+    executor: Optional[Executor] = None
+) -> tuple[Optional[str], Optional[dict]]:
+    '''
+    Discover the keyword of a text and parse it without blocking the loop.
+
+    Args:
+        text (str): The device output to parse.
+        pattern_file (str): Path to the pattern file.
+        keyword (str, optional): Label under which the found keyword is added.
+        collapse (bool, optional): Return None instead of 'NOT FOUND'.
+        executor (Executor, optional): Executor for the regex work, default
+            is the loop's default executor.
+
+    Returns:
+        tuple: The keyword found and the parsed dictionary, or (None, None)
+            when no keyword is found.
+    '''
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor,
+        functools.partial(_parse_text, text, pattern_file, keyword, collapse)
+    )
+
+async def iter_folder(
+    folder_path: str,
+    pattern_file: str,
+    keyword: str = "Keyword",
+    collapse: bool = False,
+    executor: Optional[Executor] = None,
+    max_concurrency: Optional[int] = None,
+    exts: tuple = ('.txt', '.log')
+) -> AsyncIterator[FileResult]:
+    '''
+    Parse every file of a folder, yielding each result as it completes.
+    At most max_concurrency files are in flight at once. Closing the
+    iterator or cancelling the consuming task cancels files not yet started.
+
+    Args:
+        folder_path (str): The folder holding the files to parse.
+        pattern_file (str): Path to the pattern file.
+        keyword (str, optional): Label under which the found keyword is added.
+        collapse (bool, optional): Return None instead of 'NOT FOUND'.
+        executor (Executor, optional): Executor for the regex work, default
+            is the loop's default executor.
+        max_concurrency (int, optional): Limit of files in flight, default is
+            the tuned parse worker count.
+        exts (tuple, optional): File extensions to parse.
+
+    Yields:
+        FileResult: The outcome of each file, with any error captured.
+
+    Raises:
+        ParsingError: If the folder contains no files to parse.
+    '''
+    if not (filepaths := get_set_of_files(folder_path, exts)):
+        raise ParsingError('No files in the target folder can be parsed.')
+
+    loop = asyncio.get_running_loop()
+    limit = max(1, max_concurrency or parse_workers())
+    pending = set()
+    try:
+        for file_path in sorted(filepaths):
+            pending.add(loop.run_in_executor(
+                executor,
+                functools.partial(
+                    parse_path, file_path, pattern_file, keyword, collapse
+                )
+            ))
+            if len(pending) < limit:
+                continue
+            # Wait for a free slot before submitting more work
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                yield future.result()
+
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -1,15 +1,32 @@
+import os
+import sys
 import argparse
+from collections import Counter
+import codecs
+import sqlite3
 from argparse import RawDescriptionHelpFormatter
+from contextlib import nullcontext
 import logging
 import yaml
 import json
 import xml.dom.minidom
 import dicttoxml
-from src.utils.parsing_logic import main_parse
+from src.utils.parsing_logic import main_parse, merge_partials
+from src.utils.parsing_helpers import FailFast
+from src.utils.quickparser import Quickparser, ReportDumper
+from src.utils.execution import ExecutionContext
+from src.utils.result_store import ResultStore, StoreError
+from src.utils.fleet_summary import DEFAULT_TOP_K
+from src.utils.run_diff import DiffError, diff_snapshots, latest_runs, open_snapshot
+from src.utils import service
+from src.utils import tuning
+from src.utils.regex_engines import ENGINES, available_engines
 
 def convert_to_format(report_dict, mode):
     if mode == 'yaml':
-        return yaml.dump(report_dict, default_flow_style=False, indent=4)
+        return yaml.dump(
+            report_dict, Dumper=ReportDumper, default_flow_style=False, indent=4
+        )
     elif mode == 'json':
         return json.dumps(report_dict, indent=4)
     elif mode == 'xml':
@@ -74,6 +91,41 @@ JSON Pattern Example:
         }
     }
 
+Subcommands:
+- `serve`, `merge`, `calibrate`, `query` and `diff` run as the first argument; anything else starts a parse.
+- Start with `run` or `--`, e.g. `quickparse -- diff /logs`, to parse with a pattern file named like a subcommand.
+
+Parse Service:
+- Run `quickparse serve` to keep pattern files and workers warm between runs.
+- Add `--server ADDRESS` to send the job to a running service instead.
+- Use `-` as the target to parse raw text from stdin through the service.
+
+Sharded Runs:
+- Add `--shard i/N --partial FILE` to parse only shard i (0 to N-1) of the target files.
+- Run `quickparse merge FILE...` to combine every shard's partial results into the final report.
+
+Fleet Summary:
+- The brief report summarizes the run: files per keyword, the most frequent values of each field, the most frequently deviating fields and the fields most often not found.
+- Add `--summary-top-k N` to list N entries per field (default 10), or 0 to omit the summary.
+
+Fail Fast:
+- Add `--fail-fast [N]` to a comparison to stop as soon as N deviations or files without a keyword are seen (default 1). Outstanding files are cancelled, the report covers the files checked and the exit status is 1.
+
+Multiple Pattern Files:
+- Give several pattern files, e.g. `quickparse inventory.yaml security.yaml /logs`, to read each file once and apply every pattern set to it. The report has a section per pattern file.
+
+Result Database:
+- Add `--db FILE` to record each run's files, fields and deviations in a SQLite database.
+- Run `quickparse query FILE --field 'Software/Version' [--value V]` to count or list files by value without re-parsing. See `quickparse query -h`.
+- Run `quickparse diff FILE` to show the files and fields that changed between its two latest runs, or `quickparse diff OLD NEW` to diff two databases or JSON reports.
+
+Tuning:
+- Worker counts respect CPU affinity and cgroup CPU quotas.
+- Run `quickparse calibrate pattern_file folder` to benchmark backends and worker counts on a sample and save the best for later runs.
+- Add `--engine {re,regex,re2}` to compile patterns with another installed regex engine; patterns it cannot handle use re. Calibration also compares the installed engines.
+- Add `--dedup` to hash file contents while reading and discover and parse each distinct content once; identical files share its result. The brief report counts unique and duplicate files.
+- Add `--bytes` to match raw file bytes and decode only captured values, with `--encoding` (default utf-8) and `--decode-errors` (default replace). Stray bytes of another encoding then never fail a run.
+
 Extensibility:
 - Pattern Files: Support YAML or JSON with a rigid structure.
 - Modular Parsing: Core parsing functionality can be extended or integrated into other projects.
@@ -97,7 +149,308 @@ logger.addHandler(logging_handler)
 
 dicttoxml.LOG.setLevel(logging.ERROR)
 
-def main():
+def serve_main(argv):
+    parser = argparse.ArgumentParser(
+        prog='quickparse serve',
+        description="Run a long-lived parse service with warm patterns."
+    )
+    parser.add_argument(
+        '--host',
+        default=service.DEFAULT_HOST,
+        help="Host to listen on. Defaults to localhost."
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=service.DEFAULT_PORT,
+        help=f"Port to listen on. Defaults to {service.DEFAULT_PORT}."
+    )
+    parser.add_argument(
+        '--socket',
+        help="Listen on this Unix domain socket path instead of a port."
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help="Number of worker threads kept warm by the service."
+    )
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.INFO)
+    try:
+        service.serve(
+            host=args.host,
+            port=args.port,
+            socket_path=args.socket,
+            max_workers=args.workers
+        )
+    except (OSError, service.ServiceError) as e:
+        parser.exit(1, f'{type(e).__name__}: {e}\n')
+
+def merge_main(argv):
+    parser = argparse.ArgumentParser(
+        prog='quickparse merge',
+        description="Merge partial results of sharded runs into the final report."
+    )
+    parser.add_argument(
+        'partials',
+        nargs='+',
+        help="Partial result files written with --partial, one per shard."
+    )
+    parser.add_argument(
+        '--serialize',
+        '-s',
+        choices=['yaml', 'json', 'xml'],
+        help="Serialize the merged data."
+    )
+    parser.add_argument(
+        '--summary-top-k',
+        type=int,
+        default=DEFAULT_TOP_K,
+        help=f"Values and deviating fields listed per field in the brief report's fleet summary. 0 omits the summary. Defaults to {DEFAULT_TOP_K}."
+    )
+    args = parser.parse_args(argv)
+    if args.summary_top_k < 0:
+        parser.error("--summary-top-k must not be negative")
+    try:
+        report_dict, report_string = merge_partials(args.partials, args.summary_top_k)
+    except Exception as e:
+        parser.exit(1, f'{type(e).__name__}: {e}\n')
+    if args.serialize:
+        print(convert_to_format(report_dict, args.serialize))
+    else:
+        print(report_string)
+
+def query_main(argv):
+    parser = argparse.ArgumentParser(
+        prog='quickparse query',
+        description="Answer questions about runs stored with --db without re-parsing."
+    )
+    parser.add_argument(
+        'database',
+        help="SQLite database written with --db."
+    )
+    parser.add_argument(
+        '--runs',
+        action='store_true',
+        help="List the stored runs."
+    )
+    parser.add_argument(
+        '--run',
+        type=int,
+        help="Id of the run to query. Defaults to the latest run."
+    )
+    parser.add_argument(
+        '--keyword',
+        '-k',
+        help="Only consider files where this keyword was found."
+    )
+    parser.add_argument(
+        '--field',
+        '-f',
+        help="Field to query, with nested keys joined by '/', e.g. 'Software/Version'."
+    )
+    parser.add_argument(
+        '--value',
+        '-v',
+        help="List the files whose field has this value. Without it, count the files holding each value."
+    )
+    parser.add_argument(
+        '--deviations',
+        action='store_true',
+        help="List the deviations of a comparison run, of --field only if given."
+    )
+    parser.add_argument(
+        '--serialize',
+        '-s',
+        choices=['yaml', 'json'],
+        default='yaml',
+        help="Output format. Defaults to yaml."
+    )
+    args = parser.parse_args(argv)
+    if not os.path.isfile(args.database):
+        parser.error(f"no database at '{args.database}'")
+    if args.value is not None and not args.field:
+        parser.error("--value requires --field")
+    try:
+        with ResultStore(args.database) as store:
+            if args.runs:
+                rows = store.runs()
+            elif args.deviations:
+                rows = store.deviations(args.run, args.field, args.keyword)
+            elif args.field and args.value is not None:
+                rows = store.files_with(args.field, args.value, args.run, args.keyword)
+            elif args.field:
+                rows = store.value_counts(args.field, args.run, args.keyword)
+            else:
+                rows = store.files(args.run, args.keyword)
+    except (StoreError, sqlite3.Error) as e:
+        parser.exit(1, f'{type(e).__name__}: {e}\n')
+    print(convert_to_format(rows, args.serialize))
+
+def diff_main(argv):
+    parser = argparse.ArgumentParser(
+        prog='quickparse diff',
+        description="Show which files and fields changed between two stored runs."
+    )
+    parser.add_argument(
+        'old',
+        help="Older snapshot: a database written with --db, or a JSON report written with -s json."
+    )
+    parser.add_argument(
+        'new',
+        nargs='?',
+        help="Newer snapshot. Defaults to OLD, diffing its two latest runs."
+    )
+    parser.add_argument(
+        '--old-run',
+        type=int,
+        help="Run id in the older database. Defaults to its latest run."
+    )
+    parser.add_argument(
+        '--new-run',
+        type=int,
+        help="Run id in the newer database. Defaults to its latest run."
+    )
+    parser.add_argument(
+        '--keyword',
+        '-k',
+        default='Keyword',
+        help="Keyword label the reports were written with. Defaults to 'Keyword'."
+    )
+    parser.add_argument(
+        '--serialize',
+        '-s',
+        choices=['yaml', 'json'],
+        default='yaml',
+        help="Output format; json writes one object per line. Defaults to yaml."
+    )
+    args = parser.parse_args(argv)
+    old_run, new_run = args.old_run, args.new_run
+    statuses = Counter()
+    changed_fields = Counter()
+    try:
+        if args.new is None and old_run is None and new_run is None:
+            old_run, new_run = latest_runs(args.old)
+        old_snapshot = open_snapshot(args.old, old_run, args.keyword)
+        new_snapshot = open_snapshot(args.new or args.old, new_run, args.keyword)
+        with old_snapshot as old, new_snapshot as new:
+            # Write each changed file as soon as it is found
+            for name, status, detail in diff_snapshots(old, new, args.keyword):
+                statuses[status] += 1
+                if status == 'unchanged':
+                    continue
+                if status == 'changed':
+                    changed_fields.update(detail.keys())
+                    entry = {'Status': status, 'Fields': detail}
+                else:
+                    entry = {'Status': status, **detail}
+                if args.serialize == 'json':
+                    print(json.dumps({'File': name, **entry}))
+                else:
+                    print(Quickparser.stringify({name: entry}, 'yaml'))
+    except (DiffError, StoreError, sqlite3.Error, OSError) as e:
+        parser.exit(1, f'{type(e).__name__}: {e}\n')
+    summary = {
+        'Added Files': statuses['added'],
+        'Removed Files': statuses['removed'],
+        'Changed Files': statuses['changed'],
+        'Unchanged Files': statuses['unchanged'],
+        'Changed Fields': dict(changed_fields.most_common()),
+    }
+    if args.serialize == 'json':
+        print(json.dumps({'Summary': summary}))
+    else:
+        print("-" * 100 + "\nDiff Summary:\n\n" + Quickparser.stringify(summary, 'yaml'))
+
+def calibrate_main(argv):
+    parser = argparse.ArgumentParser(
+        prog='quickparse calibrate',
+        description="Benchmark thread and process backends at several worker counts, then the installed regex engines, on a sample of the corpus and save the fastest."
+    )
+    parser.add_argument(
+        'pattern_file',
+        help="Path to the pattern file. {.json, .yaml, .yml}"
+    )
+    parser.add_argument(
+        'target',
+        help="Path to a directory of representative files."
+    )
+    parser.add_argument(
+        '--sample',
+        type=int,
+        default=200,
+        help="Number of files to benchmark on. Defaults to 200."
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        nargs='+',
+        help="Worker counts to try. Defaults to 1, half, all and twice the available CPUs."
+    )
+    parser.add_argument(
+        '--engines',
+        nargs='+',
+        choices=list(ENGINES),
+        help="Regex engines to compare. Defaults to every installed engine."
+    )
+    parser.add_argument(
+        '--output',
+        help=f"Where to save the config. Defaults to {tuning.config_path()}."
+    )
+    args = parser.parse_args(argv)
+    try:
+        config = tuning.calibrate(
+            pattern_file=args.pattern_file,
+            folder_path=args.target,
+            sample_size=args.sample,
+            worker_counts=args.workers,
+            engines=args.engines
+        )
+        path = tuning.save_config(config, args.output)
+    except Exception as e:
+        parser.exit(1, f'{type(e).__name__}: {e}\n')
+    print(Quickparser.stringify(config, 'yaml'))
+    print(f'Saved to {path}')
+
+# Check that an encoding name is known
+def is_encoding(name):
+    try:
+        codecs.lookup(name)
+    except LookupError:
+        return False
+    return True
+
+# Parse a shard argument of the form 'i/N'
+def shard_argument(value):
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected 'i/N', got '{value}'")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be 0 to {count - 1}")
+    return index, count
+
+# Send the parsing job to a running service
+def client_parse(args):
+    job = {
+        'pattern_file': os.path.abspath(args.pattern_file[0]),
+        'keyword': args.keyword
+    }
+    if args.target == '-':
+        job['text'] = sys.stdin.read()
+        if args.reference:
+            with open(args.reference, 'r', encoding='utf-8-sig') as f:
+                job['reference_text'] = f.read()
+    else:
+        job['target'] = os.path.abspath(args.target)
+        if args.reference:
+            job['reference'] = os.path.abspath(args.reference)
+    route = '/compare' if args.reference else '/parse'
+    response = service.request(args.server, route, job)
+    return response['report'], response.get('report_string')
+
+# Parse or compare a target folder, the default command
+def parse_main(argv):
     parser = argparse.ArgumentParser(
         formatter_class=RawDescriptionHelpFormatter,
         description=parser_description
@@ -105,7 +458,8 @@ def main():
     
     parser.add_argument(
         'pattern_file',
-        help="Path to the pattern file. {.json, .yaml, .yml}"
+        nargs='+',
+        help="Path to the pattern file. {.json, .yaml, .yml} Give several to apply them all in one pass, with a report section per pattern file."
     )
     parser.add_argument(
         'target',
@@ -128,21 +482,181 @@ def main():
         choices=['yaml', 'json', 'xml'],
         help="Serialize the parsed data."
     )
+    parser.add_argument(
+        '--shard',
+        type=shard_argument,
+        help="Parse only shard 'i/N' of the target files, partitioned by a stable hash of the file name. i counts from 0."
+    )
+    parser.add_argument(
+        '--partial',
+        help="Write this run's partial results to a JSON file for 'quickparse merge'."
+    )
+    parser.add_argument(
+        '--max-in-flight-files',
+        type=int,
+        help="Most target files held in the parsing pipeline at once."
+    )
+    parser.add_argument(
+        '--max-in-flight-bytes',
+        type=int,
+        help="Most bytes of target file text held in the parsing pipeline at once."
+    )
+    parser.add_argument(
+        '--schedule',
+        choices=['largest-first', 'fifo'],
+        default='largest-first',
+        help="Order target files are dispatched in. Defaults to largest-first."
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        help="Scan target files larger than this many bytes in parallel line-aligned chunks across processes."
+    )
+    parser.add_argument(
+        '--chunk-overlap',
+        type=int,
+        help="Bytes each chunk reads past its end so matches near a boundary complete. Defaults to 65536."
+    )
+    parser.add_argument(
+        '--db',
+        help="Record the run's files, fields and deviations in this SQLite database for 'quickparse query'."
+    )
+    parser.add_argument(
+        '--fail-fast',
+        nargs='?',
+        type=int,
+        const=1,
+        metavar='N',
+        help="With a reference, stop once N deviations or files without a keyword are seen (default 1), report the files checked so far and exit with status 1."
+    )
+    parser.add_argument(
+        '--dedup',
+        action='store_true',
+        help="Parse files with identical content once and copy the result to each of them."
+    )
+    parser.add_argument(
+        '--summary-top-k',
+        type=int,
+        default=DEFAULT_TOP_K,
+        help=f"Values and deviating fields listed per field in the brief report's fleet summary. 0 omits the summary. Defaults to {DEFAULT_TOP_K}."
+    )
+    parser.add_argument(
+        '--engine',
+        choices=list(ENGINES),
+        help="Regex engine compiling the patterns, if installed. Defaults to the calibrated engine, else re."
+    )
+    parser.add_argument(
+        '--bytes',
+        action='store_true',
+        help="Discover and match on raw file bytes, decoding only captured values."
+    )
+    parser.add_argument(
+        '--encoding',
+        help="Encoding of the log files in bytes mode. Defaults to utf-8. Implies --bytes."
+    )
+    parser.add_argument(
+        '--decode-errors',
+        choices=['strict', 'replace', 'ignore', 'backslashreplace', 'surrogateescape'],
+        help="How captured values that fail to decode are handled in bytes mode. Defaults to replace. Implies --bytes."
+    )
+    parser.add_argument(
+        '--server',
+        help="Send the job to a running service, e.g. 'unix:/tmp/quickparse.sock' or '127.0.0.1:8765'. "
+             "A target of '-' parses text from stdin against an optional reference file."
+    )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
-    report_dict, report_string = main_parse(
-        pattern_file=args.pattern_file,
-        target_folder_path=args.target,
-        reference_folder_path=args.reference,
-        keyword=args.keyword
-    )
+    fail_fast = None
+    if args.server and (args.db or args.fail_fast is not None):
+        parser.error("--db and --fail-fast cannot be used with --server")
+    elif args.server and len(args.pattern_file) > 1:
+        parser.error("--server takes a single pattern file")
+    elif len(args.pattern_file) > 1 and (args.db or args.partial):
+        parser.error("--db and --partial take a single pattern file")
+    elif args.server:
+        try:
+            report_dict, report_string = client_parse(args)
+        except (OSError, service.ServiceError) as e:
+            parser.exit(1, f'{type(e).__name__}: {e}\n')
+        if report_string is None: # Raw text jobs return only a dictionary
+            report_string = Quickparser.stringify(report_dict, 'yaml')
+    elif args.target == '-':
+        parser.error("a target of '-' requires --server")
+    elif args.shard and not args.partial:
+        parser.error("--shard requires --partial")
+    elif args.engine and args.engine not in available_engines():
+        parser.error(f"regex engine '{args.engine}' is not installed")
+    elif args.fail_fast is not None and not args.reference:
+        parser.error("--fail-fast requires a reference (-r)")
+    elif args.fail_fast is not None and args.fail_fast < 1:
+        parser.error("--fail-fast must be at least 1")
+    elif args.summary_top_k < 0:
+        parser.error("--summary-top-k must not be negative")
+    elif args.encoding and not is_encoding(args.encoding):
+        parser.error(f"unknown encoding '{args.encoding}'")
+    else:
+        encoding = None
+        if args.bytes or args.encoding or args.decode_errors:
+            encoding = args.encoding or Quickparser.DEFAULT_ENCODING
+        if args.fail_fast is not None:
+            fail_fast = FailFast(args.fail_fast)
+        try:
+            store = ResultStore(args.db) if args.db else None
+        except sqlite3.Error as e:
+            parser.exit(1, f'{type(e).__name__}: {e}\n')
+        with ExecutionContext(
+            engine=args.engine,
+            encoding=encoding,
+            decode_errors=args.decode_errors
+        ) as context, store or nullcontext():
+            report_dict, report_string = main_parse(
+                pattern_file=args.pattern_file,
+                target_folder_path=args.target,
+                reference_folder_path=args.reference,
+                keyword=args.keyword,
+                shard=args.shard,
+                partial_path=args.partial,
+                max_in_flight_files=args.max_in_flight_files,
+                max_in_flight_bytes=args.max_in_flight_bytes,
+                schedule=args.schedule,
+                chunk_size=args.chunk_size,
+                chunk_overlap=args.chunk_overlap,
+                context=context,
+                dedup=args.dedup,
+                store=store,
+                summary_top_k=args.summary_top_k,
+                fail_fast=fail_fast
+            )
+        if report_dict is None: # Error already printed by main_parse
+            sys.exit(1)
 
     if args.serialize:
         converted_report = convert_to_format(report_dict, args.serialize)
         print(converted_report)
     else:
         print(report_string)
+    if fail_fast is not None and fail_fast.failures: # Gate the caller
+        sys.exit(1)
+
+commands = {
+    'run': parse_main,
+    'serve': serve_main,
+    'merge': merge_main,
+    'calibrate': calibrate_main,
+    'query': query_main,
+    'diff': diff_main,
+}
+
+# A leading subcommand name selects it, else the arguments are a parse. A
+# pattern file named like a subcommand is parsed after `run` or `--`.
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == '--':
+        return parse_main(argv[1:])
+    if argv and argv[0] in commands:
+        return commands[argv[0]](argv[1:])
+    return parse_main(argv)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,80 @@
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from src.utils.parsing_helpers import PatternCache
+from src.utils.tuning import discover_workers, parse_backend, parse_workers
+
+# Long-lived execution context shared by discovery, parsing and comparison.
+# Pools are created on first use and kept until close(), so repeated runs
+# (service jobs, GUI clicks) skip worker start-up. Worker processes keep
+# their compiled pattern sets warm in their own pattern cache between runs.
+class ExecutionContext:
+    def __init__(
+        self, 
+        backend=None, 
+        workers=None, 
+        thread_workers=None, 
+        engine=None,
+        encoding=None,
+        decode_errors=None
+    ):
+        self.backend = backend or parse_backend()
+        self.workers = workers or parse_workers()
+        self.thread_workers = thread_workers or discover_workers()
+        self.cache = PatternCache(engine, encoding, decode_errors)
+        self._lock = threading.Lock()
+        self._thread_pool = None
+        self._process_pool = None
+        self.closed = False
+
+    # Thread pool for discovery and reference parsing
+    @property
+    def thread_pool(self):
+        with self._lock:
+            if self.closed:
+                raise RuntimeError('Execution context is closed.')
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self.thread_workers,
+                    thread_name_prefix='quickparse'
+                )
+            return self._thread_pool
+
+    # Process pool for the process backend and for chunked huge files
+    @property
+    def process_pool(self):
+        with self._lock:
+            if self.closed:
+                raise RuntimeError('Execution context is closed.')
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.workers
+                )
+            return self._process_pool
+
+    # Process pool if the run needs one, else None
+    def process_pool_for(self, chunk_size=None):
+        if chunk_size or self.backend == 'process':
+            return self.process_pool
+        return None
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            pools = (self._thread_pool, self._process_pool)
+            self._thread_pool = self._process_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Use the given context, or a temporary one closed when the block exits
+def execution_scope(context=None):
+    if context is not None:
+        return nullcontext(context)
+    return ExecutionContext()
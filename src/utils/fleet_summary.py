@@ -0,0 +1,97 @@
+from collections import Counter
+from src.utils.quickparser import CompactResult
+from src.utils.result_store import FIELD_SEPARATOR, flatten_fields
+
+# Fleet-level summary of a run, updated as each file's result arrives: files
+# per keyword, value frequency per keyword and field, deviation frequency per
+# field and how often each field was not found. Value counters are bounded
+# with the Space-Saving algorithm, so a field with millions of distinct values
+# (serial numbers, MAC addresses) costs a fixed number of counters. Counts are
+# exact until a field has more distinct values than it tracks; after that they
+# may overcount by at most the smallest tracked count.
+
+DEFAULT_TOP_K = 10
+NOT_FOUND = 'NOT FOUND' # Value of a field whose pattern did not match
+TRACKED_PER_SHOWN = 4 # Counters kept per value shown, for stable top-K ranks
+
+# Rank (value, count) pairs most frequent first as [{value: count}], a form
+# that keeps its order in reports that sort mapping keys
+def ranked(counts):
+    ordered = sorted(counts, key=lambda item: (-item[1], str(item[0])))
+    return [{value: count} for value, count in ordered]
+
+# Bounded value counter; keeps the most frequent values of one field
+class TopValues:
+    __slots__ = ('capacity', 'counts', 'approximate')
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.approximate = False
+
+    def add(self, value):
+        counts = self.counts
+        if value in counts:
+            counts[value] += 1
+        elif len(counts) < self.capacity:
+            counts[value] = 1
+        else: # Replace the least frequent value, inheriting its count
+            smallest = min(counts, key=counts.get)
+            counts[value] = counts.pop(smallest) + 1
+            self.approximate = True
+
+    # The k most frequent values with their counts, most frequent first
+    def top(self, k):
+        return ranked(self.counts.items())[:k]
+
+class FleetSummary:
+    def __init__(self, top_k=DEFAULT_TOP_K):
+        self.top_k = max(1, top_k)
+        self.capacity = self.top_k * TRACKED_PER_SHOWN
+        self.files_per_keyword = Counter()
+        self.values = {} # Holds {keyword: {field: TopValues}}
+        self.deviations = Counter()
+        self.missing = Counter() # Holds {'keyword/field': files without it}
+
+    # Count a target file's keyword and field values; same interface as a
+    # ResultStore so both can take results from collect_results
+    def add_file(self, name, keyword=None, parsed=None, role='target', label=None):
+        if role != 'target' or not keyword:
+            return
+        self.files_per_keyword[keyword] += 1
+        if isinstance(parsed, CompactResult):
+            parsed = parsed.as_dict()
+        fields = self.values.setdefault(keyword, {})
+        for field, value in flatten_fields({
+            key: value for key, value in (parsed or {}).items() if key != label
+        }):
+            if value is None or value == NOT_FOUND: # Pattern did not match
+                self.missing[FIELD_SEPARATOR.join((keyword, field))] += 1
+                continue
+            if (counter := fields.get(field)) is None:
+                counter = fields[field] = TopValues(self.capacity)
+            counter.add(value)
+
+    # Count each deviating field of a target file
+    def add_deviations(self, name, deviations, reference=None):
+        self.deviations.update(field for field, _ in flatten_fields(deviations))
+
+    def as_dict(self):
+        return {
+            'Files per Keyword': dict(self.files_per_keyword.most_common()),
+            'Values': {
+                keyword: {
+                    field: counter.top(self.top_k)
+                    for field, counter in fields.items()
+                }
+                for keyword, fields in self.values.items()
+            },
+            'Deviations per Field': ranked(self.deviations.items())[:self.top_k],
+            'Missing Fields': ranked(self.missing.items())[:self.top_k],
+            'Approximate Counts': sorted(
+                FIELD_SEPARATOR.join((keyword, field))
+                for keyword, fields in self.values.items()
+                for field, counter in fields.items()
+                if counter.approximate
+            ),
+        }
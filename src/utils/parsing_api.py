@@ -0,0 +1,225 @@
+import os
+from dataclasses import dataclass
+from concurrent.futures import Executor
+from typing import Callable, Iterator, Optional
+from src.utils.quickparser import Quickparser
+from src.utils.parsing_helpers import (
+    FileResult,
+    ParsingError,
+    PatternCache,
+    get_set_of_files,
+)
+from src.utils.pipeline import run_pipeline
+
+# Library entry points that stream one typed result per file. Nothing is
+# printed and no GUI is involved: progress and errors go to optional callbacks
+# and every file carries its own error, so a failure never aborts the run.
+# Files flow through the same staged pipeline and pattern cache as folder
+# runs, so memory stays bounded and parsers stay warm.
+
+ProgressCallback = Callable[[int, int], None] # (files done, files total)
+ErrorCallback = Callable[[FileResult], None]
+
+# Result of comparing a single target file against its reference
+@dataclass
+class ComparisonResult(FileResult):
+    reference: Optional[str] = None
+    matches: Optional[dict] = None
+    deviations: Optional[dict] = None
+
+def parse_folder(
+    pattern_file: str,
+    folder_path: str,
+    keyword: str = "Keyword",
+    collapse: bool = False,
+    executor: Optional[Executor] = None,
+    max_in_flight: Optional[int] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    on_error: Optional[ErrorCallback] = None,
+    exts: tuple = ('.txt', '.log'),
+    cache: Optional[PatternCache] = None
+) -> Iterator[FileResult]:
+    '''
+    Lazily discover and parse every file of a folder through the staged
+    pipeline, with the pattern file's parsers kept warm in a pattern cache.
+
+    Args:
+        pattern_file (str): Path to the pattern file.
+        folder_path (str): The folder holding the files to parse.
+        keyword (str, optional): Label under which the found keyword is added.
+        collapse (bool, optional): Return None instead of 'NOT FOUND'.
+        executor (Executor, optional): Executor whose workers read and parse
+            whole files, e.g. a ProcessPoolExecutor. By default files are
+            parsed on the pipeline's own threads.
+        max_in_flight (int, optional): Limit of files held at once, default
+            is four per available CPU.
+        on_progress (callable, optional): Called with (done, total).
+        on_error (callable, optional): Called with each failed FileResult.
+        exts (tuple, optional): File extensions to parse.
+        cache (PatternCache, optional): Cache of warm parsers, default is the
+            process-wide cache.
+
+    Yields:
+        FileResult: One result per file, in completion order. Files without
+            a keyword have a keyword of None. Closing the iterator cancels
+            the files still in flight.
+
+    Raises:
+        ParsingError: If the folder contains no files to parse.
+    '''
+    if not (filepaths := get_set_of_files(folder_path, exts)):
+        raise ParsingError('No files in the target folder can be parsed.')
+
+    total = len(filepaths)
+    results = run_pipeline(
+        sorted(filepaths),
+        pattern_file,
+        keyword=keyword,
+        collapse_bool=collapse,
+        max_in_flight_files=max_in_flight,
+        process_executor=executor,
+        cache=cache
+    )
+    try:
+        for done_count, result in enumerate(results, 1):
+            if result.error is not None and on_error is not None:
+                on_error(result)
+            if on_progress is not None:
+                on_progress(done_count, total)
+            yield result
+    finally:
+        results.close()
+
+def load_references(
+    pattern_file: str,
+    reference_folder_path: str,
+    keyword: str = "Keyword",
+    executor: Optional[Executor] = None,
+    exts: tuple = ('.txt', '.log'),
+    cache: Optional[PatternCache] = None
+) -> dict:
+    '''
+    Parse a reference folder into {found keyword: (file path, parsed dict)}.
+
+    Raises:
+        ParsingError: If a reference file fails to parse, has no keyword,
+            has unmatched values, or duplicates another reference's keyword.
+    '''
+    if not (filepaths := get_set_of_files(reference_folder_path, exts)):
+        raise ParsingError('No files in the reference folder can be parsed.')
+
+    references = {}
+    for result in parse_folder(
+        pattern_file, 
+        reference_folder_path, 
+        keyword, 
+        executor=executor, 
+        exts=exts, 
+        cache=cache
+    ):
+        if result.error is not None:
+            raise ParsingError(
+                f"Failed to parse reference file: {result.name}. {result.error}"
+            )
+        if not result.keyword:
+            raise ParsingError(
+                f"No keyword found in reference file: {result.path}. "
+                "Validate a keyword is in present in the text file and pattern file."
+            )
+        if result.keyword in references:
+            raise ParsingError(
+                f"Duplicate reference file for keyword found: {result.keyword}"
+            )
+        if any(val == "NOT FOUND" for val in result.parsed.values()):
+            raise ParsingError(
+                f"Failed to parse reference file: {result.name}. "
+                "Regex failed to parse."
+            )
+        references[result.keyword] = (result.path, result.parsed)
+    return references
+
+# Compare a parsed target result against the matching reference
+def compare_result(result, references, keyword="Keyword"):
+    comparison = ComparisonResult(
+        result.path, result.keyword, result.parsed, result.error, result.pattern_file
+    )
+    if result.error is not None or not result.keyword:
+        return comparison
+    if result.keyword not in references:
+        comparison.error = ParsingError(
+            f"No valid reference file found for target keyword: {result.keyword}"
+        )
+        return comparison
+
+    reference_path, ref_dict = references[result.keyword]
+    label = str(keyword)
+    comparison.reference = os.path.basename(reference_path)
+    comparison.matches, comparison.deviations = Quickparser.compare(
+        {key: val for key, val in ref_dict.items() if key != label},
+        {key: val for key, val in result.parsed.items() if key != label}
+    )
+    return comparison
+
+def compare_folders(
+    pattern_file: str,
+    target_folder_path: str,
+    reference_folder_path: str,
+    keyword: str = "Keyword",
+    collapse: bool = False,
+    executor: Optional[Executor] = None,
+    max_in_flight: Optional[int] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    on_error: Optional[ErrorCallback] = None,
+    exts: tuple = ('.txt', '.log'),
+    cache: Optional[PatternCache] = None
+) -> Iterator[ComparisonResult]:
+    '''
+    Parse the reference folder, then lazily parse every target file and
+    compare it against the reference with the same keyword.
+
+    Args:
+        pattern_file (str): Path to the pattern file.
+        target_folder_path (str): The folder holding the files to compare.
+        reference_folder_path (str): The folder holding one file per keyword.
+        keyword (str, optional): Label under which the found keyword is added.
+        collapse (bool, optional): Return None instead of 'NOT FOUND'.
+        executor (Executor, optional): Executor whose workers read and parse
+            whole files, as in parse_folder.
+        max_in_flight (int, optional): Limit of target files held at once.
+        on_progress (callable, optional): Called with (done, total) targets.
+        on_error (callable, optional): Called with each failed result.
+        exts (tuple, optional): File extensions to parse.
+        cache (PatternCache, optional): Cache of warm parsers, default is the
+            process-wide cache.
+
+    Yields:
+        ComparisonResult: One result per target file, in completion order.
+            Targets without a reference for their keyword carry an error.
+
+    Raises:
+        ParsingError: If the reference folder is invalid or the target
+            folder contains no files to parse.
+    '''
+    references = load_references(
+        pattern_file, reference_folder_path, keyword, executor, exts, cache
+    )
+
+    def report_error(result):
+        if on_error is not None:
+            on_error(result)
+
+    for result in parse_folder(
+        pattern_file,
+        target_folder_path,
+        keyword,
+        collapse,
+        executor,
+        max_in_flight,
+        on_progress,
+        exts=exts,
+        cache=cache
+    ):
+        comparison = compare_result(result, references, keyword)
+        if comparison.error is not None:
+            report_error(comparison)
+        yield comparison
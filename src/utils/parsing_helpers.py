@@ -1,9 +1,16 @@
 import os
+import json
+import hashlib
+import functools
 from datetime import datetime
 import glob
-from src.utils.quickparser import Quickparser
-from multiprocessing import cpu_count
+from src.utils.quickparser import CompactResult, Quickparser
+from src.utils.tuning import discover_workers, parse_workers, regex_engine
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Optional
+import threading
 import time
 
 class ParsingError(Exception):
@@ -24,10 +31,197 @@ def get_set_of_files(folder_path, exts: tuple):
         )
     return filepaths or None
 
-# Update the progress bar
+# Keep the files of shard `index` out of `count` by a stable hash of the name
+def shard_files(filepaths, index, count):
+    if not 0 <= index < count:
+        raise ParsingError(f'Invalid shard {index}/{count}.')
+    return {
+        file_path for file_path in filepaths
+        if int.from_bytes(
+            hashlib.md5(os.path.basename(file_path).encode('utf-8')).digest()[:8],
+            'big'
+        ) % count == index
+    }
+
+# Cache of loaded pattern files and their compiled parsers. With an
+# encoding, files are read and matched as raw bytes and only captured
+# values are decoded, using the errors policy.
+class PatternCache:
+    def __init__(self, engine=None, encoding=None, errors=None):
+        self._lock = threading.Lock()
+        self._entries = {} # Holds {path: (mtime, pattern_dict, parsers)}
+        self.engine = engine or regex_engine()
+        self.encoding = encoding
+        self.errors = errors
+        self.binary = encoding is not None
+
+    # Get the cache entry for a pattern file, reloading it if modified
+    def _entry(self, pattern_file):
+        path = os.path.abspath(pattern_file)
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != mtime:
+                ext = pattern_file.split('.')[-1]
+                entry = (mtime, Quickparser.load(path, ext), {})
+                self._entries[path] = entry
+        return entry
+
+    # Get the pattern dictionary of a pattern file
+    def load(self, pattern_file):
+        return self._entry(pattern_file)[1]
+
+    # Get warm parsers for the keywords of a pattern file
+    def parsers(self, pattern_file, keywords):
+        _, pattern_dict, parsers = self._entry(pattern_file)
+        with self._lock:
+            for keyword in keywords:
+                if keyword not in parsers:
+                    parsers[keyword] = Quickparser(
+                        keyword, 
+                        pattern_dict, 
+                        engine=self.engine,
+                        encoding=self.encoding,
+                        errors=self.errors
+                    )
+            return {keyword: parsers[keyword] for keyword in keywords}
+
+# Load a pattern file, through the cache if one is given
+def load_pattern_file(pattern_file, cache=None):
+    if cache is not None:
+        return cache.load(pattern_file)
+    ext = pattern_file.split('.')[-1]
+    return Quickparser.load(pattern_file, ext)
+
+# Process-wide cache used when no cache is given
+default_cache = PatternCache()
+
+# Process-wide cache for a regex engine and decoding, used by worker
+# processes so they match with the engine of the run that started them
+@functools.lru_cache(maxsize=None)
+def decoding_cache(encoding=None, errors=None, engine=None):
+    if encoding is None and engine in (None, default_cache.engine):
+        return default_cache
+    return PatternCache(engine=engine, encoding=encoding, errors=errors)
+
+# Result of discovering and parsing a single file
+@dataclass
+class FileResult:
+    path: str
+    keyword: Optional[str] = None
+    parsed: Optional[dict] = None
+    error: Optional[Exception] = None
+    pattern_file: Optional[str] = None # Set when a run applies several pattern files
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+# Discover the keyword of a text and parse it, returning (keyword, parsed_dict)
+def parse_text(
+    text, pattern_file, keyword="Keyword", collapse_bool=False, cache=None, counts=None
+):
+    cache = cache or default_cache
+    pattern_dict = cache.load(pattern_file)
+    found = Quickparser.discover(
+        text, list(pattern_dict), cache.encoding, cache.errors
+    )
+    if not found:
+        return None, None
+    parser = cache.parsers(pattern_file, [found])[found]
+    parsed_dict = parser.parse(text, collapse_bool, counts)
+    parsed_dict[str(keyword)] = found # Add keyword to dict
+    return found, parsed_dict
+
+# Read, discover and parse a single file, capturing any error in the result
+def parse_path(
+    file_path, pattern_file, keyword="Keyword", collapse_bool=False, cache=None, counts=None
+):
+    cache = cache or default_cache
+    try:
+        found, parsed_dict = parse_text(
+            Quickparser.read_file(file_path, cache.binary), 
+            pattern_file, 
+            keyword, 
+            collapse_bool, 
+            cache, 
+            counts
+        )
+        return FileResult(file_path, found, parsed_dict)
+    except Exception as e:
+        return FileResult(file_path, error=e)
+
+# Gather file results into {filename: parsed_dict} and the keywords found.
+# With a pattern file, each parsed dict is kept as a CompactResult of its
+# keyword's layout until it is serialized or compared. Sinks, such as a
+# ResultStore or FleetSummary, are handed every file as it arrives.
+def collect_results(results, keyword, pattern_file=None, cache=None, sinks=()):
+    return collect_results_by_pattern(
+        results, keyword, [pattern_file], cache, [sinks]
+    )[pattern_file]
+
+# Gather the results of a run over several pattern files into
+# {pattern_file: (master_dict, found_keywords)}, routing each result by its
+# pattern file. sinks holds a list of sinks per pattern file.
+def collect_results_by_pattern(results, keyword, pattern_files, cache=None, sinks=None):
+    cache = cache or default_cache
+    label = str(keyword)
+    single = len(pattern_files) == 1 # Results of one pattern file are untagged
+    collected = {
+        pattern_file: ({}, set(), pattern_sinks) for pattern_file, pattern_sinks 
+        in zip(pattern_files, sinks or [()] * len(pattern_files))
+    }
+    for result in results:
+        if result.error is not None:
+            raise result.error
+        pattern_file = pattern_files[0] if single else result.pattern_file
+        master_dict, found_keywords, pattern_sinks = collected[pattern_file]
+        for sink in pattern_sinks:
+            sink.add_file(result.name, result.keyword, result.parsed, label=label)
+        if result.keyword:
+            found_keywords.add(result.keyword)
+            if pattern_file is None:
+                master_dict[result.name] = result.parsed
+                continue
+            parser = cache.parsers(pattern_file, [result.keyword])[result.keyword]
+            master_dict[result.name] = parser.layout.pack(result.parsed, label)
+        else: # Keyword key for None type keywords
+            master_dict.setdefault(f"{keyword} Not Found", []).append(result.name)
+    return {
+        pattern_file: (master_dict, found_keywords) 
+        for pattern_file, (master_dict, found_keywords, _) in collected.items()
+    }
+
+# Pattern files of a run, from one path or a list of paths
+def pattern_file_list(pattern_file):
+    if isinstance(pattern_file, str):
+        return [pattern_file]
+    pattern_files = list(pattern_file)
+    if not pattern_files:
+        raise ParsingError('No pattern file given.')
+    if len(set(pattern_files)) != len(pattern_files):
+        raise ParsingError('The same pattern file is given more than once.')
+    return pattern_files
+
+# Rebuild the compact results of a {filename: result} dict into dicts
+def expand_results(master_dict):
+    return {
+        name: result.as_dict() if isinstance(result, CompactResult) else result
+        for name, result in master_dict.items()
+    }
+
+# Use the given executor, or a fresh one that closes when the block exits
+def executor_context(executor, max_workers):
+    if executor is not None:
+        return nullcontext(executor)
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+# Update the progress bar, or call a progress callback with the percentage
 def update_progress_bar(step, total_steps, window=None):
     progress = step / total_steps * 100
-    if window is not None:
+    if callable(window):
+        window(progress)
+    elif window is not None:
         window.update_progressbar(progress)
 
 # Find a keyword in a file
@@ -36,10 +230,12 @@ def __find_keyword_in_file(
         possible_devs,
         file_dev_dict,
         discovered_keywords,
-        ref_bool
+        ref_bool,
+        encoding=None,
+        errors=None
 ):
-    with open(file_name, 'r', encoding='utf-8-sig') as f:
-        keyword = Quickparser.discover(f.read(), possible_devs) # Find keyword
+    text = Quickparser.read_file(file_name, encoding is not None)
+    keyword = Quickparser.discover(text, possible_devs, encoding, errors) # Find keyword
     if ref_bool and not keyword:
         print(possible_devs)
         raise ParsingError( # Error if no keyword found in reference file
@@ -57,11 +253,14 @@ def __find_keyword_in_file(
 def get_file_keyword_dict(
         filepaths,
         possible_devs,
-        ref_bool=False
+        ref_bool=False,
+        executor=None,
+        encoding=None,
+        errors=None
 ):
     file_dev_dict = {} # Updates with file: keyword
     discovered_keywords = set() # Track already discovered keywords
-    with ThreadPoolExecutor(max_workers=cpu_count() * 2) as executor:
+    with executor_context(executor, discover_workers()) as executor:
         futures = []
         for file_name in filepaths:
             futures.append(
@@ -71,7 +270,9 @@ def get_file_keyword_dict(
                     possible_devs,
                     file_dev_dict,
                     discovered_keywords,
-                    ref_bool
+                    ref_bool,
+                    encoding,
+                    errors
                 )
             )
         for future in futures:
@@ -79,43 +280,55 @@ def get_file_keyword_dict(
     return file_dev_dict, discovered_keywords
 
 # Instantiate parsers for any discovered keywords into a dict
-def get_parser_objects(pattern_file, keywords):
+def get_parser_objects(pattern_file, keywords, cache=None):
+    if cache is not None:
+        return cache.parsers(pattern_file, keywords)
+    pattern_dict = load_pattern_file(pattern_file)
     parser_objects = {
-        keyword: Quickparser(keyword, pattern_file) for keyword in keywords
+        keyword: Quickparser(keyword, pattern_dict) for keyword in keywords
     }
     return parser_objects
 
 # Parse single file
-def parse_file(file_path, parser, collapse_bool, ref_bool, keyword):
+def parse_file(file_path, parser, collapse_bool, ref_bool, keyword, binary=False):
     basename = os.path.basename(file_path)
-    with open(file_path, 'r', encoding='utf-8-sig') as f:
-        parsed_dict = parser.parse(f.read(), collapse_bool)
-        if parsed_dict:
-            if ref_bool: # Error if any ref values are NOT FOUND
-                if any(val == "NOT FOUND" for val in parsed_dict.values()):
-                    raise ParsingError(
-                        f"Failed to parse reference file: {basename}. " +
-                        "Regex failed to parse."
-                    )
-            parsed_dict[str(keyword)] = parser.keyword # Add keyword to dict
-            return { # Healthy return of a parsed dict
-                str(parser.keyword): {basename: parsed_dict}
-             }
-        elif ref_bool: # Error if ref fails to parse anything
-            raise ParsingError(
-                f"Failed to parse reference file: {basename}. " +
-                "Reference File returned nothing."
-            )
+    parsed_dict = parser.parse(Quickparser.read_file(file_path, binary), collapse_bool)
+    if parsed_dict:
+        if ref_bool: # Error if any ref values are NOT FOUND
+            if any(val == "NOT FOUND" for val in parsed_dict.values()):
+                raise ParsingError(
+                    f"Failed to parse reference file: {basename}. " +
+                    "Regex failed to parse."
+                )
+        parsed_dict[str(keyword)] = parser.keyword # Add keyword to dict
+        return { # Healthy return of a parsed dict
+            str(parser.keyword): {basename: parsed_dict}
+         }
+    elif ref_bool: # Error if ref fails to parse anything
+        raise ParsingError(
+            f"Failed to parse reference file: {basename}. " +
+            "Reference File returned nothing."
+        )
 
 # Parse multiple files
-def parse_files(file_dev_dict, parsers, keyword, ref_bool=False, collapse_bool=False):
+def parse_files(
+        file_dev_dict,
+        parsers,
+        keyword,
+        ref_bool=False,
+        collapse_bool=False,
+        executor=None,
+        binary=False
+):
     master_dict = {} # Dict to hold {keyword: {file: parsed_dict}} pairs
 
     # Helper function for processing
     def __process_file(file_path, keyword, file_keyword, master_dict):
         # Get the parser object that corresponds to the file's found keyword
         if file_keyword and (parser := parsers.get(file_keyword)):
-            result = parse_file(file_path, parser, collapse_bool, ref_bool, keyword)
+            result = parse_file(
+                file_path, parser, collapse_bool, ref_bool, keyword, binary
+            )
         elif not ref_bool:
             # Keyword is None if keyword not found for target files
             result = {None: os.path.basename(file_path)}
@@ -128,7 +341,7 @@ def parse_files(file_dev_dict, parsers, keyword, ref_bool=False, collapse_bool=F
             else: # Keyword key for None type keywords
                 master_dict.setdefault(f"{keyword} Not Found", []).append(files)
         
-    with ThreadPoolExecutor(max_workers=cpu_count()) as executor:
+    with executor_context(executor, parse_workers()) as executor:
         futures = []
         for file_path, file_keyword in file_dev_dict.items():
             futures.append(
@@ -152,35 +365,63 @@ def __compare_dict(ref_dict, targ_dict):
     matches, mismatches = Quickparser.compare(ref_dict, targ_dict)
     return matches, mismatches
 
-# Function to build a dictionary of matches/deviations between folders
+# Hash a parsed target dict's content, leaving out its keyword. Parsers keep
+# the pattern file's order, so identical results serialize identically.
+def __content_hash(targ_dict, keyword):
+    content = json.dumps(
+        {key: val for key, val in targ_dict.items() if key != keyword},
+        separators=(',', ':'),
+        default=str
+    )
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+
+# Function to build a dictionary of matches/deviations between folders.
+# Targets of a keyword with identical results are compared once and share
+# the matches/deviations of their group. Compact results group by their
+# values and are only rebuilt into a dict for the first of each group.
 def compare_dicts(master_ref_dict, master_targ_dict, keyword):
     detail_dict = { # Final dictionary
         "Reference Folder": master_ref_dict,
         "Target Folder": {}
     }
+    compared = {} # Holds {(keyword, content key): (matches, mismatches)}
 
     for filename, targ_dict in master_targ_dict.items():
-        if isinstance(targ_dict, dict):
-            targ_keyword = targ_dict.get(keyword, f"{keyword} Not Found")
+        compact = isinstance(targ_dict, CompactResult)
+        if compact or isinstance(targ_dict, dict):
+            if compact:
+                targ_keyword = targ_dict.keyword
+            else:
+                targ_keyword = targ_dict.get(keyword, f"{keyword} Not Found")
             if targ_keyword != f"{keyword} Not Found":
-                # Get ref_dict for the equivalent keyword type of target
-                for filepath, dictionary in master_ref_dict.items():
-                    if dictionary.get(keyword) == targ_keyword:
-                        # Remove keyword for comparison
-                        targ_dict.pop(keyword)
-                        ref_dict = master_ref_dict.get(filepath)
-                        ref_dict.pop(keyword)
-                        # Compare
-                        matches, mismatches = __compare_dict(
-                            ref_dict, 
-                            targ_dict
-                        )
-                        # Add back keywords
-                        targ_dict[keyword] = targ_keyword
-                        ref_dict[keyword] = targ_keyword
-
-                if not 'matches' in locals() and not 'mismatches' in locals():
-                    raise ParsingError(f"No valid reference file found for target keyword: {targ_keyword}")
+                if compact:
+                    group = (targ_keyword, targ_dict.values)
+                else:
+                    group = (targ_keyword, __content_hash(targ_dict, keyword))
+                if group in compared: # Same result as an earlier target
+                    matches, mismatches = compared[group]
+                else:
+                    if compact:
+                        targ_dict = targ_dict.as_dict()
+                    # Get ref_dict for the equivalent keyword type of target
+                    for filepath, dictionary in master_ref_dict.items():
+                        if dictionary.get(keyword) == targ_keyword:
+                            # Remove keyword for comparison
+                            targ_dict.pop(keyword)
+                            ref_dict = master_ref_dict.get(filepath)
+                            ref_dict.pop(keyword)
+                            # Compare
+                            matches, mismatches = __compare_dict(
+                                ref_dict, 
+                                targ_dict
+                            )
+                            # Add back keywords
+                            targ_dict[keyword] = targ_keyword
+                            ref_dict[keyword] = targ_keyword
+
+                    if not 'matches' in locals() and not 'mismatches' in locals():
+                        raise ParsingError(f"No valid reference file found for target keyword: {targ_keyword}")
+                    compared[group] = (matches, mismatches)
 
                 # Get basename
                 basename = os.path.basename(filename)
@@ -200,6 +441,63 @@ def compare_dicts(master_ref_dict, master_targ_dict, keyword):
 
     return detail_dict
 
+# Fail-fast gate for comparison runs. Each target is checked against its
+# reference as it arrives; once deviations plus files without a keyword reach
+# max_failures, watch() stops and closes the results, which cancels the
+# pipeline's outstanding work. The run's report then covers the files seen.
+class FailFast:
+    def __init__(self, max_failures=1):
+        self.max_failures = max(1, max_failures)
+        self.references = {} # Holds {pattern_file: {keyword: ref_dict}}
+        self.label = None
+        self.deviations = 0
+        self.missing = 0
+        self.checked = 0
+        self.tripped = False
+
+    # Take the parsed references of a run, {filename: parsed_dict}, once per
+    # pattern file in a run over several
+    def start(self, parsed_reference_dict, keyword, pattern_file=None):
+        self.label = str(keyword)
+        self.references[pattern_file] = {
+            ref_dict.get(keyword): {
+                key: val for key, val in ref_dict.items() if key != keyword
+            } for ref_dict in parsed_reference_dict.values()
+        }
+
+    @property
+    def failures(self):
+        return self.deviations + self.missing
+
+    # Count a target's failures, returning True once the gate trips
+    def check(self, result):
+        # A file yields a result per pattern file; count it at the first
+        if result.pattern_file == next(iter(self.references), None):
+            self.checked += 1
+        if not result.keyword:
+            self.missing += 1
+        elif (ref_dict := self.references.get(
+            result.pattern_file, {}
+        ).get(result.keyword)) is not None:
+            targ_dict = {
+                key: val for key, val in result.parsed.items() if key != self.label
+            }
+            _, mismatches = Quickparser.compare(ref_dict, targ_dict)
+            self.deviations += len(Quickparser.leafify(mismatches))
+        self.tripped = self.failures >= self.max_failures
+        return self.tripped
+
+    # Pass results through until the gate trips
+    def watch(self, results):
+        try:
+            for result in results:
+                yield result
+                if result.error is None and self.check(result):
+                    return
+        finally:
+            if hasattr(results, 'close'):
+                results.close()
+
 # Build the final dictionaries and strings
 def build_report(
     detail_dict,
@@ -211,6 +509,9 @@ def build_report(
     keyword,
     num_deviations=None,
     reference_folder=None,
+    statistics=None,
+    summary=None,
+    stopped_early=None,
 ):
     date = datetime.now().strftime(r'%I:%M %p - %B %d, %Y').lstrip("0")
     brief_dict = {
@@ -225,11 +526,18 @@ def build_report(
         "Verdict": ( # Evaluate Fail or Pass
             "FAIL" if (
                 num_deviations or 
-                num_files_without_keywords
+                num_files_without_keywords or
+                stopped_early # Only a fail-fast gate stops a run early
                 )
             else "PASS"
         ) if reference_folder else None # Only evaluate verdict if comparing
     }
+    if statistics:
+        brief_dict["Run Statistics"] = statistics
+    if summary:
+        brief_dict["Fleet Summary"] = summary
+    if stopped_early:
+        brief_dict["Stopped Early"] = stopped_early
 
     # Release Falsy values
     brief_dict = Quickparser.collapse(brief_dict)
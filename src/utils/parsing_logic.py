@@ -1,13 +1,28 @@
+import json
 import logging
 from src.utils.quickparser import Quickparser
 from src.utils.parsing_helpers import *
+from src.utils.pipeline import PipelineStats, run_pipeline
+from src.utils.execution import execution_scope
+from src.utils.fleet_summary import DEFAULT_TOP_K, FleetSummary
 import time
 
 def single_parse(
     pattern_file,
     target_folder_path,
     window,
-    keyword
+    keyword,
+    context=None,
+    shard=None,
+    partial_path=None,
+    max_in_flight_files=None,
+    max_in_flight_bytes=None,
+    schedule='largest-first',
+    chunk_size=None,
+    chunk_overlap=None,
+    dedup=False,
+    store=None,
+    summary_top_k=DEFAULT_TOP_K
 ):
     # Start a timer
     start_time = time.perf_counter()
@@ -15,59 +30,156 @@ def single_parse(
     logging.debug('Working...')
 
     # Get the total steps of the progress bar
-    total_steps = 5
+    total_steps = 2
 
-    # Get list of target file paths
-    target_filepaths = get_set_of_files(
-        folder_path=target_folder_path,
-        exts=('.txt', '.log')
-    )
-    if not target_filepaths:
-        raise ParsingError('No files in the target folder can be parsed.')
+    # One or several pattern files, all applied in the same pass
+    pattern_files = pattern_file_list(pattern_file)
+    multiple = len(pattern_files) > 1
+    if multiple and (store is not None or partial_path):
+        raise ParsingError(
+            'Result databases and partial results take a single pattern file.'
+        )
 
-    # Load the pattern file
-    ext = pattern_file.split('.')[-1]
-    if not (pattern_dict := Quickparser.load(pattern_file, ext)):
-        raise ParsingError(f'Failed to load pattern file: {pattern_file}')
-    possible_devs = [keyword for keyword in pattern_dict]
+    with execution_scope(context) as context:
+        # Get list of target file paths
+        target_filepaths = get_set_of_files(
+            folder_path=target_folder_path,
+            exts=('.txt', '.log')
+        )
+        if not target_filepaths:
+            raise ParsingError('No files in the target folder can be parsed.')
+        if shard is not None: # Keep only this shard's share of the files
+            target_filepaths = shard_files(target_filepaths, *shard)
 
-    # Create target dictionary in the form of filepath: keyword
-    logging.debug('Discovering keywords...')
-    targ_file_dev_dict, found_keywords = get_file_keyword_dict(
-        filepaths = target_filepaths, 
-        possible_devs = possible_devs,
-        ref_bool = False
-    )
-    found_keywords.discard(None) # Discard None keywords (no keyword found)
+        # Load the pattern files
+        for path in pattern_files:
+            if not load_pattern_file(path, context.cache):
+                raise ParsingError(f'Failed to load pattern file: {path}')
 
-    # Log what keywords have been discovered
-    keywords_str = ', '.join(found_keywords)
-    logging.debug(f'Discovered keywords from target files: {keywords_str}')
-    update_progress_bar(1, total_steps, window)
+        # Record the run's results in the store and summaries as they arrive
+        if store is not None:
+            store.start_run('single', pattern_files[0], target_folder_path)
+        summaries, sinks = run_sinks(pattern_files, store, summary_top_k)
 
-    # Create parsers for each keyword discovered in pairs of keyword: parser
-    logging.debug('Creating parser objects...')
-    parsers = get_parser_objects(pattern_file, found_keywords)
-    update_progress_bar(2, total_steps, window)
-
-    # Create dictionary in the form of {keyword: {filename: parsed_dict}}
-    logging.debug('Parsing Target Files...')
-    parsed_target_dict = parse_files(
-        file_dev_dict = targ_file_dev_dict, 
-        parsers = parsers,
-        keyword = keyword,
-        ref_bool = False,
-        collapse_bool = False,
+        # Stream target files through the discover and parse pipeline into
+        # dictionaries in the form of {filename: parsed_dict}, one per
+        # pattern file
+        logging.debug('Discovering and parsing target files...')
+        pipeline_stats = PipelineStats()
+        collected = collect_results_by_pattern(
+            run_pipeline(
+                target_filepaths,
+                pattern_files if multiple else pattern_files[0],
+                keyword = keyword,
+                collapse_bool = False,
+                max_in_flight_files = max_in_flight_files,
+                max_in_flight_bytes = max_in_flight_bytes,
+                schedule = schedule,
+                stats = pipeline_stats,
+                chunk_size = chunk_size,
+                chunk_overlap = chunk_overlap,
+                chunk_executor = context.process_pool_for(chunk_size),
+                process_executor = context.process_pool_for(),
+                cache = context.cache,
+                dedup = dedup,
+            ),
+            keyword,
+            pattern_files,
+            context.cache,
+            sinks
+        )
+
+        # Log what keywords have been discovered
+        for path, (_, found_keywords) in collected.items():
+            keywords_str = ', '.join(found_keywords)
+            logging.debug(f'Discovered keywords from target files ({path}): {keywords_str}')
+        update_progress_bar(1, total_steps, window)
+
+        # Save the shard's results for a later merge
+        counted_files = len(target_filepaths)
+        if partial_path:
+            parsed_target_dict, found_keywords = collected[pattern_files[0]]
+            write_partial(partial_path, {
+                'mode': 'single',
+                'keyword': keyword,
+                'shard': shard,
+                'target_folder': target_folder_path,
+                'found_keywords': sorted(found_keywords),
+                'counted_files': counted_files,
+                'elapsed': time.perf_counter() - start_time,
+                'parsed_target': parsed_target_dict,
+            })
+
+        # Build a report per pattern file; the pipeline's statistics cover
+        # the whole run, so several pattern files report them once
+        statistics = pipeline_stats.as_dict()
+        sections = []
+        for path, (parsed_target_dict, found_keywords) in collected.items():
+            sections.append((path, *build_single_report(
+                parsed_target_dict = parsed_target_dict,
+                found_keywords = found_keywords,
+                counted_files = counted_files,
+                target_folder_path = target_folder_path,
+                keyword = keyword,
+                start_time = start_time,
+                statistics = None if multiple else statistics,
+                summary = summaries[path],
+            )))
+        if store is not None:
+            store.finish_run()
+        update_progress_bar(2, total_steps, window)
+        logging.debug('Finished')
+
+    # Return results
+    return combine_sections(sections, statistics)
+
+# A fleet summary per pattern file, and the sinks each file's results go to
+def run_sinks(pattern_files, store=None, summary_top_k=DEFAULT_TOP_K):
+    summaries = {
+        path: FleetSummary(summary_top_k) if summary_top_k else None 
+        for path in pattern_files
+    }
+    sinks = [
+        [sink for sink in (store, summaries[path]) if sink is not None]
+        for path in pattern_files
+    ]
+    return summaries, sinks
+
+# The result and report of a run. A run over several pattern files returns
+# {pattern_file: result} and a report with a section per pattern file,
+# followed by the run's statistics shared by all of them.
+def combine_sections(sections, statistics=None):
+    if len(sections) == 1:
+        _, result, report = sections[0]
+        return result, report
+    result = {path: section_result for path, section_result, _ in sections}
+    report = ("\n" + "=" * 100 + "\n").join(
+        f"Pattern File: {path}\n" + section_report 
+        for path, _, section_report in sections
     )
-    update_progress_bar(3, total_steps, window)
+    if statistics:
+        report += (
+            "\n" + "=" * 100 + "\nAll Pattern Files:\n\n" +
+            Quickparser.stringify({"Run Statistics": statistics}, 'yaml')
+        )
+    return result, report
 
+# Collapse parsed target results and build the single-target report
+def build_single_report(
+    parsed_target_dict,
+    found_keywords,
+    counted_files,
+    target_folder_path,
+    keyword,
+    start_time,
+    statistics=None,
+    summary=None
+):
     # Collapse the parsed dictionary
     logging.debug('Cleaning Data Structure...')
     parsed_target_dict = Quickparser.collapse(parsed_target_dict)
-    update_progress_bar(4, total_steps, window)
 
     # Get variables ready for the brief report
-    counted_files = len(target_filepaths)
     found_keywords = list(found_keywords)
     num_files_without_keywords = (
         len(parsed_target_dict.get(f'{keyword} Not Found', {}))
@@ -83,19 +195,33 @@ def single_parse(
         keyword = keyword,
         num_files_without_keywords = num_files_without_keywords,
         start_time = start_time,
+        statistics = statistics,
+        summary = summary and summary.as_dict(),
     )
-    update_progress_bar(5, total_steps, window)
-    logging.debug('Finished')
 
-    # Return results
+    # Compact results were written into the report as they were serialized;
+    # callers still get plain dictionaries
+    parsed_target_dict = expand_results(parsed_target_dict)
     return parsed_target_dict, report
 
 def comparison_parse(
     pattern_file, 
     target_folder_path, 
     reference_folder_path, 
-    window, 
-    keyword
+    window,
+    keyword,
+    context=None,
+    shard=None,
+    partial_path=None,
+    max_in_flight_files=None,
+    max_in_flight_bytes=None,
+    schedule='largest-first',
+    chunk_size=None,
+    chunk_overlap=None,
+    dedup=False,
+    store=None,
+    summary_top_k=DEFAULT_TOP_K,
+    fail_fast=None
 ):
     # Start a timer
     start_time = time.perf_counter()
@@ -103,27 +229,152 @@ def comparison_parse(
     logging.debug('Working...')
 
     # Get the total steps of the progress bar
-    total_steps = 8
+    total_steps = 4
 
-    # Get list of target file paths
-    target_filepaths = get_set_of_files(
-        folder_path=target_folder_path, 
-        exts=('.txt', '.log')
-    )
-    if not target_filepaths:
-        raise ParsingError('No files in the target folder can be parsed.')
+    # One or several pattern files, all applied in the same pass
+    pattern_files = pattern_file_list(pattern_file)
+    multiple = len(pattern_files) > 1
+    if multiple and (store is not None or partial_path):
+        raise ParsingError(
+            'Result databases and partial results take a single pattern file.'
+        )
+
+    with execution_scope(context) as context:
+        # Get list of target file paths
+        target_filepaths = get_set_of_files(
+            folder_path=target_folder_path, 
+            exts=('.txt', '.log')
+        )
+        if not target_filepaths:
+            raise ParsingError('No files in the target folder can be parsed.')
+        if shard is not None: # Keep only this shard's share of the files
+            target_filepaths = shard_files(target_filepaths, *shard)
     
-    # Get list of reference file paths
-    reference_filepaths = get_set_of_files(
-        folder_path=reference_folder_path, 
-        exts=('.txt', '.log')
-    )
-    if not reference_filepaths:
-        raise ParsingError('No files in the reference folder can be parsed.')
+        # Get list of reference file paths
+        reference_filepaths = get_set_of_files(
+            folder_path=reference_folder_path, 
+            exts=('.txt', '.log')
+        )
+        if not reference_filepaths:
+            raise ParsingError('No files in the reference folder can be parsed.')
+
+        # Parse the references under each pattern file
+        parsed_references = {
+            path: parse_references(path, reference_filepaths, keyword, context)
+            for path in pattern_files
+        }
+        update_progress_bar(2, total_steps, window)
 
+        # Record the run's results in the store, references first, and in the
+        # summaries as they arrive
+        summaries, sinks = run_sinks(pattern_files, store, summary_top_k)
+        if store is not None:
+            store.start_run(
+                'comparison', pattern_files[0], target_folder_path, reference_folder_path
+            )
+            for basename, ref_dict in parsed_references[pattern_files[0]].items():
+                store.add_file(
+                    basename, 
+                    ref_dict.get(keyword), 
+                    ref_dict, 
+                    role='reference', 
+                    label=keyword
+                )
+
+        # Stream target files through the discover and parse pipeline,
+        # stopping early once the fail-fast gate trips
+        logging.debug('Discovering and parsing target files...')
+        pipeline_stats = PipelineStats()
+        results = run_pipeline(
+            target_filepaths,
+            pattern_files if multiple else pattern_files[0],
+            keyword = keyword,
+            collapse_bool = False,
+            max_in_flight_files = max_in_flight_files,
+            max_in_flight_bytes = max_in_flight_bytes,
+            schedule = schedule,
+            stats = pipeline_stats,
+            chunk_size = chunk_size,
+            chunk_overlap = chunk_overlap,
+            chunk_executor = context.process_pool_for(chunk_size),
+            process_executor = context.process_pool_for(),
+            cache = context.cache,
+            dedup = dedup,
+        )
+        if fail_fast is not None:
+            for path, parsed_reference_dict in parsed_references.items():
+                fail_fast.start(parsed_reference_dict, keyword, path if multiple else None)
+            results = fail_fast.watch(results)
+        collected = collect_results_by_pattern(
+            results,
+            keyword,
+            pattern_files,
+            context.cache,
+            sinks
+        )
+
+        # Log target keywords
+        for path, (_, targ_keywords) in collected.items():
+            targ_keywords_str = ', '.join(targ_keywords)
+            logging.debug(f'Discovered keywords from target files ({path}): {targ_keywords_str}')
+        update_progress_bar(3, total_steps, window)
+
+        # Save the shard's results for a later merge
+        counted_files = len(target_filepaths)
+        if partial_path:
+            parsed_target_dict, targ_keywords = collected[pattern_files[0]]
+            write_partial(partial_path, {
+                'mode': 'comparison',
+                'keyword': keyword,
+                'shard': shard,
+                'target_folder': target_folder_path,
+                'reference_folder': reference_folder_path,
+                'found_keywords': sorted(targ_keywords),
+                'counted_files': counted_files,
+                'elapsed': time.perf_counter() - start_time,
+                'parsed_reference': parsed_references[pattern_files[0]],
+                'parsed_target': parsed_target_dict,
+            })
+
+        # Compare and build a report per pattern file
+        stopped_early = None
+        if fail_fast is not None and fail_fast.tripped:
+            stopped_early = (
+                f'After {fail_fast.checked} of {counted_files} files, '
+                f'at {fail_fast.failures} failures (limit {fail_fast.max_failures})'
+            )
+        # The pipeline's statistics cover the whole run, so several pattern
+        # files report them once
+        statistics = pipeline_stats.as_dict()
+        sections = []
+        for path, (parsed_target_dict, targ_keywords) in collected.items():
+            sections.append((path, *build_comparison_report(
+                parsed_reference_dict = parsed_references[path],
+                parsed_target_dict = parsed_target_dict,
+                found_keywords = targ_keywords,
+                counted_files = counted_files,
+                target_folder_path = target_folder_path,
+                reference_folder_path = reference_folder_path,
+                keyword = keyword,
+                start_time = start_time,
+                statistics = None if multiple else statistics,
+                summary = summaries[path],
+                stopped_early = stopped_early,
+            )))
+        if store is not None:
+            record_deviations([store], sections[0][1], keyword)
+            store.finish_run()
+        update_progress_bar(4, total_steps, window)
+        logging.debug('Finished')
+
+    # Return results
+    return combine_sections(sections, statistics)
+
+# Discover and parse the reference files under a pattern file, returning
+# {filename: parsed_dict}
+def parse_references(pattern_file, reference_filepaths, keyword, context):
     # Load the pattern file
-    ext = pattern_file.split('.')[-1]
-    if not (pattern_dict := Quickparser.load(pattern_file, ext)):
+    if not (pattern_dict := load_pattern_file(pattern_file, context.cache)):
         raise ParsingError(f'Failed to load pattern file: {pattern_file}')
     possible_devs = [keyword for keyword in pattern_dict]
 
@@ -132,54 +383,61 @@ def comparison_parse(
     ref_file_dev_dict, ref_keywords = get_file_keyword_dict(
         filepaths=reference_filepaths,
         possible_devs=possible_devs,
-        ref_bool=True
+        ref_bool=True,
+        executor=context.thread_pool,
+        encoding=context.cache.encoding,
+        errors=context.cache.errors
     )
     ref_keywords.discard(None) # Discard None keywords (no keyword found)
 
     # Log reference keywords
     ref_keywords_str = ', '.join(ref_keywords)
     logging.debug(f'Discovered keywords from reference files: {ref_keywords_str}')
-    update_progress_bar(1, total_steps, window)
 
-    # Create target dictionary in the form of filepath: keyword
-    targ_file_dev_dict, targ_keywords = get_file_keyword_dict(
-        filepaths=target_filepaths,
-        possible_devs=possible_devs,
-        ref_bool=False
-    )
-    targ_keywords.discard(None) # Discard None keywords (no keyword found)
-
-    # Log target keywords
-    targ_keywords_str = ', '.join(targ_keywords)
-    logging.debug(f'Discovered keywords from target files: {targ_keywords_str}')
-    update_progress_bar(2, total_steps, window)
-
-    # Create parsers for each keyword discovered in pairs of keyword: parser
+    # Create parsers for each reference keyword in pairs of keyword: parser
     logging.debug('Creating parser objects...')
-    total_keywords = ref_keywords | targ_keywords # Join keyword sets
-    parsers = get_parser_objects(pattern_file, total_keywords)
-    update_progress_bar(3, total_steps, window)
+    parsers = get_parser_objects(pattern_file, ref_keywords, context.cache)
 
-    # Create dictionaries in the form of {keyword: {filename: parsed_dict}}
+    # Create dictionary in the form of {filename: parsed_dict}
     logging.debug('Parsing Reference Files...')
-    parsed_reference_dict = parse_files(
+    return parse_files(
         ref_file_dev_dict,
         parsers,
         keyword = keyword,
         ref_bool = True,
         collapse_bool = False,
+        executor = context.thread_pool,
+        binary = context.cache.binary
     )
-    update_progress_bar(4, total_steps, window)
-    logging.debug('Parsing Target Files...')
-    parsed_target_dict = parse_files(
-        targ_file_dev_dict,
-        parsers,
-        keyword = keyword,
-        ref_bool = False,
-        collapse_bool = False,
-    )
-    update_progress_bar(5, total_steps, window)
 
+# Hand each target file's deviations, with the reference values, to sinks
+def record_deviations(sinks, final_dict, keyword):
+    references = {
+        ref_dict.get(keyword): ref_dict 
+        for ref_dict in final_dict.get('Reference Folder', {}).values()
+        if isinstance(ref_dict, dict)
+    }
+    for basename, vals in final_dict.get('Target Folder', {}).items():
+        if isinstance(vals, dict) and (deviations := vals.get('Deviations')):
+            for sink in sinks:
+                sink.add_deviations(
+                    basename, deviations, references.get(vals.get(keyword))
+                )
+
+# Compare parsed reference and target results and build the comparison report
+def build_comparison_report(
+    parsed_reference_dict,
+    parsed_target_dict,
+    found_keywords,
+    counted_files,
+    target_folder_path,
+    reference_folder_path,
+    keyword,
+    start_time,
+    statistics=None,
+    summary=None,
+    stopped_early=None
+):
     # Compare the reference and target into a combined dictionary
     logging.debug('Comparing reference and target...')
     final_dict = compare_dicts(
@@ -187,16 +445,13 @@ def comparison_parse(
         master_targ_dict = parsed_target_dict,
         keyword = keyword
     )
-    update_progress_bar(6, total_steps, window)
 
     # Collapse the parsed dictionary
     logging.debug('Cleaning Data Structure...')
     final_dict = Quickparser.collapse(final_dict)
-    update_progress_bar(7, total_steps, window)
 
     # Get variables ready for the brief report
-    found_keywords = list(targ_keywords)
-    counted_files = len(target_filepaths)
+    found_keywords = list(found_keywords)
     num_files_without_keywords = len(
         final_dict.get(
             'Target Folder', {}
@@ -209,6 +464,8 @@ def comparison_parse(
         if isinstance(vals, dict):
             new_deviations = Quickparser.leafify(vals.get('Deviations', {}))
             num_deviations += len(new_deviations)
+    if summary is not None:
+        record_deviations([summary], final_dict, keyword)
 
     # Build the Brief Report
     logging.debug('Building Report...')
@@ -222,19 +479,109 @@ def comparison_parse(
         keyword = keyword,
         num_deviations = num_deviations,
         reference_folder = reference_folder_path,
+        statistics = statistics,
+        summary = summary and summary.as_dict(),
+        stopped_early = stopped_early,
     )
-    update_progress_bar(8, total_steps, window)
-    logging.debug('Finished')
-
-    # Return results
     return final_dict, report
 
+# Write a shard's partial results as JSON
+def write_partial(partial_path, partial):
+    with open(partial_path, 'w', encoding='utf-8') as file:
+        Quickparser.dump(partial, file, 'json')
+
+# Combine partial results from every shard into the full run's report
+def merge_partials(partial_paths, summary_top_k=DEFAULT_TOP_K):
+    partials = []
+    for partial_path in partial_paths:
+        with open(partial_path, 'r', encoding='utf-8') as file:
+            partials.append(json.load(file))
+    if not partials:
+        raise ParsingError('No partial results to merge.')
+
+    # Validate the partials belong to the same run and cover every shard
+    first = partials[0]
+    for partial in partials[1:]:
+        for field in ('mode', 'keyword', 'target_folder', 'reference_folder'):
+            if partial.get(field) != first.get(field):
+                raise ParsingError(f'Partial results differ in {field}.')
+        if partial.get('parsed_reference') != first.get('parsed_reference'):
+            raise ParsingError('Partial results differ in reference results.')
+    shards = [tuple(partial['shard'] or (0, 1)) for partial in partials]
+    shard_count = shards[0][1]
+    if any(count != shard_count for _, count in shards):
+        raise ParsingError('Partial results differ in shard count.')
+    if sorted(index for index, _ in shards) != list(range(shard_count)):
+        raise ParsingError(
+            f'Expected one partial result per shard 0-{shard_count - 1}, '
+            f'got shards: {sorted(index for index, _ in shards)}'
+        )
+
+    # Combine the parsed targets, keywords and counters
+    keyword = first['keyword']
+    not_found_key = f'{keyword} Not Found'
+    parsed_target_dict = {}
+    found_keywords = set()
+    counted_files = 0
+    for partial in partials:
+        for name, parsed in partial['parsed_target'].items():
+            if name == not_found_key:
+                parsed_target_dict.setdefault(not_found_key, []).extend(parsed)
+            else:
+                parsed_target_dict[name] = parsed
+        found_keywords.update(partial['found_keywords'])
+        counted_files += partial['counted_files']
+
+    # Summarize the combined results as a single run would have
+    summary = None
+    if summary_top_k:
+        summary = FleetSummary(summary_top_k)
+        for name, parsed in parsed_target_dict.items():
+            if name != not_found_key:
+                summary.add_file(name, parsed.get(keyword), parsed, label=keyword)
+
+    # Report the slowest shard's time as the run time
+    start_time = time.perf_counter() - max(p['elapsed'] for p in partials)
+    if first['mode'] == 'single':
+        return build_single_report(
+            parsed_target_dict = parsed_target_dict,
+            found_keywords = sorted(found_keywords),
+            counted_files = counted_files,
+            target_folder_path = first['target_folder'],
+            keyword = keyword,
+            start_time = start_time,
+            summary = summary,
+        )
+    return build_comparison_report(
+        parsed_reference_dict = first['parsed_reference'],
+        parsed_target_dict = parsed_target_dict,
+        found_keywords = sorted(found_keywords),
+        counted_files = counted_files,
+        target_folder_path = first['target_folder'],
+        reference_folder_path = first['reference_folder'],
+        keyword = keyword,
+        start_time = start_time,
+        summary = summary,
+    )
+
 def main_parse(
     pattern_file,
     target_folder_path,
     reference_folder_path=None,
     window=None,
-    keyword="Keyword"
+    keyword="Keyword",
+    shard=None,
+    partial_path=None,
+    max_in_flight_files=None,
+    max_in_flight_bytes=None,
+    schedule='largest-first',
+    chunk_size=None,
+    chunk_overlap=None,
+    context=None,
+    dedup=False,
+    store=None,
+    summary_top_k=DEFAULT_TOP_K,
+    fail_fast=None
 ):
     try:
         parse_function = (
@@ -246,16 +593,42 @@ def main_parse(
                 target_folder_path=target_folder_path,
                 reference_folder_path=reference_folder_path,
                 window=window,
-                keyword=keyword
+                keyword=keyword,
+                shard=shard,
+                partial_path=partial_path,
+                max_in_flight_files=max_in_flight_files,
+                max_in_flight_bytes=max_in_flight_bytes,
+                schedule=schedule,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                context=context,
+                dedup=dedup,
+                store=store,
+                summary_top_k=summary_top_k,
+                fail_fast=fail_fast
             )
         else:
+            if fail_fast is not None:
+                raise ParsingError('Fail-fast requires a reference folder.')
             return parse_function(
                 pattern_file=pattern_file,
                 target_folder_path=target_folder_path,
                 window=window,
-                keyword=keyword
+                keyword=keyword,
+                shard=shard,
+                partial_path=partial_path,
+                max_in_flight_files=max_in_flight_files,
+                max_in_flight_bytes=max_in_flight_bytes,
+                schedule=schedule,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                context=context,
+                dedup=dedup,
+                store=store,
+                summary_top_k=summary_top_k
             )
     except Exception as e:
         print(f'{type(e).__name__}: {str(e)}')
+        return None, None # Keep the (report_dict, report_string) shape
     finally:
         print('='*100)
\ No newline at end of file
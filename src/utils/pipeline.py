@@ -0,0 +1,604 @@
+import os
+import copy
+import time
+import queue
+import hashlib
+import threading
+from concurrent.futures import Executor
+from typing import Iterable, Iterator, Optional, Sequence, Union
+from src.utils.quickparser import Quickparser
+from src.utils.parsing_helpers import (
+    FileResult, decoding_cache, default_cache, parse_path, parse_text
+)
+from src.utils.tuning import available_cpus, parse_workers
+
+# Staged file pipeline: enumerate -> read -> discover -> parse -> sink.
+# Comparison runs on the collected results, where identical targets are
+# compared once per group. Stages run on their own threads and hand files
+# over through bounded queues, so discovery of one file overlaps parsing of
+# another. A budget of files and bytes in flight caps memory regardless of
+# corpus size. Files are dispatched largest first so huge logs never start
+# last, and small files travel in batches to keep per-file queue overhead
+# low. With deduplication, files whose content was already seen skip
+# discovery and parsing and take a copy of the first such file's result at
+# the sink. Several pattern files can share one pass: each file is read once
+# and every pattern set is discovered and parsed on the same text, giving
+# one result per pattern file.
+
+DEFAULT_MAX_IN_FLIGHT_BYTES = 256 * 1024 * 1024
+SCHEDULES = ('largest-first', 'fifo')
+SMALL_FILE_BYTES = 64 * 1024 # Files below this size are batched
+BATCH_FILES = 32
+BATCH_BYTES = 1024 * 1024
+DEFAULT_CHUNK_OVERLAP = 64 * 1024
+
+_DONE = object() # Sentinel closing a stage's inbox
+_POLL = 0.1 # Seconds between checks of the stop flag while blocked
+
+# Limits the number of files and bytes held between enumeration and the sink
+class InFlightBudget:
+    def __init__(self, max_files, max_bytes):
+        self.max_files = max(1, max_files)
+        self.max_bytes = max(1, max_bytes)
+        self.files = 0
+        self.bytes = 0
+        self._condition = threading.Condition()
+
+    # Wait for room for `count` files of `size` bytes; False if stopped
+    def acquire(self, count, size, stop):
+        with self._condition:
+            # Anything larger than the whole budget may still run on its own
+            while self.files and (
+                self.files + count > self.max_files or
+                self.bytes + size > self.max_bytes
+            ):
+                if stop.is_set():
+                    return False
+                self._condition.wait(_POLL)
+            self.files += count
+            self.bytes += size
+            return True
+
+    # Return the bytes of a file whose text has been dropped
+    def release_bytes(self, size):
+        with self._condition:
+            self.bytes -= size
+            self._condition.notify_all()
+
+    # Return the slots of files that reached the sink
+    def release_files(self, count):
+        with self._condition:
+            self.files -= count
+            self._condition.notify_all()
+
+# Scheduler decisions and per-worker busy time of a pipeline run
+class PipelineStats:
+    def __init__(self):
+        self.schedule = None
+        self.files = 0
+        self.bytes = 0
+        self.batches = 0
+        self.batched_files = 0
+        self.largest_file = None
+        self.largest_size = 0
+        self.start_time = None
+        self.end_time = None
+        self.busy = {} # Holds {stage: {worker: busy seconds}}
+        self.prefilter = {'hits': 0, 'skips': 0, 'guarded': 0}
+        self.dedup = None # DedupIndex of a deduplicating run
+        self._lock = threading.Lock()
+
+    def record_busy(self, stage, worker, seconds):
+        with self._lock:
+            workers = self.busy.setdefault(stage, {})
+            workers[worker] = workers.get(worker, 0.0) + seconds
+
+    # Add a parse's prefilter counts
+    def record_prefilter(self, counts):
+        with self._lock:
+            for key, count in counts.items():
+                self.prefilter[key] = self.prefilter.get(key, 0) + count
+
+    # Summarize for the brief report
+    def as_dict(self):
+        wall = max((self.end_time or time.perf_counter()) - (self.start_time or 0), 1e-9)
+        utilization = {}
+        for stage, workers in self.busy.items():
+            shares = [busy / wall * 100 for busy in workers.values()]
+            utilization[stage] = {
+                'Workers': len(shares),
+                'Mean': f'{sum(shares) / len(shares):.1f}%',
+                'Max': f'{max(shares):.1f}%',
+                'Min': f'{min(shares):.1f}%',
+            }
+        statistics = {
+            'Scheduler': {
+                'Policy': self.schedule,
+                'Files': self.files,
+                'Bytes': self.bytes,
+                'Dispatches': self.batches,
+                'Batched Small Files': self.batched_files,
+                'Largest File': (
+                    f'{os.path.basename(self.largest_file)} ({self.largest_size} bytes)'
+                    if self.largest_file else None
+                ),
+            },
+            'Worker Utilization': utilization,
+            'Prefilter': {
+                'Regexes Run': self.prefilter['hits'],
+                'Regexes Skipped': self.prefilter['skips'],
+                'Patterns Skipped By Guards': self.prefilter['guarded'],
+            },
+        }
+        if self.dedup is not None:
+            statistics['Deduplication'] = self.dedup.as_dict()
+        return statistics
+
+# Content digests of the files seen by a run. The first file with a digest
+# leads and is parsed; later files with the same content follow it.
+class DedupIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._digests = set()
+        self.unique = 0
+        self.duplicates = 0
+        self.bytes_skipped = 0
+
+    # Record a file's digest, True if no earlier file had the same content
+    def claim(self, digest, size):
+        with self._lock:
+            if digest in self._digests:
+                self.duplicates += 1
+                self.bytes_skipped += size
+                return False
+            self._digests.add(digest)
+            self.unique += 1
+            return True
+
+    # Summarize for the brief report
+    def as_dict(self):
+        return {
+            'Unique Files': self.unique,
+            'Duplicate Files': self.duplicates,
+            'Bytes Not Parsed': self.bytes_skipped,
+        }
+
+# Digest of a file's content, from its bytes or streamed from its path
+def content_digest(data=None, file_path=None):
+    digest = hashlib.blake2b(digest_size=16)
+    if data is not None:
+        digest.update(data)
+    else:
+        with open(file_path, 'rb') as f:
+            while block := f.read(1024 * 1024):
+                digest.update(block)
+    return digest.digest()
+
+# Copy the results of a file for another file with the same content
+def _copy_results(results, file_path):
+    duplicates = copy.deepcopy(results)
+    for duplicate in duplicates:
+        duplicate.path = file_path
+    return duplicates
+
+# Stat files and group them into dispatch batches under a scheduling policy
+def schedule_batches(
+    filepaths,
+    schedule='largest-first',
+    batch_files=BATCH_FILES,
+    batch_bytes=BATCH_BYTES,
+    small_file_bytes=SMALL_FILE_BYTES,
+    stats=None
+):
+    if schedule not in SCHEDULES:
+        raise ValueError(f'Unknown schedule: {schedule}')
+
+    def sized_files():
+        for file_path in filepaths:
+            try:
+                yield file_path, os.path.getsize(file_path)
+            except OSError:
+                yield file_path, 0 # Let the read stage report the error
+
+    sized = sized_files()
+    if schedule == 'largest-first':
+        sized = sorted(sized, key=lambda item: item[1], reverse=True)
+
+    batch = []
+    batch_size = 0
+    for file_path, size in sized:
+        if stats is not None:
+            stats.files += 1
+            stats.bytes += size
+            if size > stats.largest_size or stats.largest_file is None:
+                stats.largest_file, stats.largest_size = file_path, size
+        if size >= small_file_bytes:
+            yield [(file_path, size)]
+            continue
+        batch.append((file_path, size))
+        batch_size += size
+        if len(batch) >= batch_files or batch_size >= batch_bytes:
+            yield batch
+            batch, batch_size = [], 0
+    if batch:
+        yield batch
+
+# Parse a file in a worker process, returning its results, one per pattern
+# file, and prefilter counts. Several pattern files share one read.
+def _parse_path_counted(
+    file_path, 
+    pattern_files, 
+    keyword, 
+    collapse_bool, 
+    encoding=None, 
+    errors=None, 
+    engine=None
+):
+    counts = {}
+    cache = decoding_cache(encoding, errors, engine)
+    if len(pattern_files) == 1:
+        result = parse_path(
+            file_path, pattern_files[0], keyword, collapse_bool, cache, counts
+        )
+        return [result], counts
+    try:
+        text = Quickparser.read_file(file_path, cache.binary)
+        results = []
+        for pattern_file in pattern_files:
+            found, parsed_dict = parse_text(
+                text, pattern_file, keyword, collapse_bool, cache, counts
+            )
+            results.append(FileResult(file_path, found, parsed_dict))
+        return results, counts
+    except Exception as e:
+        return [FileResult(file_path, error=e)], counts
+
+# A file moving through the pipeline
+class _Work:
+    __slots__ = (
+        'path', 'size', 'chunked', 'text', 'keywords', 'results', 'digest', 
+        'duplicate'
+    )
+
+    def __init__(self, path, size, chunked=False):
+        self.path = path
+        self.size = size
+        self.chunked = chunked # Scanned in chunks, never read whole
+        self.text = None
+        self.keywords = None # Keyword found per pattern file
+        self.results = None # One result per pattern file, or a single error
+        self.digest = None # Content digest when deduplicating
+        self.duplicate = False # Takes the result of an identical file
+
+# Put an item on a bounded queue, giving up if the pipeline stops
+def _put(box, item, stop):
+    while not stop.is_set():
+        try:
+            box.put(item, timeout=_POLL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+# Get an item from a queue, returning _DONE if the pipeline stops
+def _get(box, stop):
+    while not stop.is_set():
+        try:
+            return box.get(timeout=_POLL)
+        except queue.Empty:
+            continue
+    return _DONE
+
+# A pool of threads applying a function to batches between bounded queues
+class Stage:
+    def __init__(self, name, function, inbox, outbox, workers, stop, stats=None):
+        self.name = name
+        self.function = function
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stop = stop
+        self.stats = stats
+        self._remaining = workers
+        self._lock = threading.Lock()
+        self.threads = [
+            threading.Thread(
+                target=self._run, name=f'quickparse-{name}-{i}', daemon=True
+            ) for i in range(workers)
+        ]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def _run(self):
+        worker = threading.current_thread().name
+        while (batch := _get(self.inbox, self.stop)) is not _DONE:
+            started = time.perf_counter()
+            for work in batch:
+                if work.results and work.results[0].error is not None:
+                    continue # Files that already failed skip the remaining stages
+                try:
+                    self.function(work)
+                except Exception as e:
+                    work.text = None
+                    work.results = [FileResult(work.path, error=e)]
+            if self.stats is not None:
+                self.stats.record_busy(
+                    self.name, worker, time.perf_counter() - started
+                )
+            if not _put(self.outbox, batch, self.stop):
+                return
+        self.inbox.put(_DONE) # Let sibling workers see the sentinel too
+        with self._lock:
+            self._remaining -= 1
+            last = self._remaining == 0
+        if last:
+            _put(self.outbox, _DONE, self.stop)
+
+def run_pipeline(
+    filepaths: Iterable[str],
+    pattern_file: Union[str, Sequence[str]],
+    keyword: str = "Keyword",
+    collapse_bool: bool = False,
+    max_in_flight_files: Optional[int] = None,
+    max_in_flight_bytes: Optional[int] = None,
+    readers: Optional[int] = None,
+    workers: Optional[int] = None,
+    schedule: str = 'largest-first',
+    stats: Optional[PipelineStats] = None,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    chunk_executor: Optional[Executor] = None,
+    process_executor: Optional[Executor] = None,
+    cache=None,
+    dedup: bool = False
+) -> Iterator[FileResult]:
+    '''
+    Stream files through the read, discover and parse stages, yielding
+    each file's result in completion order.
+
+    Args:
+        filepaths (Iterable[str]): Files to process, consumed lazily.
+        pattern_file (str or list): Path to the pattern file, or a list of
+            pattern files all applied to each file read. With a list, each
+            file yields one result per pattern file, tagged with its path.
+        keyword (str, optional): Label under which the found keyword is added.
+        collapse_bool (bool, optional): Return None instead of 'NOT FOUND'.
+        max_in_flight_files (int, optional): Files held between enumeration
+            and the sink, default is four per available CPU.
+        max_in_flight_bytes (int, optional): Bytes of file text held at once,
+            default is 256 MiB. A larger file still runs, on its own.
+        readers (int, optional): Reader threads, default is 4.
+        workers (int, optional): Threads per CPU-bound stage, default is the
+            tuned parse worker count.
+        schedule (str, optional): 'largest-first' stats every file up front
+            and dispatches the biggest first; 'fifo' keeps enumeration order.
+        stats (PipelineStats, optional): Filled with scheduler decisions and
+            per-worker busy time.
+        chunk_size (int, optional): Files larger than this are discovered and
+            parsed in line-aligned chunks of this size on chunk_executor.
+        chunk_overlap (int, optional): Bytes each chunk reads past its end,
+            default is 64 KiB.
+        chunk_executor (Executor, optional): Executor scanning the chunks,
+            typically a ProcessPoolExecutor. Required for chunking.
+        process_executor (Executor, optional): Process backend. Workers then
+            read, discover and parse whole files themselves, and `workers`
+            threads keep them fed.
+        cache (PatternCache, optional): Cache of warm parsers.
+        dedup (bool, optional): Hash each file's content while reading it and
+            discover and parse each distinct content once. Files with the
+            same content get a copy of its result under their own name.
+            Chunked files are never deduplicated.
+
+    Yields:
+        FileResult: One result per file and pattern file, with any error
+            captured. A file that fails yields a single error result.
+    '''
+    cache = cache or default_cache
+    tagged = not isinstance(pattern_file, str)
+    pattern_files = list(pattern_file) if tagged else [pattern_file]
+    possible_devs = [list(cache.load(path)) for path in pattern_files]
+    max_files = max_in_flight_files or available_cpus() * 4
+    budget = InFlightBudget(
+        max_files, max_in_flight_bytes or DEFAULT_MAX_IN_FLIGHT_BYTES
+    )
+    stop = threading.Event()
+    label = str(keyword)
+
+    chunking = bool(chunk_size and chunk_executor)
+    overlap = DEFAULT_CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
+    dedup_index = DedupIndex() if dedup else None
+    if stats is not None:
+        stats.dedup = dedup_index
+
+    # Follow an earlier file with the same content, dropping this one's text
+    def follow(work):
+        work.duplicate = True
+        work.text = None
+        budget.release_bytes(work.size)
+        work.size = 0
+
+    def read(work):
+        if work.chunked:
+            return
+        if dedup_index is None:
+            work.text = Quickparser.read_file(work.path, cache.binary)
+            return
+        with open(work.path, 'rb') as f:
+            data = f.read()
+        work.digest = content_digest(data)
+        if dedup_index.claim(work.digest, len(data)):
+            work.text = Quickparser.file_text(data, cache.binary)
+        else:
+            follow(work)
+
+    def discover(work):
+        if work.duplicate:
+            return
+        if work.chunked: # One scan discovers the keywords of every pattern file
+            work.keywords = Quickparser.discover_file_chunked_many(
+                work.path, 
+                possible_devs, 
+                chunk_executor, 
+                chunk_size, 
+                overlap, 
+                cache.encoding, 
+                cache.errors
+            )
+        else:
+            work.keywords = [
+                Quickparser.discover(work.text, devs, cache.encoding, cache.errors)
+                for devs in possible_devs
+            ]
+        if not any(work.keywords): # Nothing to parse, drop the text early
+            work.text = None
+            budget.release_bytes(work.size)
+            work.size = 0
+            work.results = [
+                FileResult(work.path, pattern_file=path if tagged else None)
+                for path in pattern_files
+            ]
+
+    def parse(work):
+        if work.results is not None or work.duplicate: # No keyword found
+            return
+        results = []
+        try:
+            parsers = [
+                cache.parsers(path, [found])[found] if found else None
+                for path, found in zip(pattern_files, work.keywords)
+            ]
+            if work.chunked: # One scan parses with every pattern file
+                chunked = iter(Quickparser.parse_file_chunked_many(
+                    [parser for parser in parsers if parser is not None],
+                    work.path, 
+                    chunk_executor, 
+                    chunk_size, 
+                    overlap, 
+                    collapse_bool, 
+                    cache.binary
+                ))
+            for path, found, parser in zip(pattern_files, work.keywords, parsers):
+                tag = path if tagged else None
+                if not found:
+                    results.append(FileResult(work.path, pattern_file=tag))
+                    continue
+                if work.chunked:
+                    parsed_dict = next(chunked)
+                else:
+                    counts = {}
+                    parsed_dict = parser.parse(work.text, collapse_bool, counts)
+                    if stats is not None:
+                        stats.record_prefilter(counts)
+                parsed_dict[label] = found # Add keyword to dict
+                results.append(FileResult(work.path, found, parsed_dict, pattern_file=tag))
+        finally:
+            work.text = None
+            budget.release_bytes(work.size)
+            work.size = 0
+        work.results = results
+
+    def parse_in_process(work):
+        if work.chunked: # Chunks are already spread across processes
+            discover(work)
+            return parse(work)
+        if dedup_index is not None:
+            work.digest = content_digest(file_path=work.path)
+            if not dedup_index.claim(work.digest, os.path.getsize(work.path)):
+                return follow(work)
+        work.results, counts = process_executor.submit(
+            _parse_path_counted, 
+            work.path, 
+            pattern_files, 
+            keyword, 
+            collapse_bool, 
+            cache.encoding, 
+            cache.errors,
+            cache.engine
+        ).result()
+        if tagged and work.results[0].error is None:
+            for result, path in zip(work.results, pattern_files):
+                result.pattern_file = path
+        if stats is not None:
+            stats.record_prefilter(counts)
+
+    # Wire the stages together with bounded queues
+    workers = workers or parse_workers()
+    if process_executor is not None:
+        functions = [('parse', parse_in_process, workers)]
+    else:
+        functions = [
+            ('read', read, readers or 4),
+            ('discover', discover, workers),
+            ('parse', parse, workers),
+        ]
+    boxes = [queue.Queue(maxsize=max_files) for _ in range(len(functions) + 1)]
+    stages = [
+        Stage(name, function, boxes[i], boxes[i + 1], count, stop, stats)
+        for i, (name, function, count) in enumerate(functions)
+    ]
+    if stats is not None:
+        stats.schedule = schedule
+        stats.start_time = time.perf_counter()
+
+    # Enumerate batches into the first stage as the budget allows
+    def enumerate_files():
+        for batch in schedule_batches(
+            filepaths,
+            schedule,
+            batch_files=min(BATCH_FILES, max_files),
+            stats=stats
+        ):
+            if stats is not None:
+                stats.batches += 1
+                if len(batch) > 1:
+                    stats.batched_files += len(batch)
+            # Chunked files and files parsed in worker processes hold no text
+            # in this process
+            batch = [
+                _Work(file_path, 0, True)
+                if chunking and file_size > chunk_size
+                else _Work(file_path, 0 if process_executor else file_size)
+                for file_path, file_size in batch
+            ]
+            size = sum(work.size for work in batch)
+            if not budget.acquire(len(batch), size, stop):
+                return
+            if not _put(boxes[0], batch, stop):
+                return
+        _put(boxes[0], _DONE, stop)
+
+    for stage in stages:
+        stage.start()
+    threading.Thread(
+        target=enumerate_files, name='quickparse-enumerate', daemon=True
+    ).start()
+
+    # Sink: hand results to the consumer and free their slots. A duplicate
+    # file's result is copied from the first file with its content, waiting
+    # for it if that file has not reached the sink yet.
+    leaders = {} # Holds {digest: result of the first file}
+    followers = {} # Holds {digest: [paths waiting for that result]}
+    try:
+        while (batch := _get(boxes[-1], stop)) is not _DONE:
+            for work in batch:
+                if work.size: # Failed before its text was released
+                    budget.release_bytes(work.size)
+                    work.size = 0
+            budget.release_files(len(batch))
+            for work in batch:
+                if work.digest is None:
+                    yield from work.results
+                elif not work.duplicate:
+                    leaders[work.digest] = work.results
+                    yield from work.results
+                    for file_path in followers.pop(work.digest, ()):
+                        yield from _copy_results(work.results, file_path)
+                elif work.digest in leaders:
+                    yield from _copy_results(leaders[work.digest], work.path)
+                else:
+                    followers.setdefault(work.digest, []).append(work.path)
+    finally:
+        stop.set()
+        if stats is not None:
+            stats.end_time = time.perf_counter()
@@ -1,21 +1,289 @@
+import io
 import re
+import sys
 import yaml
 import json
+import codecs
 import logging
-from typing import IO, Optional, Literal
+import functools
+from contextlib import nullcontext
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import IO, Iterable, Optional, Literal, Union
+from src.utils.regex_engines import EngineError, compile_regex, get_engine
+from src.utils.tuning import parse_workers
+try:
+    from re import _parser as sre_parse # Python 3.11+
+except ImportError:
+    import sre_parse
+
+_REPEATS = tuple(
+    getattr(sre_parse, name) 
+    for name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')
+    if hasattr(sre_parse, name)
+)
 
 class QuickparserError(Exception):
     def __init__(self, message=''):
         super().__init__(message)
 
+class Pattern:
+    '''
+    A compiled regex paired with the literal substrings that every match
+    must contain. search() skips the regex when one of them is missing.
+    The regex comes from the chosen engine, or from re as a fallback.
+    '''
+    __slots__ = ('regex', 'literals', 'source', 'flags', 'engine')
+
+    def __init__(
+        self, 
+        regex: re.Pattern, 
+        literals: tuple = (), 
+        source: Optional[str] = None,
+        flags: int = 0,
+        engine: Optional[str] = None
+    ):
+        self.regex = regex
+        self.literals = literals
+        self.source = regex.pattern if source is None else source
+        self.flags = flags
+        self.engine = engine
+
+    # Recompile when unpickled, as not every engine's regexes pickle
+    def __reduce__(self):
+        return (_rebuild_pattern, (self.source, self.flags, self.engine))
+
+    @property
+    def pattern(self):
+        return self.source
+
+    @property
+    def groups(self):
+        return self.regex.groups
+
+    def possible(self, text: str, memo: Optional[dict] = None) -> bool:
+        '''
+        Check that every required literal occurs in the text.
+
+        Args:
+            text (str): The text to check.
+            memo (dict, optional): Literal lookups already done on this text,
+                shared between the patterns of one parse.
+
+        Returns:
+            bool: False if the pattern cannot match the text.
+        '''
+        for literal in self.literals:
+            if memo is None:
+                found = literal in text
+            elif (found := memo.get(literal)) is None:
+                found = memo[literal] = literal in text
+            if not found:
+                return False
+        return True
+
+    def search(self, text: str, *args):
+        if not self.possible(text):
+            return None
+        return self.regex.search(text, *args)
+
+    def __repr__(self):
+        return f'Pattern({self.pattern!r}, literals={self.literals!r})'
+
+def _rebuild_pattern(source, flags, engine):
+    return Quickparser.compile_pattern(source, flags, engine)
+
+class PatternGroup(dict):
+    '''
+    Compiled patterns of a nested group. If the group has a guard pattern
+    that does not match, every child is resolved as not found unscanned.
+    A group scoped to a section only searches that section of the text.
+    The keyword's top group holds the section header patterns. A records
+    group has no children; its pattern yields one record per match.
+    '''
+    def __init__(
+        self, 
+        *args, 
+        guard: Optional[Pattern] = None, 
+        section: Optional[str] = None,
+        sections: Optional[dict] = None,
+        records: Optional[Pattern] = None,
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.guard = guard
+        self.section = section
+        self.sections = sections or {}
+        self.records = records
+
+class _Fields(tuple):
+    '''
+    Compact named-group fields of a value, as (name, value) pairs.
+    '''
+    __slots__ = ()
+
+class _Records(tuple):
+    '''
+    Compact records of a records group, in text order.
+    '''
+    __slots__ = ()
+
+# Slot of a value absent from the parsed dictionary. Parsed dictionaries are
+# collapsed, so None never appears as a value.
+_MISSING = None
+
+def _pack_value(value):
+    '''
+    Turn a parsed value into its compact, hashable form with interned strings.
+    '''
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return _Fields(
+            (sys.intern(name), _pack_value(field)) 
+            for name, field in value.items()
+        )
+    if isinstance(value, list):
+        return _Records(_pack_value(record) for record in value)
+    return value
+
+def _unpack_value(value):
+    '''
+    Turn a compact value back into the parsed value.
+    '''
+    if isinstance(value, _Fields):
+        return {name: _unpack_value(field) for name, field in value}
+    if isinstance(value, _Records):
+        return [_unpack_value(record) for record in value]
+    return value
+
+class ResultLayout:
+    '''
+    Integer slots for the leaves of a compiled pattern tree, in parse order.
+    A records group or a value with named groups fills a single slot.
+    '''
+    __slots__ = ('paths', 'slots')
+
+    def __init__(self, patterns: dict):
+        self.paths = tuple(ResultLayout.__leaves(patterns))
+        self.slots = {path: slot for slot, path in enumerate(self.paths)}
+
+    @staticmethod
+    def __leaves(patterns: dict, path: tuple = ()):
+        for key, value in patterns.items():
+            if isinstance(value, dict) and value.records is None:
+                yield from ResultLayout.__leaves(value, path + (key,))
+            else:
+                yield path + (key,)
+
+    def pack(self, parsed_dict: dict, label: Optional[str] = None) -> 'CompactResult':
+        '''
+        Store a parsed dictionary as one interned value per slot. The
+        keyword found, under `label`, is kept beside the values.
+        '''
+        values = []
+        # The keyword is added last; a field of the same name keeps its place
+        appended = label is not None and next(reversed(parsed_dict), None) == label
+        for path in self.paths:
+            if appended and path == (label,):
+                values.append(_MISSING)
+                continue
+            node = parsed_dict
+            for key in path:
+                if not isinstance(node, dict) or key not in node:
+                    node = _MISSING
+                    break
+                node = node[key]
+            values.append(_pack_value(node))
+        keyword = parsed_dict.get(label) if label is not None else None
+        return CompactResult(self, tuple(values), label, keyword)
+
+class CompactResult:
+    '''
+    A parsed dictionary stored as a tuple of interned values, one per slot
+    of its keyword's ResultLayout. as_dict() rebuilds the nested dictionary,
+    so it is only needed when the result is serialized or compared.
+    '''
+    __slots__ = ('layout', 'values', 'label', 'keyword')
+
+    def __init__(
+        self, 
+        layout: ResultLayout, 
+        values: tuple, 
+        label: Optional[str] = None, 
+        keyword: Optional[str] = None
+    ):
+        self.layout = layout
+        self.values = values
+        self.label = label
+        self.keyword = keyword
+
+    def get(self, path: tuple, default=None):
+        '''
+        Get the parsed value at a path of keys without rebuilding the dict.
+        '''
+        slot = self.layout.slots.get(tuple(path))
+        if slot is None or self.values[slot] is _MISSING:
+            return default
+        return _unpack_value(self.values[slot])
+
+    def as_dict(self) -> dict:
+        '''
+        Rebuild the nested parsed dictionary, in parse order.
+        '''
+        parsed_dict = {}
+        for path, value in zip(self.layout.paths, self.values):
+            if value is _MISSING:
+                continue
+            node = parsed_dict
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            node[path[-1]] = _unpack_value(value)
+        if self.label is not None:
+            parsed_dict[self.label] = self.keyword
+        return parsed_dict
+
+# Serialize compact results as the dictionaries they stand for
+def _serializable(data):
+    if isinstance(data, CompactResult):
+        return data.as_dict()
+    raise TypeError(f'Object of type {type(data).__name__} is not serializable')
+
+class ReportDumper(yaml.Dumper):
+    '''
+    YAML dumper writing every object out in full. Results shared between
+    files would otherwise be written as anchors and aliases. Compact
+    results are written as their dictionaries.
+    '''
+    def ignore_aliases(self, data):
+        return True
+
+ReportDumper.add_representer(
+    CompactResult, 
+    lambda dumper, data: dumper.represent_dict(data.as_dict())
+)
+
 class Quickparser:
 
+    # Reserved keys of a group's guard pattern, the section it is scoped
+    # to, the keyword's section header patterns, and a records pattern
+    GUARD_KEY = '@guard'
+    SECTION_KEY = '@section'
+    SECTIONS_KEY = '@sections'
+    RECORDS_KEY = '@records'
+
+    # Decoding of captured values when parsing raw bytes
+    DEFAULT_ENCODING = 'utf-8'
+    DEFAULT_ERRORS = 'replace'
+
     def __init__(
         self, 
         keyword: str, 
-        pattern_file: str, 
+        pattern_file: Union[str, dict], 
         ext: Optional[Literal['.yaml', '.json']] = '.yaml', 
-        log: Optional[bool] = False
+        log: Optional[bool] = False,
+        engine: Optional[str] = None,
+        encoding: Optional[str] = None,
+        errors: Optional[str] = None
     ):
         '''
         Initialize Quickparser specific to the keyword. Requires a
@@ -24,14 +292,51 @@ class Quickparser:
 
         Args:
             keyword (str): Initializes a parser for a specific keyword
-            pattern_file (str): Pulls the keyword information from this file
+            pattern_file (str | dict): Pulls the keyword information from this
+                file, or from an already loaded pattern dictionary.
             ext (str, optional): Pattern file extension, default is '.yaml'.
             log (bool, optional): Flag to enable logging, default is False.
+            engine (str, optional): Regex engine, 're' (default), 'regex' or
+                're2'. Patterns the engine cannot compile use re.
+            encoding (str, optional): Encoding of bytes input, default is
+                'utf-8'. Patterns are encoded with it to match raw bytes and
+                only captured values are decoded.
+            errors (str, optional): Error policy decoding captured values,
+                default is 'replace'.
+
+        Raises:
+            QuickparserError: If the keyword is missing, a pattern is invalid,
+                the engine is not installed or the encoding is unknown.
         '''
         self.logging = log
         self.keyword = keyword
+        self.encoding = encoding or Quickparser.DEFAULT_ENCODING
+        self.errors = errors or Quickparser.DEFAULT_ERRORS
+        try:
+            self.engine = get_engine(engine).name
+            codecs.lookup(self.encoding)
+            codecs.lookup_error(self.errors)
+        except (EngineError, LookupError) as e:
+            raise QuickparserError(str(e))
         self.ext = ext.strip().lower()
-        self.pattern_file = Quickparser.load(pattern_file, self.ext)
+        if isinstance(pattern_file, dict):
+            self.pattern_file = pattern_file
+        else:
+            self.pattern_file = Quickparser.load(pattern_file, self.ext)
+
+        # Compile the keyword's patterns once so repeated parses stay warm
+        if (var_dict := self.pattern_file.get(self.keyword)) is None:
+            raise QuickparserError(
+                f'Keyword "{self.keyword}" not found in pattern file'
+            )
+        self.patterns = Quickparser.compile(var_dict, engine=self.engine)
+        self.byte_patterns = None # Compiled on the first bytes input
+        self.layout = ResultLayout(self.patterns)
+        self.sections = self.patterns.sections
+        # Sections and records need the whole text rather than chunks
+        self.whole_text = bool(self.sections) or Quickparser.__has_records(
+            self.patterns
+        )
 
         if self.logging:
             self.initialize_logger()
@@ -98,57 +403,462 @@ class Quickparser:
             else:
                 raise QuickparserError(f'Unsupported logging level: {level}')
 
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def required_literals(regex: re.Pattern) -> tuple:
+        '''
+        Extract literal substrings that any match of a regex must contain,
+        such as "Version" in 'Cisco IOS XE Software, Version (.*)'.
+
+        Args:
+            regex (re.Pattern): The compiled regex, of str or bytes.
+
+        Returns:
+            tuple: The required literals, longest first, of the regex's
+                type. Empty if none can be extracted, e.g. for
+                case-insensitive patterns.
+        '''
+        if (
+            not isinstance(regex.pattern, (str, bytes)) 
+            or regex.flags & re.IGNORECASE
+        ):
+            return ()
+        try:
+            parsed = sre_parse.parse(regex.pattern, regex.flags)
+        except Exception:
+            return ()
+
+        runs = []
+        def walk(items):
+            run = []
+            for op, av in items:
+                if op is sre_parse.LITERAL:
+                    run.append(chr(av))
+                    continue
+                runs.append(''.join(run))
+                run = []
+                if op is sre_parse.SUBPATTERN:
+                    _, add_flags, _, sub_items = av
+                    if not add_flags & re.IGNORECASE:
+                        walk(sub_items)
+                elif op in _REPEATS and av[0] >= 1: # Required at least once
+                    walk(av[2])
+            runs.append(''.join(run))
+        walk(parsed)
+
+        # Single characters are too common to be worth a scan
+        literals = {run for run in runs if len(run) >= 2}
+        if isinstance(regex.pattern, bytes): # Literals of bytes are byte values
+            literals = {run.encode('latin-1') for run in literals}
+        return tuple(sorted(literals, key=len, reverse=True))
+
+    @staticmethod
+    def compile_pattern(
+        pattern: str, 
+        flags: int = re.MULTILINE, 
+        engine: Optional[str] = None,
+        encoding: Optional[str] = None
+    ) -> Pattern:
+        '''
+        Compile a regex along with its required literals. Patterns are
+        always validated by re; another engine compiles them if it can.
+        Literals are only extracted when re compiles the regex, as another
+        engine may read the same syntax differently. With an encoding the
+        pattern is encoded to match raw bytes.
+
+        Raises:
+            re.error: If the pattern fails to compile.
+            UnicodeError: If the pattern cannot be encoded.
+        '''
+        if encoding is not None:
+            pattern = pattern.encode(encoding)
+        std_regex = re.compile(pattern, flags)
+        regex = (
+            std_regex if engine in (None, 're') 
+            else compile_regex(pattern, flags, engine)
+        )
+        literals = (
+            Quickparser.required_literals(std_regex) 
+            if isinstance(regex, re.Pattern) else ()
+        )
+        return Pattern(regex, literals, pattern, flags, engine)
+
+    @staticmethod
+    def compile(
+        var_dict: dict, 
+        sections: Optional[dict] = None, 
+        engine: Optional[str] = None,
+        encoding: Optional[str] = None
+    ) -> PatternGroup:
+        '''
+        Compile every regex pattern in a keyword's dictionary, keeping the
+        nested structure and the order of list fallbacks. A group's
+        '@guard' pattern becomes the guard of its PatternGroup and its
+        '@section' name scopes it to a section. The keyword's '@sections'
+        maps section names to the regex of their header line. A group with
+        a '@records' pattern parses into a list with one record per match.
+
+        Args:
+            var_dict (dict): The dictionary containing regex patterns.
+            sections (dict, optional): Compiled section headers of the
+                keyword, passed down to nested groups.
+            engine (str, optional): Regex engine compiling the patterns.
+            encoding (str, optional): Compiles bytes patterns encoded with
+                it, to match raw bytes.
+
+        Returns:
+            PatternGroup: The same structure with compiled patterns as values.
+
+        Raises:
+            QuickparserError: If a pattern fails to compile or a group is
+                scoped to an undefined section.
+        '''
+        compiled = PatternGroup()
+        top = sections is None
+        if top: # The keyword's top group defines the sections
+            try:
+                sections = {
+                    name: Quickparser.compile_pattern(
+                        header, engine=engine, encoding=encoding
+                    )
+                    for name, header in var_dict.get(
+                        Quickparser.SECTIONS_KEY, {}
+                    ).items()
+                }
+            except (re.error, TypeError, AttributeError, UnicodeError) as e:
+                raise QuickparserError(f'Invalid section headers: {e}')
+            compiled.sections = sections
+        for key, value in var_dict.items():
+            try:
+                if key == Quickparser.SECTIONS_KEY:
+                    if not top:
+                        raise QuickparserError(
+                            'Sections may only be defined at the keyword level'
+                        )
+                elif key == Quickparser.SECTION_KEY:
+                    if value not in sections:
+                        raise QuickparserError(f'Undefined section: "{value}"')
+                    compiled.section = value
+                elif key == Quickparser.GUARD_KEY:
+                    compiled.guard = Quickparser.compile_pattern(
+                        value, engine=engine, encoding=encoding
+                    )
+                elif key == Quickparser.RECORDS_KEY:
+                    if top:
+                        raise QuickparserError(
+                            'Records may only be defined in a nested group'
+                        )
+                    compiled.records = Quickparser.compile_pattern(
+                        value, engine=engine, encoding=encoding
+                    )
+                elif isinstance(value, dict):
+                    compiled[key] = Quickparser.compile(
+                        value, sections, engine, encoding
+                    )
+                elif isinstance(value, list):
+                    compiled[key] = [
+                        Quickparser.compile_pattern(
+                            pattern, engine=engine, encoding=encoding
+                        ) for pattern in value
+                    ]
+                else:
+                    compiled[key] = Quickparser.compile_pattern(
+                        value, engine=engine, encoding=encoding
+                    )
+            except (re.error, TypeError, UnicodeError) as e:
+                raise QuickparserError(f'Invalid pattern for "{key}": {e}')
+        if compiled.records is not None and len(compiled):
+            raise QuickparserError(
+                f'A records group may not hold other values: {", ".join(compiled)}'
+            )
+        return compiled
+
+    @staticmethod
+    def __has_records(patterns: dict) -> bool:
+        '''
+        Check whether any group of a compiled pattern tree holds records.
+        '''
+        return getattr(patterns, 'records', None) is not None or any(
+            Quickparser.__has_records(value) 
+            for value in patterns.values() if isinstance(value, dict)
+        )
+
+    def patterns_for(self, input_text: Union[str, bytes]) -> PatternGroup:
+        '''
+        Get the compiled patterns matching the type of the input, compiling
+        the bytes patterns on first use.
+        '''
+        if not isinstance(input_text, bytes):
+            return self.patterns
+        if self.byte_patterns is None:
+            self.byte_patterns = Quickparser.compile(
+                self.pattern_file[self.keyword], 
+                engine=self.engine, 
+                encoding=self.encoding
+            )
+        return self.byte_patterns
+
+    def __text(self, value: Union[str, bytes]) -> str:
+        '''
+        Decode a value captured from bytes input, and strip it.
+        '''
+        if isinstance(value, bytes):
+            value = value.decode(self.encoding, self.errors)
+        return value.strip()
+
+    def __value(self, match: re.Match, collapse: bool = True) -> Union[str, dict]:
+        '''
+        Extract a match's value: group 1, or one field per named group.
+        '''
+        if groups := match.groupdict():
+            return self.__fields(groups, collapse)
+        return self.__text(match.group(1))
+
+    def __fields(self, groups: dict, collapse: bool = True) -> dict:
+        '''
+        Turn named groups into fields, marking groups that did not take part.
+        '''
+        return {
+            name: (
+                self.__text(value) if value is not None 
+                else None if collapse else 'NOT FOUND'
+            ) for name, value in groups.items()
+        }
+
+    @staticmethod
+    def __not_found(patterns: dict, collapse: bool = True) -> dict:
+        '''
+        Resolve every leaf of a pattern group as not found.
+        '''
+        return {
+            key: (
+                Quickparser.__not_found(value, collapse) 
+                if isinstance(value, dict) and value.records is None
+                else None if collapse else 'NOT FOUND'
+            ) for key, value in patterns.items()
+        }
+
+    @staticmethod
+    def count_leaves(patterns: dict) -> int:
+        '''
+        Count the leaves of a compiled pattern group.
+        '''
+        if getattr(patterns, 'records', None) is not None:
+            return 1
+        return sum(
+            Quickparser.count_leaves(value) if isinstance(value, dict) else 1
+            for value in patterns.values()
+        )
+
+    @staticmethod
+    def section_index(input_text: str, sections: dict) -> dict:
+        '''
+        Locate every section of a text. A section runs from the start of its
+        header line to the start of the next header of any section.
+
+        Args:
+            input_text (str | bytes): The text to index.
+            sections (dict): Compiled header pattern per section name.
+
+        Returns:
+            dict: (start, end) offsets of each occurrence, in text order, per
+                section name. Sections without a header get an empty list.
+        '''
+        newline = b'\n' if isinstance(input_text, bytes) else '\n'
+        headers = sorted(
+            (input_text.rfind(newline, 0, match.start()) + 1, name)
+            for name, header in sections.items()
+            for match in header.regex.finditer(input_text)
+        )
+        index = {name: [] for name in sections}
+        for i, (start, name) in enumerate(headers):
+            end = headers[i + 1][0] if i + 1 < len(headers) else len(input_text)
+            if end > start:
+                index[name].append((start, end))
+        return index
+
+    @staticmethod
+    def __search(
+        pattern: Pattern, 
+        input_text: str, 
+        memo: dict, 
+        counts: dict,
+        spans: Optional[list] = None
+    ) -> Optional[re.Match]:
+        '''
+        Search a pattern, skipping the regex if its required literals are
+        missing from the text.
+
+        Args:
+            pattern (Pattern): The compiled pattern.
+            input_text (str): The input text to be searched.
+            memo (dict): Literal lookups already done on this text.
+            counts (dict): Tallies prefilter 'hits' and 'skips'.
+            spans (list, optional): (start, end) offsets to search within,
+                in order, instead of the whole text.
+
+        Returns:
+            re.Match: The match, or None.
+        '''
+        if spans is not None and not spans:
+            return None # The section is absent
+        if pattern.literals:
+            if not pattern.possible(input_text, memo):
+                counts['skips'] = counts.get('skips', 0) + 1
+                return None
+            counts['hits'] = counts.get('hits', 0) + 1
+        if spans is None:
+            return pattern.regex.search(input_text)
+        # Search each section in place, without slicing the text
+        for start, end in spans:
+            if match := pattern.regex.search(input_text, start, end):
+                return match
+        return None
+
+    def __find_records(
+        self,
+        pattern: Pattern, 
+        input_text: str, 
+        memo: dict, 
+        counts: dict,
+        collapse: bool = True,
+        spans: Optional[list] = None
+    ) -> list:
+        '''
+        Extract one record per match of a records pattern in a single pass.
+        A record holds one field per named group, else the value of group 1.
+
+        Returns:
+            list: The records in text order.
+        '''
+        if spans is not None and not spans:
+            return []
+        if pattern.literals:
+            if not pattern.possible(input_text, memo):
+                counts['skips'] = counts.get('skips', 0) + 1
+                return []
+            counts['hits'] = counts.get('hits', 0) + 1
+        regex = pattern.regex
+        matches = (
+            match 
+            for start, end in (spans or [(0, len(input_text))])
+            for match in regex.finditer(input_text, start, end)
+        )
+        if regex.groupindex:
+            return [
+                self.__fields(match.groupdict(), collapse) for match in matches
+            ]
+        return [
+            self.__text(match.group(1 if regex.groups else 0)) 
+            for match in matches
+        ]
+
     def __recurse_parse(
         self, 
         var_dict: dict, 
         input_text: str, 
-        collapse: bool = True
+        collapse: bool = True,
+        memo: Optional[dict] = None,
+        counts: Optional[dict] = None,
+        spans: Optional[list] = None,
+        index: Optional[dict] = None
     ) -> dict:
         '''
         Recursively search dictionaries and perform regex matching on values.
 
         Args:
-            var_dict (dict): The dictionary containing regex patterns.
+            var_dict (dict): The dictionary containing compiled patterns.
             input_text (str): The input text to be parsed.
             collapse (bool, optional): Determines behavior when no match is found.
                                        If True, unmatched keys are set to None.
                                        If False, they are set to 'NOT FOUND'.
+            memo (dict, optional): Literal lookups already done on this text.
+            counts (dict, optional): Tallies prefilter 'hits' and 'skips',
+                and leaves skipped by failed guards as 'guarded'.
+            spans (list, optional): Offsets of the section the group is
+                scoped to, or None to search the whole text.
+            index (dict, optional): The text's section index, built on
+                first use by a scoped group.
 
         Returns:
             dict: The parsed dictionary with regex matches as values.
         '''
+        memo = {} if memo is None else memo
+        counts = {} if counts is None else counts
+        index = {} if index is None else index
+        search = Quickparser.__search
+
+        # Scope the group to its section, indexing the text once per parse
+        if (section := getattr(var_dict, 'section', None)) is not None:
+            if not index:
+                index.update(Quickparser.section_index(
+                    input_text, self.patterns_for(input_text).sections
+                ))
+            spans = index[section]
+
+        # Skip the whole group if its guard does not match
+        guard = getattr(var_dict, 'guard', None)
+        records = getattr(var_dict, 'records', None)
+        if guard is not None and not search(guard, input_text, memo, counts, spans):
+            counts['guarded'] = (
+                counts.get('guarded', 0) + Quickparser.count_leaves(var_dict)
+            )
+            if records is not None:
+                return None if collapse else 'NOT FOUND'
+            return Quickparser.__not_found(var_dict, collapse)
+
+        # Extract every record of a records group in one pass
+        if records is not None:
+            found = self.__find_records(
+                records, input_text, memo, counts, collapse, spans
+            )
+            return found or (None if collapse else 'NOT FOUND')
+
         parsed_dict = {}
         for key, value in var_dict.items():
             if isinstance(value, dict):
                 # Recursively call nested dictionaries
-                parsed_dict[key] = self.__recurse_parse(value, input_text, collapse)
+                parsed_dict[key] = self.__recurse_parse(
+                    value, input_text, collapse, memo, counts, spans, index
+                )
             elif isinstance(value, list):
                 # Attempt to match each regex pattern in the list
                 for pattern in value:
-                    if match := re.search(pattern, input_text, re.MULTILINE):
-                        parsed_dict[key] = match.group(1).strip()
+                    if match := search(pattern, input_text, memo, counts, spans):
+                        parsed_dict[key] = self.__value(match, collapse)
                         break
                 else:
                     # No match found within the list
                     parsed_dict[key] = None if collapse else 'NOT FOUND'
             else:
                 # Handle single regex pattern
-                if match := re.search(value, input_text, re.MULTILINE):
-                    parsed_dict[key] = match.group(1).strip()
+                if match := search(value, input_text, memo, counts, spans):
+                    parsed_dict[key] = self.__value(match, collapse)
                 else:
                     # Handle no match found
                     parsed_dict[key] = None if collapse else 'NOT FOUND'
 
         return parsed_dict
 
-    def parse(self, input_text: str, collapse: Optional[bool] = True) -> dict:
+    def parse(
+        self, 
+        input_text: str, 
+        collapse: Optional[bool] = True,
+        counts: Optional[dict] = None
+    ) -> dict:
         '''
-        Parses the instance's keyword dict against the input text.
+        Parses the instance's keyword dict against the input text. Patterns
+        whose required literals are missing from the text are skipped
+        without running the regex. Raw bytes are matched with bytes patterns
+        and only the captured values are decoded.
 
         Args:
-            input_text (str): The input text containing the log output.
+            input_text (str | bytes): The input text containing the log output.
             collapse (bool): Determines whether to return None or 
                 'NOT FOUND' as entry.
+            counts (dict, optional): Filled with the prefilter's 'hits'
+                (regexes run) and 'skips' (regexes skipped), and the number
+                of patterns skipped by failed guards as 'guarded'.
 
         Returns:
             dict: The parsed dictionary containing the regex output.
@@ -157,18 +867,529 @@ class Quickparser:
             QuickparserError: If any step of parsing fails.
         '''
         try:
-            # Loading variable dictionary
-            pattern_dict = self.pattern_file
-            var_dict = pattern_dict.get(self.keyword)
-
-            # Parsing the input text using the extracted dictionary
-            parsed_results = self.__recurse_parse(var_dict, input_text, collapse)
+            # Parsing the input text using the compiled dictionary
+            parsed_results = self.__recurse_parse(
+                self.patterns_for(input_text), input_text, collapse, counts=counts
+            )
 
             # Returning the parsed results after collapsing empty dictionaries
             return Quickparser.collapse(parsed_results)
         except Exception as e:
             raise QuickparserError(f'Unexpected parsing error: {e}')
+
+    def _parse_batch(self, input_texts: list, collapse: bool = True) -> list:
+        '''
+        Parses a batch of texts under a single exception handler.
+
+        Args:
+            input_texts (list): The input texts containing the log output.
+            collapse (bool): Determines whether to return None or 
+                'NOT FOUND' as entry.
+
+        Returns:
+            list: The parsed dictionaries, in input order.
+
+        Raises:
+            QuickparserError: If any text fails to parse.
+        '''
+        patterns_for = self.patterns_for
+        recurse_parse = self.__recurse_parse
+        try:
+            return [
+                Quickparser.collapse(
+                    recurse_parse(patterns_for(text), text, collapse)
+                ) for text in input_texts
+            ]
+        except Exception as e:
+            raise QuickparserError(f'Unexpected parsing error: {e}')
+
+    def parse_many(
+        self,
+        input_texts: Iterable[str],
+        collapse: Optional[bool] = True,
+        executor: Optional[Executor] = None,
+        batch_size: Optional[int] = 32
+    ) -> list:
+        '''
+        Parses many texts against the instance's keyword dict. Texts are
+        split into batches that run on the executor, so per-call overhead
+        is paid once per batch rather than once per text.
+
+        Args:
+            input_texts (Iterable[str]): The input texts containing log output.
+            collapse (bool): Determines whether to return None or 
+                'NOT FOUND' as entry.
+            executor (Executor, optional): Executor that runs the batches.
+                A ProcessPoolExecutor parses across cores. If None, a
+                thread pool of the tuned parse worker count runs them, and
+                a single batch is parsed in the calling thread.
+            batch_size (int, optional): Number of texts per batch.
+
+        Returns:
+            list: The parsed dictionaries, in input order.
+
+        Raises:
+            QuickparserError: If any text fails to parse.
+        '''
+        input_texts = list(input_texts)
+        batch_size = max(1, batch_size)
+        if executor is None and len(input_texts) <= batch_size:
+            return self._parse_batch(input_texts, collapse)
+        batches = [
+            input_texts[i:i + batch_size]
+            for i in range(0, len(input_texts), batch_size)
+        ]
+        parsed_list = []
+        with Quickparser._batch_executor(executor) as executor:
+            for parsed_batch in executor.map(
+                self._parse_batch, batches, [collapse] * len(batches)
+            ):
+                parsed_list.extend(parsed_batch)
+        return parsed_list
+
+    @staticmethod
+    def _batch_executor(executor: Optional[Executor] = None):
+        '''
+        Context of the executor running batches: the given executor, left
+        open, or a thread pool of the tuned parse worker count, shut down
+        on exit.
+        '''
+        if executor is not None:
+            return nullcontext(executor)
+        return ThreadPoolExecutor(max_workers=parse_workers())
+
+    @staticmethod
+    def discover_and_parse_many(
+        input_texts: Iterable[str],
+        pattern_file: Union[str, dict],
+        ext: Optional[Literal['.yaml', '.json']] = '.yaml',
+        collapse: Optional[bool] = True,
+        executor: Optional[Executor] = None,
+        batch_size: Optional[int] = 32
+    ) -> list:
+        '''
+        Discovers the keyword of each text in a mixed batch and parses it
+        with that keyword's patterns. The pattern file is loaded and each
+        keyword's parser is built once for the whole batch.
+
+        Args:
+            input_texts (Iterable[str]): The input texts containing log output.
+            pattern_file (str | dict): The pattern file, or a loaded pattern
+                dictionary.
+            ext (str, optional): Pattern file extension, default is '.yaml'.
+            collapse (bool): Determines whether to return None or 
+                'NOT FOUND' as entry.
+            executor (Executor, optional): Executor that runs the batches,
+                default is a thread pool shared by every keyword's batches.
+            batch_size (int, optional): Number of texts per batch.
+
+        Returns:
+            list: A (keyword, parsed dictionary) tuple per text, in input
+                order. Both are None for texts without a keyword.
+
+        Raises:
+            QuickparserError: If loading or parsing fails.
+        '''
+        input_texts = list(input_texts)
+        if not isinstance(pattern_file, dict):
+            pattern_file = Quickparser.load(pattern_file, ext)
+        keywords = list(pattern_file)
+
+        # Group text indexes by discovered keyword
+        groups = {}
+        for index, text in enumerate(input_texts):
+            keyword = Quickparser.discover(text, keywords)
+            if keyword:
+                groups.setdefault(keyword, []).append(index)
+
+        results = [(None, None)] * len(input_texts)
+        with (
+            nullcontext(executor) if len(input_texts) <= max(1, batch_size)
+            else Quickparser._batch_executor(executor)
+        ) as executor:
+            for keyword, indexes in groups.items():
+                parser = Quickparser(keyword, pattern_file)
+                parsed_list = parser.parse_many(
+                    [input_texts[index] for index in indexes],
+                    collapse,
+                    executor,
+                    batch_size
+                )
+                for index, parsed_dict in zip(indexes, parsed_list):
+                    results[index] = (keyword, parsed_dict)
+        return results
+
+    @staticmethod
+    def __flatten(patterns: dict, path: tuple = ()) -> list:
+        '''
+        Flatten a compiled pattern tree into its leaves.
+
+        Returns:
+            list: (key path, list of patterns in priority order) per leaf.
+        '''
+        leaves = []
+        for key, value in patterns.items():
+            if isinstance(value, dict):
+                leaves.extend(Quickparser.__flatten(value, path + (key,)))
+            else:
+                leaves.append((
+                    path + (key,), 
+                    value if isinstance(value, list) else [value]
+                ))
+        return leaves
+
+    @staticmethod
+    def __guards(patterns: dict, path: tuple = ()) -> list:
+        '''
+        Collect the guards of a compiled pattern tree.
+
+        Returns:
+            list: (key path of the group, guard pattern) per guarded group.
+        '''
+        guards = []
+        if (guard := getattr(patterns, 'guard', None)) is not None:
+            guards.append((path, guard))
+        for key, value in patterns.items():
+            if isinstance(value, dict):
+                guards.extend(Quickparser.__guards(value, path + (key,)))
+        return guards
+
+    @staticmethod
+    def chunk_offsets(file_path: str, chunk_size: int, overlap: int) -> list:
+        '''
+        Split a file into line-aligned byte ranges.
+
+        Args:
+            file_path (str): The file to split.
+            chunk_size (int): Approximate bytes per chunk.
+            overlap (int): Extra bytes each chunk reads past its end, so
+                matches starting near the end of a chunk can complete.
+
+        Returns:
+            list: (start, end, read_end) byte offsets per chunk. A chunk owns
+                matches starting in [start, end) and reads up to read_end.
+        '''
+        def line_aligned(f, offset, size):
+            if offset >= size:
+                return size
+            f.seek(offset)
+            f.readline() # Move to the start of the next line
+            return f.tell()
+
+        chunks = []
+        with open(file_path, 'rb') as f:
+            size = f.seek(0, 2)
+            start = 0
+            while start < size:
+                end = line_aligned(f, start + max(1, chunk_size) - 1, size)
+                read_end = line_aligned(f, end + max(0, overlap) - 1, size)
+                chunks.append((start, end, max(end, read_end)))
+                start = end
+        return chunks
+
+    @staticmethod
+    def _scan_chunk(
+        file_path: str, 
+        chunk: tuple, 
+        pattern_lists: list,
+        binary: bool = False
+    ) -> list:
+        '''
+        Find the earliest match of every pattern that starts inside a chunk.
+
+        Args:
+            file_path (str): The file being scanned.
+            chunk (tuple): The (start, end, read_end) offsets of the chunk.
+            pattern_lists (list): Lists of compiled patterns.
+            binary (bool, optional): Match raw bytes with bytes patterns
+                instead of decoding the chunk.
+
+        Returns:
+            list: Per pattern list, a list holding the earliest match of each
+                pattern as (position, group(0), value), or None. The value is
+                the named groups as a dict, else group(1) or None.
+        '''
+        start, end, read_end = chunk
+        with open(file_path, 'rb') as f:
+            f.seek(start)
+            data = f.read(read_end - start)
+            # A \n completing a \r\n pair split at the start of the chunk
+            # ends the previous chunk's last line
+            if start and data.startswith(b'\n'):
+                f.seek(start - 1)
+                if f.read(1) == b'\r':
+                    data, start = data[1:], start + 1
+        if binary:
+            skip = len(codecs.BOM_UTF8) if (
+                start == 0 and data.startswith(codecs.BOM_UTF8)
+            ) else 0
+            text, rest = data[skip:end - start], data[end - start:]
+        else:
+            encoding = 'utf-8-sig' if start == 0 else 'utf-8'
+            text = data[:end - start].decode(encoding)
+            rest = data[end - start:].decode('utf-8')
+        # Match newline-translated text, as parse() does on read_file(); the
+        # owned part is translated alone so that a \r\n pair split at its
+        # end counts as the single \n it becomes in the whole text
+        text = Quickparser.translate_newlines(text)
+        owned = len(text)
+        text = Quickparser.translate_newlines(text + rest)
+
+        found = []
+        for patterns in pattern_lists:
+            earliest = []
+            for pattern in patterns:
+                match = pattern.search(text)
+                if match and match.start() < owned:
+                    earliest.append((
+                        match.start(),
+                        match.group(0),
+                        match.groupdict() if pattern.regex.groupindex
+                        else match.group(1) if pattern.groups else None
+                    ))
+                else:
+                    earliest.append(None)
+            found.append(earliest)
+        return found
+
+    @staticmethod
+    def _scan_file_chunked(
+        file_path: str, 
+        pattern_lists: list, 
+        executor: Executor, 
+        chunk_size: int, 
+        overlap: int,
+        binary: bool = False
+    ) -> list:
+        '''
+        Scan a file's chunks in parallel and merge them so that each pattern
+        keeps its earliest match in the whole file, as re.search would.
+
+        Returns:
+            list: Per pattern list, the earliest match of each pattern as
+                (group(0), value), or None.
+        '''
+        chunks = Quickparser.chunk_offsets(file_path, chunk_size, overlap)
+        futures = [
+            executor.submit(
+                Quickparser._scan_chunk, file_path, chunk, pattern_lists, binary
+            ) for chunk in chunks
+        ]
+        # Chunks are in file order, so the first chunk with a match wins
+        merged = [[None] * len(patterns) for patterns in pattern_lists]
+        for future in futures:
+            for earliest, chunk_found in zip(merged, future.result()):
+                for index, match in enumerate(chunk_found):
+                    if earliest[index] is None and match is not None:
+                        earliest[index] = match[1:]
+        return merged
+
+    def parse_file_chunked(
+        self,
+        file_path: str,
+        executor: Executor,
+        chunk_size: Optional[int] = 64 * 1024 * 1024,
+        overlap: Optional[int] = 64 * 1024,
+        collapse: Optional[bool] = True,
+        binary: Optional[bool] = False
+    ) -> dict:
+        '''
+        Parses a large file by scanning line-aligned chunks in parallel. The
+        result equals parse() on the whole text as long as every match fits
+        within the overlap: each leaf keeps its earliest match, and list
+        fallbacks still take the first pattern that matches anywhere.
+        Section offsets and records span chunks, so keywords using them are
+        parsed from the whole text instead.
+
+        Args:
+            file_path (str): The file containing the log output.
+            executor (Executor): Executor scanning the chunks; a
+                ProcessPoolExecutor scans them across cores.
+            chunk_size (int, optional): Approximate bytes per chunk.
+            overlap (int, optional): Bytes read past each chunk's end.
+            collapse (bool): Determines whether to return None or 
+                'NOT FOUND' as entry.
+            binary (bool, optional): Match the raw bytes, decoding only the
+                captured values.
+
+        Returns:
+            dict: The parsed dictionary containing the regex output.
+
+        Raises:
+            QuickparserError: If any step of parsing fails.
+        '''
+        return Quickparser.parse_file_chunked_many(
+            [self], file_path, executor, chunk_size, overlap, collapse, binary
+        )[0]
+
+    @staticmethod
+    def parse_file_chunked_many(
+        parsers: list,
+        file_path: str,
+        executor: Executor,
+        chunk_size: Optional[int] = 64 * 1024 * 1024,
+        overlap: Optional[int] = 64 * 1024,
+        collapse: Optional[bool] = True,
+        binary: Optional[bool] = False
+    ) -> list:
+        '''
+        parse_file_chunked() for several parsers at once, e.g. the keywords
+        several pattern files found in the same file. The patterns of every
+        parser are scanned in a single pass over the chunks, and the file is
+        read whole at most once for the parsers that need its whole text.
+
+        Returns:
+            list: The parsed dictionary of each parser, in order.
+
+        Raises:
+            QuickparserError: If any step of parsing fails.
+        '''
+        results = [None] * len(parsers)
+        text = None
+        plans = [] # Holds (parser index, leaves, guards, offset of its lists)
+        pattern_lists = []
+        for index, parser in enumerate(parsers):
+            if parser.whole_text:
+                if text is None:
+                    text = Quickparser.read_file(file_path, binary)
+                results[index] = parser.parse(text, collapse)
+                continue
+            patterns = parser.patterns_for(b'' if binary else '')
+            leaves = Quickparser.__flatten(patterns)
+            guards = Quickparser.__guards(patterns)
+            plans.append((index, leaves, guards, len(pattern_lists)))
+            pattern_lists.extend(patterns for _, patterns in leaves)
+            pattern_lists.extend([guard] for _, guard in guards)
+        if not plans:
+            return results
+        try:
+            merged = Quickparser._scan_file_chunked(
+                file_path, pattern_lists, executor, chunk_size, overlap, binary
+            )
+            for index, leaves, guards, offset in plans:
+                end = offset + len(leaves)
+                results[index] = parsers[index].__assemble(
+                    leaves, 
+                    guards, 
+                    merged[offset:end], 
+                    merged[end:end + len(guards)], 
+                    collapse
+                )
+            return results
+        except Exception as e:
+            raise QuickparserError(f'Unexpected parsing error: {e}')
+
+    def __assemble(
+        self, 
+        leaves: list, 
+        guards: list, 
+        leaf_matches: list, 
+        guard_matches: list, 
+        collapse: bool
+    ) -> dict:
+        '''
+        Build a parsed dictionary from the earliest matches of a chunked scan.
+        '''
+        # Groups whose guard matched nowhere in the file
+        failed = [
+            path for (path, _), (match,) in zip(guards, guard_matches)
+            if match is None
+        ]
+        parsed_results = {}
+        for (path, _), earliest in zip(leaves, leaf_matches):
+            node = parsed_results
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            if any(path[:len(group)] == group for group in failed):
+                node[path[-1]] = None if collapse else 'NOT FOUND'
+                continue
+            # Take the first pattern in priority order that matched
+            node[path[-1]] = next(
+                (
+                    self.__fields(match[1], collapse) 
+                    if isinstance(match[1], dict) else self.__text(match[1])
+                    for match in earliest if match
+                ),
+                None if collapse else 'NOT FOUND'
+            )
+        return Quickparser.collapse(parsed_results)
+
+    @staticmethod
+    def discover_file_chunked(
+        file_path: str,
+        keywords: list,
+        executor: Executor,
+        chunk_size: Optional[int] = 64 * 1024 * 1024,
+        overlap: Optional[int] = 64 * 1024,
+        encoding: Optional[str] = None,
+        errors: Optional[str] = None
+    ) -> Optional[str]:
+        '''
+        Chunked equivalent of discover() for files too large to read whole.
+        With an encoding the raw bytes are searched, as by discover().
+
+        Returns:
+            str: The keyword found, '*' as a fallback, or None.
+        '''
+        return Quickparser.discover_file_chunked_many(
+            file_path, [keywords], executor, chunk_size, overlap, encoding, errors
+        )[0]
+
+    @staticmethod
+    def discover_file_chunked_many(
+        file_path: str,
+        keyword_lists: list,
+        executor: Executor,
+        chunk_size: Optional[int] = 64 * 1024 * 1024,
+        overlap: Optional[int] = 64 * 1024,
+        encoding: Optional[str] = None,
+        errors: Optional[str] = None
+    ) -> list:
+        '''
+        discover_file_chunked() for several keyword lists, e.g. those of
+        several pattern files, in a single pass over the chunks. A keyword
+        in more than one list is searched once.
+
+        Returns:
+            list: Per keyword list, the keyword found, '*' as a fallback, or
+                None.
+        '''
+        searched = list(dict.fromkeys(
+            keyword for keywords in keyword_lists for keyword in keywords
+            if keyword != '*'
+        ))
+        merged = Quickparser._scan_file_chunked(
+            file_path,
+            [
+                [Quickparser.__keyword_pattern(keyword, encoding)] 
+                for keyword in searched
+            ],
+            executor,
+            chunk_size,
+            overlap,
+            encoding is not None
+        )
+        found = {}
+        for keyword, (match,) in zip(searched, merged):
+            if match:
+                found[keyword] = match[0] if encoding is None else match[0].decode(
+                    encoding, errors or Quickparser.DEFAULT_ERRORS
+                )
+        return [
+            next(
+                (found[keyword] for keyword in keywords if keyword in found),
+                '*' if '*' in keywords else None
+            )
+            for keywords in keyword_lists
+        ]
         
+    @staticmethod
+    def __indexed(records: list) -> dict:
+        '''
+        Key a list of records by position, numbered from 1.
+        '''
+        return {str(index): record for index, record in enumerate(records, 1)}
+
     @staticmethod
     def __recurse_compare(ref_dict, targ_dict, mismatches, matches):
         '''
@@ -182,17 +1403,26 @@ class Quickparser:
         '''
         for key in ref_dict:
             if key in targ_dict:
+                ref_value, targ_value = ref_dict[key], targ_dict[key]
+                if (
+                    isinstance(ref_value, list) and 
+                    isinstance(targ_value, list) and 
+                    ref_value != targ_value
+                ):
+                    # Compare differing records by position, numbered from 1
+                    ref_value = Quickparser.__indexed(ref_value)
+                    targ_value = Quickparser.__indexed(targ_value)
                 if (
-                    isinstance(ref_dict[key], dict) and 
-                    isinstance(targ_dict[key], dict)
+                    isinstance(ref_value, dict) and 
+                    isinstance(targ_value, dict)
                 ):
                     # Prepare new level for nested dictionaries
                     mismatches[key] = {}
                     matches[key] = {}
                     # Recursive call for nested comparison
                     Quickparser.__recurse_compare(
-                        ref_dict[key], 
-                        targ_dict[key], 
+                        ref_value, 
+                        targ_value, 
                         mismatches[key], 
                         matches[key]
                     )
@@ -285,9 +1515,15 @@ class Quickparser:
         try:
             ext = ext.lower().strip()
             if ext in {'.yaml', 'yaml', 'yml', '.yml'}:
-                yaml.dump(data, file, default_flow_style=False, indent=4)
+                yaml.dump(
+                    data, 
+                    file, 
+                    Dumper=ReportDumper, 
+                    default_flow_style=False, 
+                    indent=4
+                )
             elif ext in {'.json', 'json'}:
-                json.dump(data, file, indent=4)
+                json.dump(data, file, indent=4, default=_serializable)
         except Exception as e:
             raise QuickparserError(f'Failed to write data: {e}')
 
@@ -312,6 +1548,7 @@ class Quickparser:
             if ext in {'.yaml', 'yaml', '.yml', '.yml'}:
                 serialized = yaml.dump(
                     data, 
+                    Dumper=ReportDumper,
                     default_flow_style=False, 
                     indent=4, 
                     width=500
@@ -319,20 +1556,31 @@ class Quickparser:
             elif ext in {'.json', 'json'}:
                 serialized = json.dumps(
                     data, 
-                    indent=4
+                    indent=4,
+                    default=_serializable
                 )
             return serialized.rstrip('\n')
         except Exception as e:
             raise QuickparserError(f'Failed to stringify data to {ext}: {e}')
         
     @staticmethod
-    def discover(input_text: str, keywords: str) -> tuple[str, str]:
+    def discover(
+        input_text: Union[str, bytes], 
+        keywords: str, 
+        encoding: Optional[str] = None,
+        errors: Optional[str] = None
+    ) -> tuple[str, str]:
         '''
         Searches through the input text to find a keyword from the pattern file.
+        Raw bytes are searched with keywords encoded to bytes.
 
         Args:
-            input_text (str): The text to search through for keyword names.
+            input_text (str | bytes): The text to search through for keyword names.
             pattern_file (str): The file to pull keywords from.
+            encoding (str, optional): Encoding of bytes input, default is
+                'utf-8'.
+            errors (str, optional): Error policy decoding the found keyword,
+                default is 'replace'.
 
         Returns:
             str: The keyword found, or None if no keyword is found; '*' if '*' is
@@ -342,15 +1590,74 @@ class Quickparser:
 
         # Search for the first occurrence of any keyword in the input text
         fallback = False
+        if isinstance(input_text, bytes):
+            encoding = encoding or Quickparser.DEFAULT_ENCODING
+        else:
+            encoding = None
         for keyword in keywords:
             if keyword == '*': # use fallback if * is a keyword
                 fallback = True
                 continue
-            if match := re.search(keyword, input_text):
+            pattern = Quickparser.__keyword_pattern(keyword, encoding)
+            if not pattern.possible(input_text):
+                continue
+            if match := pattern.regex.search(input_text):
+                if encoding is not None:
+                    return match.group().decode(
+                        encoding, errors or Quickparser.DEFAULT_ERRORS
+                    )
                 return match.group()
         else:
             return '*' if fallback else None
     
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def __keyword_pattern(keyword: str, encoding: Optional[str] = None) -> Pattern:
+        '''
+        Compile a keyword pattern once for discovery, as bytes if encoded.
+        '''
+        return Quickparser.compile_pattern(keyword, 0, encoding=encoding)
+
+    @staticmethod
+    def read_file(file_path: str, binary: bool = False) -> Union[str, bytes]:
+        '''
+        Read a whole file as text, or as raw bytes without decoding it. A
+        UTF-8 byte order mark is dropped and line endings are translated to
+        \n either way.
+        '''
+        if not binary:
+            with open(file_path, 'r', encoding='utf-8-sig') as f:
+                return f.read()
+        with open(file_path, 'rb') as f:
+            return Quickparser.file_text(f.read(), True)
+
+    @staticmethod
+    def translate_newlines(text: Union[str, bytes]) -> Union[str, bytes]:
+        '''
+        Translate \r\n and lone \r line endings to \n, as universal newlines
+        do when a file is read as text.
+        '''
+        if isinstance(text, bytes):
+            if b'\r' not in text:
+                return text
+            return text.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        if '\r' not in text:
+            return text
+        return text.replace('\r\n', '\n').replace('\r', '\n')
+
+    @staticmethod
+    def file_text(data: bytes, binary: bool = False) -> Union[str, bytes]:
+        '''
+        Turn a file's raw bytes into what read_file() returns for it: text
+        with universal newlines, or the bytes without a byte order mark and
+        with their line endings translated the same way.
+        '''
+        if not binary:
+            return io.TextIOWrapper(io.BytesIO(data), encoding='utf-8-sig').read()
+        if data.startswith(codecs.BOM_UTF8):
+            data = data[len(codecs.BOM_UTF8):]
+        return Quickparser.translate_newlines(data)
+
     @staticmethod
     def collapse(dictionary: dict) -> dict:
         '''
@@ -374,6 +1681,11 @@ class Quickparser:
                 # Mark for deletion if falsy
                 if not val:
                     keys_to_delete.append(key)
+            elif isinstance(val, list) and val:
+                # Collapse records in place, keeping their positions
+                for item in val:
+                    if isinstance(item, dict):
+                        Quickparser.collapse(item)
             elif not val:  # Check for other falsy values
                 keys_to_delete.append(key)
 
@@ -0,0 +1,95 @@
+import re
+import functools
+
+# Regex engines patterns can be compiled with. The stdlib re module is the
+# default; the `regex` module and RE2 bindings are used only when installed.
+# A pattern an engine cannot compile, e.g. a backreference under RE2, falls
+# back to re on its own, so one unsupported pattern never disables an engine.
+
+DEFAULT_ENGINE = 're'
+
+# Flags every engine understands, by their re name
+_FLAG_NAMES = ('IGNORECASE', 'MULTILINE', 'DOTALL', 'VERBOSE', 'ASCII')
+
+class EngineError(Exception):
+    def __init__(self, message=''):
+        super().__init__(message)
+
+class StdlibEngine:
+    name = 're'
+
+    def compile(self, pattern, flags=0):
+        return re.compile(pattern, flags)
+
+class RegexModuleEngine:
+    name = 'regex'
+
+    def __init__(self):
+        import regex
+        self.module = regex
+
+    def compile(self, pattern, flags=0):
+        # Flag values differ between re and regex, so map them by name
+        engine_flags = 0
+        for flag_name in _FLAG_NAMES:
+            if flags & getattr(re, flag_name):
+                engine_flags |= getattr(self.module, flag_name)
+        return self.module.compile(pattern, engine_flags)
+
+class RE2Engine:
+    name = 're2'
+
+    def __init__(self):
+        import re2
+        self.module = re2
+
+    def compile(self, pattern, flags=0):
+        # RE2 bindings differ in how they take flags, but all accept them
+        # inline; verbose and ASCII modes are left to re
+        if flags & (re.VERBOSE | re.ASCII):
+            raise EngineError('Unsupported flags for RE2')
+        inline = ''.join(
+            letter for flag, letter in (
+                (re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's')
+            ) if flags & flag
+        )
+        if inline and isinstance(pattern, bytes):
+            return self.module.compile(f'(?{inline})'.encode() + pattern)
+        return self.module.compile(f'(?{inline}){pattern}' if inline else pattern)
+
+ENGINES = {
+    engine.name: engine
+    for engine in (StdlibEngine, RegexModuleEngine, RE2Engine)
+}
+
+# Get an engine by name, creating it once per process
+@functools.lru_cache(maxsize=None)
+def get_engine(name=None):
+    name = name or DEFAULT_ENGINE
+    if name not in ENGINES:
+        raise EngineError(f'Unknown regex engine: {name}')
+    try:
+        return ENGINES[name]()
+    except ImportError:
+        raise EngineError(f'Regex engine "{name}" is not installed')
+
+# Names of the engines that can be used here
+def available_engines():
+    available = []
+    for name in ENGINES:
+        try:
+            get_engine(name)
+        except EngineError:
+            continue
+        available.append(name)
+    return available
+
+# Compile with an engine, falling back to re for patterns it rejects
+def compile_regex(pattern, flags=0, engine=None):
+    engine = get_engine(engine)
+    if engine.name == StdlibEngine.name:
+        return re.compile(pattern, flags)
+    try:
+        return engine.compile(pattern, flags)
+    except Exception:
+        return re.compile(pattern, flags)
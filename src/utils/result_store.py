@@ -0,0 +1,323 @@
+import os
+import sqlite3
+import threading
+import itertools
+from datetime import datetime
+from src.utils.quickparser import CompactResult
+
+# SQLite sink for parse results. Every run keeps its files, the keyword found
+# in each, one row per parsed field and, in comparison mode, one row per
+# deviation, so fleet questions can be answered later without re-parsing.
+# Rows are buffered and written in batches, one transaction per batch. Ids
+# are assigned by SQLite as rows are inserted, so several runs can write to
+# the same database at once.
+
+BATCH_ROWS = 5000
+FIELD_SEPARATOR = '/' # Joins nested keys into a field name, e.g. 'Software/Version'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started TEXT NOT NULL,
+    finished TEXT,
+    mode TEXT NOT NULL,
+    pattern_file TEXT,
+    target_folder TEXT,
+    reference_folder TEXT
+);
+CREATE TABLE IF NOT EXISTS keywords (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    name TEXT NOT NULL,
+    role TEXT NOT NULL,
+    keyword_id INTEGER REFERENCES keywords(id)
+);
+CREATE TABLE IF NOT EXISTS fields (
+    file_id INTEGER NOT NULL REFERENCES files(id),
+    field TEXT NOT NULL,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS deviations (
+    file_id INTEGER NOT NULL REFERENCES files(id),
+    field TEXT NOT NULL,
+    reference TEXT,
+    target TEXT
+);
+CREATE INDEX IF NOT EXISTS files_run_keyword ON files(run_id, keyword_id);
+CREATE INDEX IF NOT EXISTS files_name ON files(name);
+CREATE INDEX IF NOT EXISTS fields_field_value ON fields(field, value);
+CREATE INDEX IF NOT EXISTS fields_file ON fields(file_id);
+CREATE INDEX IF NOT EXISTS deviations_field ON deviations(field);
+CREATE INDEX IF NOT EXISTS deviations_file ON deviations(file_id);
+'''
+
+class StoreError(Exception):
+    def __init__(self, message=""):
+        super().__init__(message)
+
+# Flatten a parsed dict into (field, value) pairs. Records are numbered from
+# 1, as comparison numbers them.
+def flatten_fields(parsed, path=()):
+    if isinstance(parsed, list):
+        parsed = {str(index): item for index, item in enumerate(parsed, 1)}
+    if not isinstance(parsed, dict):
+        yield FIELD_SEPARATOR.join(path), parsed
+        return
+    for key, value in parsed.items():
+        yield from flatten_fields(value, path + (str(key),))
+
+class ResultStore:
+    def __init__(self, path, batch_rows=BATCH_ROWS):
+        self.path = path
+        self.batch_rows = max(1, batch_rows)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._keywords = dict(self.connection.execute(
+            'SELECT name, id FROM keywords'
+        ))
+        self._run_id = None
+        # Holds {(role, name): [file id]} of the current run. Buffered rows
+        # refer to a file by this slot, which holds the file's id once its
+        # row is written.
+        self._file_ids = {}
+        self._pending = {'files': [], 'fields': [], 'deviations': []}
+        self._pending_rows = 0
+
+    # Open a new run, returning its id
+    def start_run(self, mode, pattern_file=None, target_folder=None, reference_folder=None):
+        with self._lock, self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO runs (started, mode, pattern_file, target_folder, reference_folder) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (
+                    datetime.now().isoformat(timespec='seconds'),
+                    mode,
+                    pattern_file and os.path.abspath(pattern_file),
+                    target_folder and os.path.abspath(target_folder),
+                    reference_folder and os.path.abspath(reference_folder),
+                )
+            )
+            self._run_id = cursor.lastrowid
+            self._file_ids = {}
+        return self._run_id
+
+    # Id of a keyword, inserting it if no run has stored it yet. Called
+    # inside a flush's transaction; new ids are kept in added until it
+    # commits.
+    def _keyword_id(self, keyword, added):
+        if keyword is None:
+            return None
+        if (keyword_id := self._keywords.get(keyword, added.get(keyword))) is None:
+            self.connection.execute(
+                'INSERT OR IGNORE INTO keywords (name) VALUES (?)', (keyword,)
+            )
+            keyword_id = added[keyword] = self.connection.execute(
+                'SELECT id FROM keywords WHERE name = ?', (keyword,)
+            ).fetchone()[0]
+        return keyword_id
+
+    def _queue(self, table, rows):
+        self._pending[table].extend(rows)
+        self._pending_rows += len(rows)
+        if self._pending_rows >= self.batch_rows:
+            self._flush()
+
+    # Add a file with the keyword found in it and its parsed fields
+    def add_file(self, name, keyword=None, parsed=None, role='target', label=None):
+        if self._run_id is None:
+            raise StoreError('No run started.')
+        if isinstance(parsed, CompactResult):
+            parsed = parsed.as_dict()
+        with self._lock:
+            file_id = self._file_ids[(role, name)] = [None]
+            self._pending['files'].append(
+                (file_id, self._run_id, name, role, keyword)
+            )
+            rows = [
+                (file_id, field, None if value is None else str(value))
+                for field, value in flatten_fields({
+                    key: value for key, value in (parsed or {}).items()
+                    if key != label
+                })
+            ]
+            self._queue('fields', rows)
+
+    # Add a target file's deviations, with the reference value of each field
+    def add_deviations(self, name, deviations, reference=None):
+        reference_fields = dict(flatten_fields(reference or {}))
+        with self._lock:
+            if (file_id := self._file_ids.get(('target', name))) is None:
+                raise StoreError(f'Unknown target file: {name}')
+            rows = [
+                (
+                    file_id,
+                    field,
+                    None if field not in reference_fields else str(reference_fields[field]),
+                    None if value is None else str(value)
+                ) for field, value in flatten_fields(deviations)
+            ]
+            self._queue('deviations', rows)
+
+    def _flush(self):
+        if not self._pending_rows and not self._pending['files']:
+            return
+        added = {}
+        with self.connection:
+            # Files are inserted one at a time to learn each id, which their
+            # fields and deviations then take from the file's slot
+            for file_id, run_id, name, role, keyword in self._pending['files']:
+                file_id[0] = self.connection.execute(
+                    'INSERT INTO files (run_id, name, role, keyword_id) VALUES (?, ?, ?, ?)',
+                    (run_id, name, role, self._keyword_id(keyword, added))
+                ).lastrowid
+            self.connection.executemany(
+                'INSERT INTO fields (file_id, field, value) VALUES (?, ?, ?)',
+                ((file_id[0], *row) for file_id, *row in self._pending['fields'])
+            )
+            self.connection.executemany(
+                'INSERT INTO deviations (file_id, field, reference, target) VALUES (?, ?, ?, ?)',
+                ((file_id[0], *row) for file_id, *row in self._pending['deviations'])
+            )
+        self._keywords.update(added)
+        self._pending = {table: [] for table in self._pending}
+        self._pending_rows = 0
+
+    # Write any buffered rows
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    # Write buffered rows and mark the current run finished
+    def finish_run(self):
+        with self._lock:
+            self._flush()
+            with self.connection:
+                self.connection.execute(
+                    'UPDATE runs SET finished = ? WHERE id = ?',
+                    (datetime.now().isoformat(timespec='seconds'), self._run_id)
+                )
+            self._file_ids = {}
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Queries
+
+    def _rows(self, sql, params=()):
+        cursor = self.connection.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    # Id of a run, the latest one by default
+    def run_id(self, run=None):
+        if run is not None:
+            return run
+        row = self.connection.execute('SELECT MAX(id) FROM runs').fetchone()
+        if row[0] is None:
+            raise StoreError(f'No runs stored in {self.path}')
+        return row[0]
+
+    def runs(self):
+        return self._rows(
+            "SELECT runs.*, COUNT(files.id) AS files FROM runs "
+            "LEFT JOIN files ON files.run_id = runs.id AND files.role = 'target' "
+            'GROUP BY runs.id ORDER BY runs.id'
+        )
+
+    # Files of a run, optionally only those of a keyword
+    def files(self, run=None, keyword=None, role='target'):
+        sql = (
+            'SELECT files.name, keywords.name AS keyword FROM files '
+            'LEFT JOIN keywords ON keywords.id = files.keyword_id '
+            'WHERE files.run_id = ? AND files.role = ?'
+        )
+        params = [self.run_id(run), role]
+        if keyword is not None:
+            sql += ' AND keywords.name = ?'
+            params.append(keyword)
+        return self._rows(sql + ' ORDER BY files.name', params)
+
+    # Files whose field has a value, or any value if none is given
+    def files_with(self, field, value=None, run=None, keyword=None):
+        sql = (
+            'SELECT files.name, keywords.name AS keyword, fields.value FROM fields '
+            'JOIN files ON files.id = fields.file_id '
+            'LEFT JOIN keywords ON keywords.id = files.keyword_id '
+            "WHERE files.run_id = ? AND files.role = 'target' AND fields.field = ?"
+        )
+        params = [self.run_id(run), field]
+        if value is not None:
+            sql += ' AND fields.value = ?'
+            params.append(value)
+        if keyword is not None:
+            sql += ' AND keywords.name = ?'
+            params.append(keyword)
+        return self._rows(sql + ' ORDER BY files.name', params)
+
+    # How many target files hold each value of a field
+    def value_counts(self, field, run=None, keyword=None):
+        sql = (
+            'SELECT fields.value, COUNT(*) AS files FROM fields '
+            'JOIN files ON files.id = fields.file_id '
+            'LEFT JOIN keywords ON keywords.id = files.keyword_id '
+            "WHERE files.run_id = ? AND files.role = 'target' AND fields.field = ?"
+        )
+        params = [self.run_id(run), field]
+        if keyword is not None:
+            sql += ' AND keywords.name = ?'
+            params.append(keyword)
+        return self._rows(
+            sql + ' GROUP BY fields.value ORDER BY files DESC, fields.value', params
+        )
+
+    # Deviations of a run, optionally of one field or keyword
+    def deviations(self, run=None, field=None, keyword=None):
+        sql = (
+            'SELECT files.name, keywords.name AS keyword, deviations.field, '
+            'deviations.reference, deviations.target FROM deviations '
+            'JOIN files ON files.id = deviations.file_id '
+            'LEFT JOIN keywords ON keywords.id = files.keyword_id '
+            'WHERE files.run_id = ?'
+        )
+        params = [self.run_id(run)]
+        if field is not None:
+            sql += ' AND deviations.field = ?'
+            params.append(field)
+        if keyword is not None:
+            sql += ' AND keywords.name = ?'
+            params.append(keyword)
+        return self._rows(sql + ' ORDER BY files.name, deviations.field', params)
+
+    # Stream a run's target files sorted by name as (name, keyword, fields),
+    # with fields as {field: value}. Unmatched fields are left out, as in
+    # collapsed reports. Only one file's rows are held at a time.
+    def snapshot(self, run=None):
+        cursor = self.connection.execute(
+            'SELECT files.name, keywords.name, fields.field, fields.value FROM files '
+            'LEFT JOIN keywords ON keywords.id = files.keyword_id '
+            'LEFT JOIN fields ON fields.file_id = files.id '
+            "WHERE files.run_id = ? AND files.role = 'target' "
+            'ORDER BY files.name, files.id, fields.rowid',
+            (self.run_id(run),)
+        )
+        for name, rows in itertools.groupby(cursor, key=lambda row: row[0]):
+            keyword = None
+            fields = {}
+            for _, row_keyword, field, value in rows:
+                keyword = row_keyword
+                if field is not None and value:
+                    fields[field] = value
+            yield name, keyword, fields
@@ -0,0 +1,213 @@
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+from src.utils.quickparser import Quickparser
+from src.utils.result_store import ResultStore, StoreError, flatten_fields
+
+# Run-to-run drift between two stored snapshots. A snapshot is a run in a
+# result store (--db), or a JSON report written with `-s json`, which is
+# streamed into a temporary store first. Both sides are then read sorted by
+# file name and merged, so memory is bounded by one file's fields per side
+# however many files the snapshots hold. Changed fields follow
+# Quickparser.compare, with the older snapshot as the reference.
+
+SQLITE_HEADER = b'SQLite format 3\x00'
+NOT_FOUND = 'NOT FOUND' # Value Quickparser.compare gives a field that is gone
+READ_CHUNK = 1 << 16
+PATTERN_EXTS = ('.yaml', '.yml', '.json') # Extensions of pattern files
+
+class DiffError(Exception):
+    def __init__(self, message=""):
+        super().__init__(message)
+
+def is_store(path):
+    with open(path, 'rb') as file:
+        return file.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+
+# Incremental reader of a JSON document's objects, decoding one member value
+# at a time so a large report never has to fit in memory
+class _JsonStream:
+    def __init__(self, file):
+        self.file = file
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    # Read more of the file, at least doubling what is buffered
+    def _fill(self):
+        if self.eof:
+            return False
+        more = self.file.read(max(READ_CHUNK, len(self.buffer) - self.pos))
+        self.eof = not more
+        self.buffer = self.buffer[self.pos:] + more
+        self.pos = 0
+        return bool(more)
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def _expect(self, char):
+        if self.peek() != char:
+            raise DiffError(f'Expected "{char}" in JSON report at "{self.peek()}"')
+        self.pos += 1
+
+    # Skip anything before the next occurrence of char
+    def skip_to(self, char):
+        while (index := self.buffer.find(char, self.pos)) < 0:
+            self.pos = len(self.buffer)
+            if not self._fill():
+                raise DiffError(f'No "{char}" found in JSON report')
+        self.pos = index
+
+    # Decode the next value whole
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise DiffError(f'Invalid JSON report: {e}')
+            # A number at the end of the buffer may continue in the file
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    # Yield the keys of the next object; the caller reads each member's
+    # value, with value() or members(), before asking for the next key
+    def members(self):
+        self._expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self._expect('}')
+            return
+
+# Fields of a comparison report's target file, its matches merged with its
+# deviations; fields the target lacks were reported as NOT FOUND
+def _compared_fields(entry, keyword):
+    fields = dict(flatten_fields(entry.get('Matches') or {}))
+    fields.update(flatten_fields(entry.get('Deviations') or {}))
+    return {
+        field: value for field, value in fields.items() if value != NOT_FOUND
+    }, entry.get(keyword)
+
+# Stream a JSON report, single or comparison, into a store as a new run
+def import_report(path, store, keyword='Keyword'):
+    store.start_run('snapshot', target_folder=path)
+    with open(path, 'r', encoding='utf-8-sig') as file:
+        stream = _JsonStream(file)
+        stream.skip_to('{') # Past the separator the CLI prints before a report
+        _import_members(stream, store, keyword)
+        if stream.peek():
+            raise DiffError(f'Unexpected data after the JSON report: {path}')
+    store.finish_run()
+
+# Import the members of a report. A report over several pattern files holds
+# one report per pattern file, keyed by its path; target files only ever have
+# log extensions, so a key with a pattern file extension opens such a report.
+# Its files are named "file (pattern file)" to keep them apart.
+def _import_members(stream, store, keyword, pattern_file=None):
+    not_found_key = f'{keyword} Not Found'
+    def add_file(name, *args, **kwargs):
+        if pattern_file is not None:
+            name = f'{name} ({pattern_file})'
+        store.add_file(name, *args, **kwargs)
+
+    for key in stream.members():
+        if pattern_file is None and key.lower().endswith(PATTERN_EXTS):
+            if stream.peek() != '{':
+                raise DiffError(f'Expected the report of pattern file {key}')
+            _import_members(stream, store, keyword, key)
+        elif key == 'Target Folder': # Comparison report
+            for name in stream.members():
+                entry = stream.value()
+                if name == not_found_key:
+                    for missing in filter(None, entry):
+                        add_file(missing)
+                elif isinstance(entry, dict):
+                    fields, found = _compared_fields(entry, keyword)
+                    add_file(name, found, fields)
+        elif key == 'Reference Folder':
+            stream.value()
+        elif key == not_found_key:
+            for missing in filter(None, stream.value()):
+                add_file(missing)
+        else:
+            entry = stream.value()
+            if isinstance(entry, dict):
+                add_file(key, entry.get(keyword), entry, label=keyword)
+
+# Open a snapshot as an iterator of (name, keyword, fields) sorted by name
+@contextmanager
+def open_snapshot(path, run=None, keyword='Keyword'):
+    if not os.path.isfile(path):
+        raise DiffError(f'No snapshot at {path}')
+    if is_store(path):
+        with ResultStore(path) as store:
+            yield store.snapshot(run)
+        return
+    if run is not None:
+        raise DiffError(f'{path} is a JSON report and holds a single run')
+    with tempfile.TemporaryDirectory(prefix='quickparse-diff-') as temp_dir:
+        with ResultStore(os.path.join(temp_dir, 'snapshot.sqlite')) as store:
+            import_report(path, store, keyword)
+            yield store.snapshot()
+
+# Ids of the two latest runs of a store, oldest first
+def latest_runs(path):
+    if not os.path.isfile(path) or not is_store(path):
+        raise DiffError(f'{path} is not a result database; give two snapshots to diff')
+    with ResultStore(path) as store:
+        runs = [row['id'] for row in store.runs()]
+    if len(runs) < 2:
+        raise StoreError(f'{path} needs two runs to diff, holds {len(runs)}')
+    return runs[-2], runs[-1]
+
+# Changed fields of a file, as {field: {'Old': value, 'New': value}}
+def changed_fields(old_fields, new_fields):
+    _, mismatches = Quickparser.compare(old_fields, new_fields)
+    return {
+        field: {'Old': old_fields.get(field, NOT_FOUND), 'New': value}
+        for field, value in mismatches.items()
+    }
+
+# Merge two snapshots sorted by name, yielding (name, status, detail) for
+# every file. Status is 'added', 'removed', 'changed' or 'unchanged'; the
+# keyword is compared as a field under its label.
+def diff_snapshots(old, new, keyword='Keyword'):
+    def labelled(entry):
+        name, found, fields = entry
+        return name, {keyword: found, **fields} if found else fields
+
+    old_entry, new_entry = next(old, None), next(new, None)
+    while old_entry is not None or new_entry is not None:
+        if new_entry is None or (old_entry is not None and old_entry[0] < new_entry[0]):
+            yield old_entry[0], 'removed', {keyword: old_entry[1]}
+            old_entry = next(old, None)
+        elif old_entry is None or new_entry[0] < old_entry[0]:
+            yield new_entry[0], 'added', {keyword: new_entry[1]}
+            new_entry = next(new, None)
+        else:
+            name, old_fields = labelled(old_entry)
+            _, new_fields = labelled(new_entry)
+            if changes := changed_fields(old_fields, new_fields):
+                yield name, 'changed', changes
+            else:
+                yield name, 'unchanged', None
+            old_entry, new_entry = next(old, None), next(new, None)
@@ -0,0 +1,212 @@
+import os
+import json
+import stat
+import socket
+import logging
+import http.client
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.utils.quickparser import Quickparser
+from src.utils.parsing_helpers import ParsingError, parse_text
+from src.utils.parsing_logic import single_parse, comparison_parse
+from src.utils.execution import ExecutionContext
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+class ServiceError(Exception):
+    def __init__(self, message=""):
+        super().__init__(message)
+
+# Long-lived parse service holding warm parsers and shared worker pools
+class ParseService:
+    def __init__(self, max_workers=None):
+        self.context = ExecutionContext(thread_workers=max_workers)
+
+    # Discover and parse a raw text against a pattern file
+    def _parse_text(self, pattern_file, text, keyword):
+        found, parsed_dict = parse_text(
+            text, pattern_file, keyword, cache=self.context.cache
+        )
+        if not found:
+            raise ParsingError(f'No {keyword} found in text.')
+        return parsed_dict
+
+    # Run a parse job over a folder or raw text
+    def parse(self, job):
+        pattern_file = job['pattern_file']
+        keyword = job.get('keyword', 'Keyword')
+        if (text := job.get('text')) is not None:
+            return {'report': self._parse_text(pattern_file, text, keyword)}
+        report_dict, report_string = single_parse(
+            pattern_file=pattern_file,
+            target_folder_path=job['target'],
+            window=None,
+            keyword=keyword,
+            context=self.context
+        )
+        return {'report': report_dict, 'report_string': report_string}
+
+    # Run a compare job over folders or raw texts
+    def compare(self, job):
+        pattern_file = job['pattern_file']
+        keyword = job.get('keyword', 'Keyword')
+        if (text := job.get('text')) is not None:
+            ref_dict = self._parse_text(
+                pattern_file, job['reference_text'], keyword
+            )
+            targ_dict = self._parse_text(pattern_file, text, keyword)
+            if ref_dict[keyword] != targ_dict[keyword]:
+                raise ParsingError(
+                    f'Reference {keyword} "{ref_dict[keyword]}" does not '
+                    f'match target {keyword} "{targ_dict[keyword]}".'
+                )
+            found = targ_dict.pop(keyword)
+            matches, mismatches = Quickparser.compare(
+                {k: v for k, v in ref_dict.items() if k != keyword},
+                targ_dict
+            )
+            return {'report': {
+                'Reference': ref_dict,
+                'Matches': matches,
+                'Deviations': mismatches,
+                keyword: found
+            }}
+        report_dict, report_string = comparison_parse(
+            pattern_file=pattern_file,
+            target_folder_path=job['target'],
+            reference_folder_path=job['reference'],
+            window=None,
+            keyword=keyword,
+            context=self.context
+        )
+        return {'report': report_dict, 'report_string': report_string}
+
+    # Dispatch a job by its route
+    def handle(self, route, job):
+        handlers = {'/parse': self.parse, '/compare': self.compare}
+        if route not in handlers:
+            raise ServiceError(f'Unknown route: {route}')
+        return handlers[route](job)
+
+    def close(self):
+        self.context.close()
+
+# Request handler translating HTTP requests into service jobs
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    service = None # Set by make_server
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._reply(200, {'status': 'ok'})
+        else:
+            self._reply(404, {'error': f'Unknown route: {self.path}'})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            job = json.loads(self.rfile.read(length) or b'{}')
+            self._reply(200, self.service.handle(self.path, job))
+        except (ServiceError, KeyError, ValueError) as e:
+            self._reply(400, {'error': f'{type(e).__name__}: {e}'})
+        except Exception as e:
+            self._reply(500, {'error': f'{type(e).__name__}: {e}'})
+
+    def address_string(self):
+        # Unix domain socket clients have no host address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        logging.debug(f'{self.address_string()} - {format % args}')
+
+# HTTP server bound to a Unix domain socket
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        try:
+            mode = os.lstat(self.server_address).st_mode
+        except FileNotFoundError:
+            mode = None
+        if mode is not None:
+            if not stat.S_ISSOCK(mode):
+                raise ServiceError(
+                    f'Refusing to replace a path that is not a socket: {self.server_address}'
+                )
+            os.remove(self.server_address) # Clear a stale socket
+        super().server_bind()
+
+# Build a server on a Unix socket path or a localhost port
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+    handler = type(
+        'BoundServiceRequestHandler',
+        (ServiceRequestHandler,),
+        {'service': service}
+    )
+    if socket_path:
+        return UnixHTTPServer(socket_path, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+# Run the service until interrupted
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, max_workers=None):
+    service = ParseService(max_workers=max_workers)
+    try:
+        server = make_server(service, host, port, socket_path)
+    except Exception:
+        service.close()
+        raise
+    logging.info(f'Quickparse service listening on {socket_path or f"{host}:{port}"}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+# HTTP connection over a Unix domain socket
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+# Open a connection from an address of 'unix:/path', 'host:port' or a URL
+def connect(address, timeout=None):
+    if address.startswith('unix:'):
+        return UnixHTTPConnection(address[len('unix:'):], timeout=timeout)
+    address = address.split('://', 1)[-1].rstrip('/')
+    host, _, port = address.rpartition(':')
+    return http.client.HTTPConnection(host or DEFAULT_HOST, int(port), timeout=timeout)
+
+# Send a job to a running service and return its JSON response
+def request(address, route, job, timeout=None):
+    connection = connect(address, timeout)
+    try:
+        connection.request(
+            'POST',
+            route,
+            body=json.dumps(job),
+            headers={'Content-Type': 'application/json'}
+        )
+        response = connection.getresponse()
+        body = json.loads(response.read() or b'{}')
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise ServiceError(body.get('error', f'HTTP {response.status}'))
+    return body
@@ -0,0 +1,208 @@
+import os
+import json
+import math
+import time
+import random
+import logging
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from src.utils.regex_engines import DEFAULT_ENGINE, available_engines
+
+# Worker sizing. CPU counts respect the process's CPU affinity and any cgroup
+# CPU quota, so containers are not oversubscribed by the host's core count.
+# `quickparse calibrate` saves a measured recommendation that later runs pick
+# up automatically from the config file, which is read once per process.
+
+BACKENDS = ('thread', 'process')
+
+# Read a cgroup file, returning None if it does not exist
+def _read_cgroup_file(path):
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+# Get the CPU limit of the process's cgroup, or None if unlimited
+def cgroup_cpu_limit():
+    # cgroup v2: "<quota> <period>" or "max <period>" in cpu.max
+    cgroup_dirs = ['/sys/fs/cgroup']
+    if membership := _read_cgroup_file('/proc/self/cgroup'):
+        for line in membership.splitlines():
+            if line.startswith('0::'):
+                cgroup_dirs.insert(0, '/sys/fs/cgroup' + line[3:].rstrip('/'))
+    for cgroup_dir in cgroup_dirs:
+        if cpu_max := _read_cgroup_file(os.path.join(cgroup_dir, 'cpu.max')):
+            quota, _, period = cpu_max.partition(' ')
+            if quota == 'max':
+                return None
+            return float(quota) / float(period or 100000)
+
+    # cgroup v1: quota of -1 means unlimited
+    quota = _read_cgroup_file('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+    period = _read_cgroup_file('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+# Count the CPUs this process may actually use
+def available_cpus():
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError: # Not available on every platform
+        cpus = os.cpu_count() or 1
+    if (limit := cgroup_cpu_limit()) is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+# Get the path of the saved tuning config
+def config_path():
+    if path := os.environ.get('QUICKPARSE_CONFIG'):
+        return path
+    config_home = os.environ.get(
+        'XDG_CONFIG_HOME', os.path.join(os.path.expanduser('~'), '.config')
+    )
+    return os.path.join(config_home, 'quickparse', 'config.json')
+
+# Read a tuning config file once per process, or an empty one
+@functools.lru_cache(maxsize=None)
+def _read_config(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return config if isinstance(config, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+# Load the saved tuning config, or an empty one
+def load_config(path=None):
+    return dict(_read_config(path or config_path()))
+
+# Save a tuning config
+def save_config(config, path=None):
+    path = path or config_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=4)
+    _read_config.cache_clear() # Later reads see the saved config
+    return path
+
+# Worker count for CPU-bound parsing stages
+def parse_workers():
+    return load_config().get('workers') or available_cpus()
+
+# Worker count for I/O-heavy discovery of whole folders
+def discover_workers():
+    return load_config().get('discover_workers') or available_cpus() * 2
+
+# Execution backend for parsing files, 'thread' or 'process'
+def parse_backend():
+    backend = load_config().get('backend', 'thread')
+    return backend if backend in BACKENDS else 'thread'
+
+# Regex engine for parsing, falling back to re if it is not installed
+def regex_engine():
+    engine = load_config().get('engine', DEFAULT_ENGINE)
+    return engine if engine in available_engines() else DEFAULT_ENGINE
+
+# Time one pipeline run over the sample with a backend and worker count
+def _time_run(filepaths, pattern_file, backend, workers, engine=None):
+    # Imported here, as the pipeline sizes itself from this module
+    from src.utils.pipeline import run_pipeline
+    from src.utils.parsing_helpers import PatternCache
+    if engine is not None: # Engines are compared in this process
+        cache = PatternCache(engine=engine)
+        cache.parsers(pattern_file, cache.load(pattern_file)) # Compile first
+        start = time.perf_counter()
+        for _ in run_pipeline(filepaths, pattern_file, workers=workers, cache=cache):
+            pass
+        return time.perf_counter() - start
+    if backend == 'process':
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Warm the workers so process start-up is not measured
+            list(executor.map(abs, range(workers)))
+            start = time.perf_counter()
+            for _ in run_pipeline(
+                filepaths, pattern_file, workers=workers, process_executor=executor
+            ):
+                pass
+            return time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in run_pipeline(filepaths, pattern_file, workers=workers):
+        pass
+    return time.perf_counter() - start
+
+def calibrate(
+    pattern_file,
+    folder_path,
+    sample_size=200,
+    worker_counts=None,
+    backends=BACKENDS,
+    repeats=2,
+    exts=('.txt', '.log'),
+    engines=None
+):
+    '''
+    Benchmark thread and process backends at several worker counts on a
+    sample of a corpus and recommend the fastest. Then compare the
+    installed regex engines on the same sample with the fastest worker
+    count and recommend the fastest engine.
+
+    Args:
+        pattern_file (str): Path to the pattern file.
+        folder_path (str): The corpus folder to sample.
+        sample_size (int, optional): Number of files to sample.
+        worker_counts (list, optional): Worker counts to try, default is
+            1, half, all and twice the available CPUs.
+        backends (tuple, optional): Backends to try.
+        repeats (int, optional): Runs per combination; the best is kept.
+        exts (tuple, optional): File extensions to sample.
+        engines (list, optional): Regex engines to compare, default is every
+            installed engine.
+
+    Returns:
+        dict: The recommended config with every measurement.
+    '''
+    # Imported here, as parsing_helpers sizes its pools from this module
+    from src.utils.parsing_helpers import ParsingError, get_set_of_files
+    if not (filepaths := get_set_of_files(folder_path, exts)):
+        raise ParsingError('No files in the target folder can be parsed.')
+    sample = sorted(filepaths)
+    random.Random(0).shuffle(sample)
+    sample = sample[:max(1, sample_size)]
+
+    cpus = available_cpus()
+    if worker_counts is None:
+        worker_counts = sorted({1, max(1, cpus // 2), cpus, cpus * 2})
+
+    measurements = {}
+    for backend in backends:
+        for workers in worker_counts:
+            seconds = min(
+                _time_run(sample, pattern_file, backend, workers)
+                for _ in range(max(1, repeats))
+            )
+            measurements[f'{backend}/{workers}'] = round(seconds, 4)
+            logging.debug(f'Calibrated {backend} backend with {workers} workers: {seconds:.3f}s')
+
+    best = min(measurements, key=measurements.get)
+    backend, workers = best.split('/')
+
+    engine_measurements = {}
+    for engine in engines or available_engines():
+        seconds = min(
+            _time_run(sample, pattern_file, backend, int(workers), engine)
+            for _ in range(max(1, repeats))
+        )
+        engine_measurements[engine] = round(seconds, 4)
+        logging.debug(f'Calibrated {engine} regex engine: {seconds:.3f}s')
+
+    return {
+        'backend': backend,
+        'workers': int(workers),
+        'engine': min(engine_measurements, key=engine_measurements.get),
+        'available_cpus': cpus,
+        'sample_files': len(sample),
+        'measurements': measurements,
+        'engine_measurements': engine_measurements,
+    }
@@ -0,0 +1,46 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.utils.async_parsing import iter_folder, parse_text
+from src.utils.parsing_helpers import ParsingError, parse_path
+
+DEMO_PATTERNS = 'demo/pattern_file.json'
+DEMO_TARGETS = 'demo/target_examples'
+
+def test_parse_text():
+    text = 'Cisco IOS XE Software, Version 17.03.05\nC9300\n'
+    assert asyncio.run(parse_text(text, DEMO_PATTERNS)) == (
+        'C9300', {'Version': '17.03.05', 'Keyword': 'C9300'}
+    )
+    assert asyncio.run(parse_text('nothing to see', DEMO_PATTERNS)) == (None, None)
+
+@pytest.mark.parametrize('max_concurrency', [1, None])
+def test_iter_folder_matches_single_files(max_concurrency):
+    async def collect():
+        with ThreadPoolExecutor(2) as executor:
+            return [
+                result async for result in iter_folder(
+                    DEMO_TARGETS, DEMO_PATTERNS, executor=executor,
+                    max_concurrency=max_concurrency
+                )
+            ]
+    results = {result.name: result for result in asyncio.run(collect())}
+    assert sorted(results) == sorted(os.listdir(DEMO_TARGETS))
+    for name, result in results.items():
+        expected = parse_path(os.path.join(DEMO_TARGETS, name), DEMO_PATTERNS)
+        assert (result.keyword, result.parsed) == (expected.keyword, expected.parsed)
+
+def test_iter_folder_stops_when_closed():
+    async def first():
+        results = iter_folder(DEMO_TARGETS, DEMO_PATTERNS, max_concurrency=1)
+        result = await results.__anext__()
+        await results.aclose()
+        return result
+    assert asyncio.run(first()).name in os.listdir(DEMO_TARGETS)
+
+def test_iter_folder_requires_files(tmp_path):
+    async def collect():
+        return [result async for result in iter_folder(str(tmp_path), DEMO_PATTERNS)]
+    with pytest.raises(ParsingError):
+        asyncio.run(collect())
@@ -0,0 +1,31 @@
+import shutil
+import pytest
+from src.utils.cli import main
+
+DEMO_PATTERNS = 'demo/pattern_file.json'
+DEMO_TARGETS = 'demo/target_examples'
+DEMO_REFERENCES = 'demo/references_example'
+
+@pytest.mark.parametrize('limit', [[], ['3'], ['100']])
+def test_fail_fast_exits_nonzero_on_failures(capsys, limit):
+    with pytest.raises(SystemExit) as exit_info:
+        main([DEMO_PATTERNS, DEMO_TARGETS, '-r', DEMO_REFERENCES, '--fail-fast', *limit])
+    assert exit_info.value.code == 1
+    assert 'Verdict: FAIL' in capsys.readouterr().out
+
+def test_fail_fast_passes_matching_targets(tmp_path, capsys):
+    targets = tmp_path / 'targets'
+    shutil.copytree(DEMO_REFERENCES, targets)
+    main([DEMO_PATTERNS, str(targets), '-r', DEMO_REFERENCES, '--fail-fast'])
+    assert 'Verdict: PASS' in capsys.readouterr().out
+
+def test_fail_fast_requires_reference(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main([DEMO_PATTERNS, DEMO_TARGETS, '--fail-fast'])
+    assert exit_info.value.code == 2
+    assert '--fail-fast requires a reference' in capsys.readouterr().err
+
+@pytest.mark.parametrize('prefix', [['run'], ['--']])
+def test_run_prefix_parses(capsys, prefix):
+    main([*prefix, DEMO_PATTERNS, DEMO_TARGETS])
+    assert 'Brief Report' in capsys.readouterr().out
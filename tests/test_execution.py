@@ -0,0 +1,36 @@
+import pytest
+from src.utils.execution import ExecutionContext, execution_scope
+from src.utils.parsing_logic import main_parse
+
+DEMO_PATTERNS = 'demo/pattern_file.json'
+DEMO_TARGETS = 'demo/target_examples'
+DEMO_REFERENCES = 'demo/references_example'
+
+def test_pools_start_on_first_use_and_persist():
+    with ExecutionContext(backend='thread', workers=2, thread_workers=2) as context:
+        assert context._thread_pool is None and context._process_pool is None
+        assert context.process_pool_for() is None
+        pool = context.thread_pool
+        assert context.thread_pool is pool
+        assert context.process_pool_for(chunk_size=1024) is context.process_pool
+    assert context.closed
+    with pytest.raises(RuntimeError):
+        context.thread_pool
+
+def test_runs_share_one_context():
+    with ExecutionContext(backend='process', workers=2) as context:
+        first, _ = main_parse(DEMO_PATTERNS, DEMO_TARGETS, DEMO_REFERENCES, context=context)
+        pools = (context._thread_pool, context._process_pool)
+        second, _ = main_parse(DEMO_PATTERNS, DEMO_TARGETS, DEMO_REFERENCES, context=context)
+        assert all(pools)
+        assert (context._thread_pool, context._process_pool) == pools
+    assert first['Target Folder'] == second['Target Folder']
+
+def test_scope_closes_only_its_own_context():
+    with ExecutionContext() as context:
+        with execution_scope(context) as scoped:
+            assert scoped is context
+        assert not context.closed
+    with execution_scope() as temporary:
+        pass
+    assert temporary.closed
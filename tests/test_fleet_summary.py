@@ -0,0 +1,21 @@
+from src.utils.fleet_summary import FleetSummary
+
+def test_not_found_is_counted_as_missing():
+    summary = FleetSummary(top_k=5)
+    summary.add_file('a.log', 'Router', {'Version': '1.2', 'Model': 'NOT FOUND'})
+    summary.add_file('b.log', 'Router', {'Version': 'NOT FOUND', 'Model': 'NOT FOUND'})
+    summary.add_file('c.log', 'Router', {'Version': '1.2', 'Model': None})
+    result = summary.as_dict()
+    assert result['Files per Keyword'] == {'Router': 3}
+    assert result['Values'] == {'Router': {'Version': [{'1.2': 2}]}}
+    assert result['Missing Fields'] == [{'Router/Model': 3}, {'Router/Version': 1}]
+
+def test_top_values_stay_bounded():
+    summary = FleetSummary(top_k=2)
+    for index in range(100):
+        summary.add_file(f'{index}.log', 'Router', {'Serial': str(index), 'Version': '1.2'})
+    result = summary.as_dict()
+    assert result['Values']['Router']['Version'] == [{'1.2': 100}]
+    assert len(result['Values']['Router']['Serial']) == 2
+    assert len(summary.values['Router']['Serial'].counts) == summary.capacity
+    assert result['Approximate Counts'] == ['Router/Serial']
@@ -0,0 +1,63 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from src.utils.parsing_api import compare_folders, parse_folder
+from src.utils.parsing_helpers import ParsingError, PatternCache, parse_path
+
+DEMO_PATTERNS = 'demo/pattern_file.json'
+DEMO_TARGETS = 'demo/target_examples'
+DEMO_REFERENCES = 'demo/references_example'
+
+def by_name(results):
+    return {result.name: result for result in results}
+
+def test_parse_folder_matches_single_files():
+    progress = []
+    results = by_name(parse_folder(
+        DEMO_PATTERNS, DEMO_TARGETS, on_progress=lambda *done: progress.append(done)
+    ))
+    assert sorted(results) == sorted(os.listdir(DEMO_TARGETS))
+    for name, result in results.items():
+        expected = parse_path(os.path.join(DEMO_TARGETS, name), DEMO_PATTERNS)
+        assert (result.keyword, result.parsed, result.error) == (
+            expected.keyword, expected.parsed, expected.error
+        )
+    assert progress[-1] == (len(results), len(results))
+
+def test_parse_folder_reports_errors(tmp_path):
+    targets = tmp_path / 'targets'
+    shutil.copytree(DEMO_TARGETS, targets)
+    (targets / 'unreadable.log').mkdir() # Listed, but fails to read
+    errors = []
+    results = by_name(parse_folder(DEMO_PATTERNS, str(targets), on_error=errors.append))
+    assert [result.name for result in errors] == ['unreadable.log']
+    assert results['C9300_test.txt'].keyword == 'C9300'
+
+def test_parse_folder_uses_the_given_cache(monkeypatch):
+    cache = PatternCache()
+    keywords = []
+    parsers = cache.parsers
+    def record(pattern_file, found):
+        keywords.extend(found)
+        return parsers(pattern_file, found)
+    monkeypatch.setattr(cache, 'parsers', record)
+    results = list(parse_folder(DEMO_PATTERNS, DEMO_TARGETS, cache=cache))
+    assert sorted(keywords) == sorted(result.keyword for result in results if result.keyword)
+
+def test_parse_folder_stops_when_closed():
+    results = parse_folder(DEMO_PATTERNS, DEMO_TARGETS, max_in_flight=1)
+    next(results)
+    results.close()
+
+def test_compare_folders(tmp_path):
+    with ProcessPoolExecutor(2) as executor:
+        results = by_name(compare_folders(
+            DEMO_PATTERNS, DEMO_TARGETS, DEMO_REFERENCES, executor=executor
+        ))
+    assert results['N9K_test_bad.txt'].reference == 'N9K_ref.txt'
+    assert results['N9K_test_bad.txt'].deviations == {'Version': '10'}
+    assert results['C9300_test.txt'].deviations == {}
+    assert results['generic_ref.txt'].keyword is None
+    with pytest.raises(ParsingError, match='reference folder'):
+        list(compare_folders(DEMO_PATTERNS, DEMO_TARGETS, str(tmp_path)))
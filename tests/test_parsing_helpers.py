@@ -0,0 +1,46 @@
+import copy
+from src.utils.parsing_helpers import compare_dicts
+from src.utils.quickparser import Quickparser
+
+PATTERNS = {
+    'Router': {
+        'Version': r'Version: (\S+)$',
+        'Uptime': r'uptime (?P<Days>\d+) days$',
+        'Interfaces': {'@records': r'^(?P<Name>Eth\d) is (?P<Status>\w+)$'},
+    }
+}
+
+def log(version='1.2.3', eth2='down'):
+    return f'Version: {version}\nuptime 42 days\nEth1 is up\nEth2 is {eth2}\n'
+
+TEXTS = {
+    **{f'same{index}.log': log(version='1.2.4') for index in range(5)},
+    **{f'other{index}.log': log(eth2='up') for index in range(3)},
+    'match.log': log(),
+}
+
+def test_identical_targets_are_compared_once(monkeypatch):
+    parser = Quickparser('Router', PATTERNS)
+    expected = {}
+    for name, text in TEXTS.items():
+        matches, deviations = Quickparser.compare(
+            parser.parse(log(), False), parser.parse(text, False)
+        )
+        expected[name] = {'Matches': matches, 'Deviations': deviations, 'Keyword': 'Router'}
+    reference = {'ref.log': {**parser.parse(log(), False), 'Keyword': 'Router'}}
+
+    compare = Quickparser.compare
+    calls = []
+    def counted(ref_dict, targ_dict):
+        calls.append(targ_dict)
+        return compare(ref_dict, targ_dict)
+    monkeypatch.setattr(Quickparser, 'compare', staticmethod(counted))
+    for compact in (False, True):
+        calls.clear()
+        targets = {}
+        for name, text in TEXTS.items():
+            parsed_dict = {**parser.parse(text, False), 'Keyword': 'Router'}
+            targets[name] = parser.layout.pack(parsed_dict, 'Keyword') if compact else parsed_dict
+        detail = compare_dicts(copy.deepcopy(reference), targets, 'Keyword')
+        assert len(calls) == 3 # One per distinct result
+        assert detail == {'Reference Folder': reference, 'Target Folder': expected}
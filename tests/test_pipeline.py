@@ -0,0 +1,177 @@
+import os
+import json
+import shutil
+import threading
+import pytest
+from src.utils.execution import ExecutionContext
+from src.utils.parsing_helpers import decoding_cache, default_cache
+from src.utils.parsing_logic import main_parse, merge_partials
+from src.utils.pipeline import (
+    InFlightBudget, PipelineStats, run_pipeline, schedule_batches
+)
+
+DEMO_PATTERNS = 'demo/pattern_file.json'
+DEMO_TARGETS = 'demo/target_examples'
+DEMO_REFERENCES = 'demo/references_example'
+
+# Report with its lists of files sorted, as files finish in any order
+def normalized(report):
+    if isinstance(report, dict):
+        return {key: normalized(value) for key, value in report.items()}
+    if isinstance(report, list) and all(isinstance(item, str) for item in report):
+        return sorted(report)
+    return report
+
+def test_worker_cache_keeps_engine():
+    assert decoding_cache() is default_cache
+    cache = decoding_cache(engine='regex')
+    assert cache is not default_cache and cache.engine == 'regex'
+    assert decoding_cache('latin-1', 'strict', 'regex').engine == 'regex'
+
+@pytest.mark.filterwarnings('ignore::FutureWarning')
+def test_process_backend_uses_context_engine(tmp_path):
+    pytest.importorskip('regex')
+    # A POSIX class under the regex module, a plain set of characters to re
+    pattern_file = tmp_path / 'patterns.json'
+    pattern_file.write_text(
+        json.dumps({'Router': {'Model': r'Model ([[:alpha:]]+\d)'}})
+    )
+    targets = tmp_path / 'targets'
+    targets.mkdir()
+    for index in range(4):
+        (targets / f'router{index}.log').write_text(f'Router\nModel X{index}\n')
+    reports = {}
+    for backend in ('thread', 'process'):
+        with ExecutionContext(backend=backend, workers=2, engine='regex') as context:
+            reports[backend], _ = main_parse(
+                str(pattern_file), str(targets), context=context
+            )
+    assert reports['thread']['router1.log']['Model'] == 'X1'
+    assert normalized(reports['process']) == normalized(reports['thread'])
+
+def renamed_patterns(tmp_path):
+    with open(DEMO_PATTERNS, encoding='utf-8') as f:
+        patterns = json.load(f)
+    renamed = {
+        keyword: {
+            ('Release' if key == 'Version' else key): value
+            for key, value in values.items()
+        }
+        for keyword, values in patterns.items()
+    }
+    path = tmp_path / 'renamed.json'
+    path.write_text(json.dumps(renamed))
+    return str(path)
+
+@pytest.mark.parametrize('chunk_size', [None, 2048])
+def test_multiple_pattern_files_match_separate_runs(tmp_path, chunk_size):
+    pattern_files = [DEMO_PATTERNS, renamed_patterns(tmp_path)]
+    options = {'chunk_size': chunk_size, 'chunk_overlap': 512}
+    combined, report = main_parse(
+        pattern_files, DEMO_TARGETS, DEMO_REFERENCES, **options
+    )
+    for pattern_file in pattern_files:
+        separate, _ = main_parse(
+            pattern_file, DEMO_TARGETS, DEMO_REFERENCES, **options
+        )
+        assert json.dumps(combined[pattern_file], sort_keys=True) == (
+            json.dumps(separate, sort_keys=True)
+        )
+    assert report.count('Run Statistics:') == 1
+
+@pytest.mark.parametrize('references', [None, DEMO_REFERENCES])
+def test_shards_merge_to_full_run(tmp_path, references):
+    full, _ = main_parse(DEMO_PATTERNS, DEMO_TARGETS, references)
+    partials = [str(tmp_path / f'shard_{index}.json') for index in range(3)]
+    for index, partial in enumerate(partials):
+        main_parse(
+            DEMO_PATTERNS, 
+            DEMO_TARGETS, 
+            references, 
+            shard=(index, len(partials)), 
+            partial_path=partial
+        )
+    merged, _ = merge_partials(partials)
+    assert normalized(merged) == normalized(full)
+
+@pytest.mark.parametrize('references', [None, DEMO_REFERENCES])
+@pytest.mark.parametrize('backend', ['thread', 'process'])
+def test_dedup_matches_plain_run(tmp_path, references, backend):
+    targets = tmp_path / 'targets'
+    targets.mkdir()
+    for name in os.listdir(DEMO_TARGETS): # Every log three times
+        for copy in range(3):
+            shutil.copy(os.path.join(DEMO_TARGETS, name), targets / f'{copy}_{name}')
+    with ExecutionContext(backend=backend, workers=2) as context:
+        plain, _ = main_parse(
+            DEMO_PATTERNS, str(targets), references, context=context
+        )
+        deduplicated, report = main_parse(
+            DEMO_PATTERNS, str(targets), references, context=context, dedup=True
+        )
+    assert normalized(deduplicated) == normalized(plain)
+    assert 'Duplicate Files' in report
+
+def test_budget_waits_for_room_but_admits_oversized_files():
+    budget = InFlightBudget(max_files=2, max_bytes=100)
+    stop = threading.Event()
+    assert budget.acquire(1, 500, stop) # Larger than the budget, on its own
+    acquired = threading.Event()
+    waiter = threading.Thread(
+        target=lambda: budget.acquire(1, 10, stop) and acquired.set()
+    )
+    waiter.start()
+    assert not acquired.wait(0.3)
+    budget.release_bytes(500)
+    assert acquired.wait(2)
+    waiter.join()
+    stop.set() # A stopped run gives up waiting
+    assert not budget.acquire(5, 10, stop)
+
+def pipeline_results(**kwargs):
+    paths = [os.path.join(DEMO_TARGETS, name) for name in os.listdir(DEMO_TARGETS)]
+    return {
+        result.name: (result.keyword, result.parsed, result.error)
+        for result in run_pipeline(paths, DEMO_PATTERNS, **kwargs)
+    }
+
+def test_tight_in_flight_budget_matches_default():
+    assert pipeline_results(
+        max_in_flight_files=1, max_in_flight_bytes=1, workers=2
+    ) == pipeline_results()
+
+def write_sized_files(tmp_path, sizes):
+    paths = []
+    for index, size in enumerate(sizes):
+        path = tmp_path / f'{index}.log'
+        path.write_bytes(b'x' * size)
+        paths.append(str(path))
+    return paths
+
+def test_largest_first_batches_small_files(tmp_path):
+    sizes = [10, 200_000, 30, 100_000, 20]
+    paths = write_sized_files(tmp_path, sizes)
+    stats = PipelineStats()
+    batches = list(schedule_batches(
+        paths, batch_files=2, small_file_bytes=1000, stats=stats
+    ))
+    assert [[size for _, size in batch] for batch in batches] == [
+        [200_000], [100_000], [30, 20], [10]
+    ]
+    assert (stats.files, stats.bytes) == (5, sum(sizes))
+    assert stats.largest_file == paths[1]
+
+def test_fifo_keeps_enumeration_order(tmp_path):
+    sizes = [10, 200_000, 30]
+    paths = write_sized_files(tmp_path, sizes)
+    batches = list(schedule_batches(paths, 'fifo', small_file_bytes=1000))
+    # A large file goes out at once; small ones wait for their batch to fill
+    assert batches == [[(paths[1], 200_000)], [(paths[0], 10), (paths[2], 30)]]
+    with pytest.raises(ValueError):
+        list(schedule_batches(paths, 'smallest-first'))
+
+def test_schedules_give_the_same_results():
+    stats = PipelineStats()
+    largest_first = pipeline_results(stats=stats)
+    assert pipeline_results(schedule='fifo') == largest_first
+    assert stats.batches and stats.batched_files == stats.files
@@ -0,0 +1,270 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.utils.quickparser import Quickparser, QuickparserError
+
+PATTERNS = {
+    'Router': {
+        'Version': r'Version: (\S+)$',
+        'Model': r'^Model (\S+)',
+        'Uptime': r'uptime (?P<Days>\d+) days$',
+        'Eth2': r'^Eth2 is (\w+)$',
+    }
+}
+
+LINES = [
+    'Router boot',
+    'Version: 1.2.3',
+    'Model X100',
+    'System uptime 42 days',
+    'Eth1 is up',
+    'Eth2 is down',
+]
+
+def write_log(tmp_path, newline, name='device.log'):
+    path = tmp_path / name
+    path.write_bytes(newline.join(LINES + ['']).encode('utf-8'))
+    return str(path)
+
+@pytest.fixture
+def parser():
+    return Quickparser('Router', PATTERNS)
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n', '\r'])
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 1 << 20])
+def test_chunked_matches_whole_file(tmp_path, parser, newline, chunk_size):
+    path = write_log(tmp_path, newline)
+    whole = parser.parse(Quickparser.read_file(path), False)
+    assert whole['Version'] == '1.2.3'
+    with ThreadPoolExecutor(2) as executor:
+        chunked = parser.parse_file_chunked(
+            path, executor, chunk_size=chunk_size, overlap=16, collapse=False
+        )
+    assert chunked == whole
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_chunked_crlf_split_at_chunk_boundary(tmp_path, parser, monkeypatch, binary):
+    path = write_log(tmp_path, '\r\n')
+    data = open(path, 'rb').read()
+    # Split every \r\n pair between its two bytes
+    ends = [index + 1 for index, byte in enumerate(data) if byte == ord('\r')]
+    starts = [0] + ends[:-1]
+    chunks = [
+        (start, end, min(len(data), end + 16)) for start, end in zip(starts, ends)
+    ]
+    chunks.append((ends[-1], len(data), len(data)))
+    monkeypatch.setattr(
+        Quickparser, 'chunk_offsets', staticmethod(lambda *args: chunks)
+    )
+    whole = parser.parse(Quickparser.read_file(path), False)
+    with ThreadPoolExecutor(2) as executor:
+        chunked = parser.parse_file_chunked(
+            path, executor, collapse=False, binary=binary
+        )
+    assert chunked == whole
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n', '\r'])
+def test_bytes_matches_text(tmp_path, parser, newline):
+    path = write_log(tmp_path, newline)
+    text = parser.parse(Quickparser.read_file(path), False)
+    assert text['Version'] == '1.2.3'
+    assert parser.parse(Quickparser.read_file(path, True), False) == text
+    with open(path, 'rb') as f:
+        assert parser.parse(Quickparser.file_text(f.read(), True), False) == text
+    with ThreadPoolExecutor(2) as executor:
+        chunked = parser.parse_file_chunked(
+            path, executor, chunk_size=7, overlap=16, collapse=False, binary=True
+        )
+    assert chunked == text
+
+@pytest.mark.filterwarnings('ignore::FutureWarning')
+def test_engine_syntax_keeps_matches():
+    pytest.importorskip('regex')
+    # re reads [[:digit:]] as a class followed by ']', regex as a POSIX class
+    patterns = {'Slot': {'Port': r'slot [[:digit:]]/port (\d+)'}}
+    parser = Quickparser('Slot', patterns, engine='regex')
+    assert parser.parse('slot 3/port 12\n', False) == {'Port': '12'}
+
+RECORD_PATTERNS = {
+    'Router': {
+        'Uptime': r'uptime (?P<Days>\d+) days$',
+        'Interfaces': {'@records': r'^(?P<Name>Eth\d) is (?P<Status>\w+)$'},
+    }
+}
+
+def test_records_compare_by_position():
+    parser = Quickparser('Router', RECORD_PATTERNS)
+    reference = parser.parse('\n'.join(LINES), False)
+    assert reference == {
+        'Uptime': {'Days': '42'},
+        'Interfaces': [
+            {'Name': 'Eth1', 'Status': 'up'}, {'Name': 'Eth2', 'Status': 'down'}
+        ],
+    }
+    target = parser.parse('\n'.join(LINES).replace('Eth2 is down', 'Eth2 is up'), False)
+    matches, deviations = Quickparser.compare(reference, target)
+    assert deviations == {'Interfaces': {'2': {'Status': 'up'}}}
+    assert matches['Uptime'] == {'Days': '42'}
+    assert Quickparser.leafify(deviations) == ['up']
+
+def test_keyword_level_records_are_rejected():
+    with pytest.raises(QuickparserError, match='nested group'):
+        Quickparser('Router', {'Router': {'@records': r'^(Eth\d) is'}})
+
+def test_parse_many_keeps_input_order(parser):
+    texts = [
+        '\n'.join(LINES).replace('1.2.3', f'1.2.{index}') for index in range(100)
+    ]
+    expected = [parser.parse(text) for text in texts]
+    assert parser.parse_many(texts, batch_size=8) == expected
+    with ThreadPoolExecutor(2) as executor:
+        assert parser.parse_many(texts, executor=executor, batch_size=8) == expected
+
+def test_discover_and_parse_many_groups_mixed_texts():
+    patterns = {**PATTERNS, 'Switch': {'Version': r'Version: (\S+)$'}}
+    texts = [
+        '\n'.join(LINES), 'Switch boot\nVersion: 9.9', 'no keyword here'
+    ] * 20
+    pairs = Quickparser.discover_and_parse_many(texts, patterns, batch_size=4)
+    assert [keyword for keyword, _ in pairs] == ['Router', 'Switch', None] * 20
+    assert pairs[1] == ('Switch', {'Version': '9.9'})
+    assert pairs[0][1] == Quickparser('Router', PATTERNS).parse('\n'.join(LINES))
+
+SECTION_LOG = '\n'.join([
+    'Router#show version',
+    'Version: 1.2.3',
+    'Eth2 is up',
+    'Router#show interfaces',
+    'Eth2 is down',
+    '',
+])
+
+SECTION_PATTERNS = {
+    'Router': {
+        '@sections': {
+            'version': 'show version',
+            'interfaces': 'show interfaces',
+            'clock': 'show clock',
+        },
+        'Version': r'Version: (\S+)$',
+        'Uplink': {
+            '@section': 'interfaces',
+            'Prompt': r'^(\S+)#',
+            'Eth2': r'^Eth2 is (\w+)$',
+        },
+        'Clock': {'@section': 'clock', 'Eth2': r'^Eth2 is (\w+)$'},
+    }
+}
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_sections_scope_groups_from_the_header_line(binary):
+    parser = Quickparser('Router', SECTION_PATTERNS)
+    text = SECTION_LOG.encode() if binary else SECTION_LOG
+    index = Quickparser.section_index(text, parser.patterns_for(text).sections)
+    header = SECTION_LOG.index('Router#show interfaces')
+    assert index == {
+        'version': [(0, header)], 'interfaces': [(header, len(text))], 'clock': []
+    }
+    assert parser.parse(text, False) == {
+        'Version': '1.2.3',
+        'Uplink': {'Prompt': 'Router', 'Eth2': 'down'},
+        'Clock': {'Eth2': 'NOT FOUND'},
+    }
+
+def test_undefined_section_is_rejected():
+    patterns = {'Router': {'Uplink': {'@section': 'interfaces', 'Eth2': r'^Eth2 is (\w+)$'}}}
+    with pytest.raises(QuickparserError, match='Undefined section'):
+        Quickparser('Router', patterns)
+
+@pytest.mark.parametrize('regex, literals', [
+    (r'Cisco IOS XE Software, Version (.*)', ('Cisco IOS XE Software, Version ',)),
+    (r'(?:abc)?de(fg)+x', ('de', 'fg')), # Optional parts are not required
+    (r'(?i)Version (.*)', ()), # Case-insensitive text has no fixed literal
+    (rb'Version (\S+)', (b'Version ',)),
+])
+def test_required_literals(regex, literals):
+    required = Quickparser.required_literals(re.compile(regex))
+    assert sorted(required) == sorted(literals)
+    assert [len(literal) for literal in required] == sorted(map(len, literals), reverse=True)
+
+def test_prefilter_skips_only_regexes_that_cannot_match(parser):
+    text = '\n'.join(LINES).replace('Version: 1.2.3', 'Release 1.2.3')
+    counts = {}
+    parsed = parser.parse(text, False, counts)
+    # Every skipped regex lacks a literal, so a plain search agrees
+    assert parsed == {
+        key: (match.group(1) if (match := re.search(regex, text, re.MULTILINE)) else 'NOT FOUND')
+        for key, regex in PATTERNS['Router'].items() if key != 'Uptime'
+    } | {'Uptime': {'Days': '42'}}
+    assert counts == {'hits': 3, 'skips': 1}
+
+GUARD_PATTERNS = {
+    'Router': {
+        'Version': r'Version: (\S+)$',
+        'Card': {
+            '@guard': '^Linecard',
+            'Slot': r'^Slot (\d+)',
+            'Ports': {'@guard': '^Ports:', 'Count': r'^Ports: (\d+)'},
+        },
+    }
+}
+
+@pytest.mark.parametrize('lines, card, guarded', [
+    ([], {'Slot': 'NOT FOUND', 'Ports': {'Count': 'NOT FOUND'}}, 2),
+    (['Linecard', 'Slot 3'], {'Slot': '3', 'Ports': {'Count': 'NOT FOUND'}}, 1),
+    (['Linecard', 'Slot 3', 'Ports: 4'], {'Slot': '3', 'Ports': {'Count': '4'}}, 0),
+])
+def test_guards_skip_their_groups(tmp_path, lines, card, guarded):
+    parser = Quickparser('Router', GUARD_PATTERNS)
+    text = '\n'.join(['Router', 'Version: 1.2.3', *lines, ''])
+    counts = {}
+    parsed = parser.parse(text, False, counts)
+    assert parsed == {'Version': '1.2.3', 'Card': card}
+    assert counts.get('guarded', 0) == guarded
+    # Without guards the same values are found, by running every regex
+    unguarded = {'Router': {
+        'Version': GUARD_PATTERNS['Router']['Version'],
+        'Card': {'Slot': r'^Slot (\d+)', 'Ports': {'Count': r'^Ports: (\d+)'}},
+    }}
+    assert Quickparser('Router', unguarded).parse(text, False) == parsed
+    path = tmp_path / 'device.log'
+    path.write_text(text)
+    with ThreadPoolExecutor(2) as executor:
+        chunked = parser.parse_file_chunked(
+            str(path), executor, chunk_size=8, overlap=4, collapse=False
+        )
+    assert chunked == parsed
+
+COMPACT_PATTERNS = {
+    'Router': {
+        'Version': r'Version: (\S+)$',
+        'Hardware': {'Model': r'^Model (\S+)', 'Serial': r'^Serial (\S+)'},
+        'Uptime': r'uptime (?P<Days>\d+) days$',
+        'Interfaces': {'@records': r'^(?P<Name>Eth\d) is (?P<Status>\w+)$'},
+    }
+}
+
+def test_compact_result_round_trip():
+    parser = Quickparser('Router', COMPACT_PATTERNS)
+    parsed_dict = {**parser.parse('\n'.join(LINES), False), 'Keyword': 'Router'}
+    assert parsed_dict['Hardware']['Serial'] == 'NOT FOUND'
+    compact = parser.layout.pack(parsed_dict, 'Keyword')
+    assert compact.as_dict() == parsed_dict
+    assert list(compact.as_dict()) == list(parsed_dict)
+    assert compact.get(('Hardware', 'Model')) == 'X100'
+    assert compact.get(('Uptime',)) == {'Days': '42'}
+    assert compact.get(('Interfaces',))[1] == {'Name': 'Eth2', 'Status': 'down'}
+    assert compact.get(('Hardware', 'Serial')) == 'NOT FOUND'
+    # Fields absent from the parsed dictionary stay absent
+    partial = {**parsed_dict, 'Hardware': {'Model': 'X100'}}
+    del partial['Version']
+    packed = parser.layout.pack(partial, 'Keyword')
+    assert packed.as_dict() == partial
+    assert packed.get(('Version',), 'none') == 'none'
+    # Equal results share their interned values
+    other = parser.layout.pack(dict(parsed_dict), 'Keyword')
+    assert other.values == compact.values
+    assert all(a is b for a, b in zip(other.values, compact.values) if isinstance(a, str))
+    for ext in ('.json', '.yaml'):
+        assert Quickparser.stringify({'a.log': compact}, ext) == \
+            Quickparser.stringify({'a.log': parsed_dict}, ext)
@@ -0,0 +1,66 @@
+from src.utils.parsing_logic import main_parse
+from src.utils.result_store import ResultStore
+
+DEMO_PATTERNS = 'demo/pattern_file.json'
+DEMO_TARGETS = 'demo/target_examples'
+DEMO_REFERENCES = 'demo/references_example'
+
+def test_store_round_trip(tmp_path):
+    path = str(tmp_path / 'results.sqlite')
+    with ResultStore(path, batch_rows=2) as store:
+        run = store.start_run('single', target_folder='logs')
+        store.add_file('a.log', 'Router', {'Version': '1.2', 'Intfs': [{'Name': 'Eth1'}]})
+        store.add_file('b.log', 'Router', {'Version': '1.3', 'Model': None})
+        store.add_file('c.log')
+        store.add_deviations('b.log', {'Version': '1.3'}, {'Version': '1.2'})
+        store.finish_run()
+    with ResultStore(path) as store:
+        assert store.run_id() == run
+        assert [row['name'] for row in store.files()] == ['a.log', 'b.log', 'c.log']
+        assert store.value_counts('Version') == [
+            {'value': '1.2', 'files': 1}, {'value': '1.3', 'files': 1}
+        ]
+        assert store.files_with('Intfs/1/Name')[0]['value'] == 'Eth1'
+        assert store.deviations() == [{
+            'name': 'b.log', 'keyword': 'Router', 'field': 'Version',
+            'reference': '1.2', 'target': '1.3'
+        }]
+        assert list(store.snapshot()) == [
+            ('a.log', 'Router', {'Version': '1.2', 'Intfs/1/Name': 'Eth1'}),
+            ('b.log', 'Router', {'Version': '1.3'}),
+            ('c.log', None, {}),
+        ]
+
+def test_concurrent_writers_keep_their_rows(tmp_path):
+    path = str(tmp_path / 'results.sqlite')
+    first, second = ResultStore(path, batch_rows=1), ResultStore(path, batch_rows=1)
+    runs = [store.start_run('single') for store in (first, second)]
+    for index in range(5): # Interleave both runs' batches
+        first.add_file(f'{index}.log', 'Router', {'Version': 'first'})
+        second.add_file(f'{index}.log', 'Switch', {'Version': 'second'})
+    for store in (first, second):
+        store.finish_run()
+        store.close()
+    with ResultStore(path) as store:
+        for run, keyword, version in zip(runs, ('Router', 'Switch'), ('first', 'second')):
+            assert [row['keyword'] for row in store.files(run)] == [keyword] * 5
+            assert store.value_counts('Version', run) == [{'value': version, 'files': 5}]
+
+def test_comparison_run_is_stored(tmp_path):
+    path = str(tmp_path / 'results.sqlite')
+    with ResultStore(path) as store:
+        report, _ = main_parse(
+            DEMO_PATTERNS, DEMO_TARGETS, DEMO_REFERENCES, store=store
+        )
+    with ResultStore(path) as store:
+        stored = {row['name']: row['keyword'] for row in store.files()}
+        deviating = {row['name'] for row in store.deviations()}
+    target = report['Target Folder']
+    assert {
+        name: entry['Keyword'] for name, entry in target.items()
+        if isinstance(entry, dict)
+    }.items() <= stored.items()
+    assert deviating == {
+        name for name, entry in target.items()
+        if isinstance(entry, dict) and entry.get('Deviations')
+    }
@@ -0,0 +1,91 @@
+import json
+import shutil
+import pytest
+from src.utils.parsing_logic import main_parse
+from src.utils.result_store import ResultStore
+from src.utils.run_diff import (
+    DiffError, diff_snapshots, latest_runs, open_snapshot
+)
+
+DEMO_PATTERNS = 'demo/pattern_file.json'
+DEMO_TARGETS = 'demo/target_examples'
+DEMO_REFERENCES = 'demo/references_example'
+
+# Targets of the demo with one version changed, one file removed and one added
+def drifted_targets(tmp_path):
+    targets = tmp_path / 'drifted'
+    shutil.copytree(DEMO_TARGETS, targets)
+    c9300 = targets / 'C9300_test.txt'
+    c9300.write_text(c9300.read_text(encoding='utf-8-sig').replace(
+        'Version 17.03.05', 'Version 17.09.01'
+    ), encoding='utf-8')
+    (targets / 'N9K_test_bad.txt').unlink()
+    shutil.copy(targets / 'C9200_test.txt', targets / 'C9200_new.txt')
+    return str(targets)
+
+def write_report(path, *args, **kwargs):
+    report_dict, _ = main_parse(*args, **kwargs)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('=' * 100 + '\n') # The separator the CLI prints first
+        json.dump(report_dict, file)
+    return str(path)
+
+def diff(old_path, new_path, old_run=None, new_run=None):
+    with open_snapshot(old_path, old_run) as old, open_snapshot(new_path, new_run) as new:
+        return {
+            name: (status, detail)
+            for name, status, detail in diff_snapshots(old, new, 'Keyword')
+            if status != 'unchanged'
+        }
+
+EXPECTED = {
+    'C9200_new.txt': ('added', {'Keyword': 'C9200L'}),
+    'C9300_test.txt': (
+        'changed', {'Version': {'Old': '17.03.05', 'New': '17.09.01'}}
+    ),
+    'N9K_test_bad.txt': ('removed', {'Keyword': 'Nexus 9k'}),
+}
+
+@pytest.mark.parametrize('references', [None, DEMO_REFERENCES])
+def test_json_reports(tmp_path, references):
+    old = write_report(tmp_path / 'old.json', DEMO_PATTERNS, DEMO_TARGETS, references)
+    new = write_report(
+        tmp_path / 'new.json', DEMO_PATTERNS, drifted_targets(tmp_path), references
+    )
+    assert diff(old, new) == EXPECTED
+    assert diff(old, old) == {}
+
+def test_store_runs(tmp_path):
+    path = str(tmp_path / 'results.sqlite')
+    drifted = drifted_targets(tmp_path)
+    for targets in (DEMO_TARGETS, drifted):
+        with ResultStore(path) as store:
+            main_parse(DEMO_PATTERNS, targets, store=store)
+    old_run, new_run = latest_runs(path)
+    assert diff(path, path, old_run, new_run) == EXPECTED
+
+@pytest.mark.parametrize('references', [None, DEMO_REFERENCES])
+def test_multi_pattern_reports(tmp_path, references):
+    renamed = tmp_path / 'renamed.json'
+    with open(DEMO_PATTERNS, 'r', encoding='utf-8') as file:
+        renamed.write_text(json.dumps({
+            keyword: {'Release': patterns['Version']}
+            for keyword, patterns in json.load(file).items()
+        }))
+    pattern_files = [DEMO_PATTERNS, str(renamed)]
+    old = write_report(tmp_path / 'old.json', pattern_files, DEMO_TARGETS, references)
+    new = write_report(
+        tmp_path / 'new.json', pattern_files, drifted_targets(tmp_path), references
+    )
+    expected = {}
+    for name, (status, detail) in EXPECTED.items():
+        expected[f'{name} ({DEMO_PATTERNS})'] = (status, detail)
+        if status == 'changed':
+            detail = {'Release': detail['Version']}
+        expected[f'{name} ({renamed})'] = (status, detail)
+    assert diff(old, new) == expected
+
+def test_json_report_holds_one_run(tmp_path):
+    old = write_report(tmp_path / 'old.json', DEMO_PATTERNS, DEMO_TARGETS)
+    with pytest.raises(DiffError, match='single run'):
+        diff(old, old, old_run=1)
@@ -0,0 +1,72 @@
+import socket
+import threading
+import pytest
+from src.utils import service
+
+DEMO_PATTERNS = 'demo/pattern_file.json'
+DEMO_TARGETS = 'demo/target_examples'
+DEMO_REFERENCES = 'demo/references_example'
+C9300_TEXT = 'Cisco IOS XE Software, Version 17.03.05\nC9300\n'
+
+@pytest.fixture
+def parse_service():
+    parse_service = service.ParseService(max_workers=2)
+    yield parse_service
+    parse_service.close()
+
+# Run a server on its own thread for the duration of a test
+@pytest.fixture
+def running(parse_service):
+    servers = []
+    def start(**kwargs):
+        server = service.make_server(parse_service, port=0, **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def test_text_jobs(parse_service):
+    parsed = parse_service.handle('/parse', {
+        'pattern_file': DEMO_PATTERNS, 'text': C9300_TEXT
+    })['report']
+    assert parsed == {'Version': '17.03.05', 'Keyword': 'C9300'}
+    compared = parse_service.handle('/compare', {
+        'pattern_file': DEMO_PATTERNS,
+        'text': C9300_TEXT.replace('17.03.05', '17.09.01'),
+        'reference_text': C9300_TEXT,
+    })['report']
+    assert compared['Deviations'] == {'Version': '17.09.01'}
+    with pytest.raises(service.ServiceError):
+        parse_service.handle('/unknown', {})
+
+def test_folder_jobs_over_http(running):
+    server = running()
+    address = f'127.0.0.1:{server.server_address[1]}'
+    job = {'pattern_file': DEMO_PATTERNS, 'target': DEMO_TARGETS}
+    for _ in range(2): # Later jobs reuse the warm patterns and workers
+        assert 'Brief Report' in service.request(address, '/parse', job)['report_string']
+    compared = service.request(address, '/compare', {**job, 'reference': DEMO_REFERENCES})
+    assert compared['report']['Reference Folder']
+    with pytest.raises(service.ServiceError, match='KeyError'):
+        service.request(address, '/parse', {'target': DEMO_TARGETS})
+
+def test_unix_socket_replaces_stale_socket(running, tmp_path):
+    socket_path = str(tmp_path / 'quickparse.sock')
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path) # Left behind by a service that died
+    stale.close()
+    running(socket_path=socket_path)
+    report = service.request(f'unix:{socket_path}', '/parse', {
+        'pattern_file': DEMO_PATTERNS, 'text': C9300_TEXT
+    })['report']
+    assert report['Version'] == '17.03.05'
+
+def test_unix_socket_keeps_other_files(parse_service, tmp_path):
+    socket_path = tmp_path / 'results.json'
+    socket_path.write_text('{}')
+    with pytest.raises(service.ServiceError, match='not a socket'):
+        service.make_server(parse_service, socket_path=str(socket_path))
+    assert socket_path.read_text() == '{}'
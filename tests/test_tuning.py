@@ -0,0 +1,61 @@
+import json
+import pytest
+from src.utils import tuning
+
+DEMO_PATTERNS = 'demo/pattern_file.json'
+DEMO_TARGETS = 'demo/target_examples'
+
+def cgroup_files(monkeypatch, files):
+    monkeypatch.setattr(tuning, '_read_cgroup_file', files.get)
+
+def test_cgroup_v2_quota(monkeypatch):
+    cgroup_files(monkeypatch, {
+        '/proc/self/cgroup': '0::/quickparse.slice\n',
+        '/sys/fs/cgroup/quickparse.slice/cpu.max': '150000 100000',
+    })
+    assert tuning.cgroup_cpu_limit() == 1.5
+    monkeypatch.setattr(tuning.os, 'sched_getaffinity', lambda pid: set(range(8)))
+    assert tuning.available_cpus() == 2 # Rounded up to whole CPUs
+
+def test_cgroup_v2_unlimited(monkeypatch):
+    cgroup_files(monkeypatch, {'/sys/fs/cgroup/cpu.max': 'max 100000'})
+    assert tuning.cgroup_cpu_limit() is None
+    monkeypatch.setattr(tuning.os, 'sched_getaffinity', lambda pid: {0, 1, 2})
+    assert tuning.available_cpus() == 3
+
+@pytest.mark.parametrize('quota, limit', [('50000', 0.5), ('-1', None)])
+def test_cgroup_v1_quota(monkeypatch, quota, limit):
+    cgroup_files(monkeypatch, {
+        '/sys/fs/cgroup/cpu/cpu.cfs_quota_us': quota,
+        '/sys/fs/cgroup/cpu/cpu.cfs_period_us': '100000',
+    })
+    assert tuning.cgroup_cpu_limit() == limit
+    assert tuning.available_cpus() >= 1
+
+def test_config_is_read_once_until_saved(monkeypatch, tmp_path):
+    path = tmp_path / 'config.json'
+    monkeypatch.setenv('QUICKPARSE_CONFIG', str(path))
+    path.write_text(json.dumps({'workers': 3, 'backend': 'process'}))
+    assert tuning.parse_workers() == 3
+    path.write_text(json.dumps({'workers': 5})) # Edited behind the process
+    assert tuning.parse_workers() == 3
+    assert tuning.parse_backend() == 'process'
+    tuning.save_config({'workers': 6, 'engine': 'no-such-engine'})
+    assert tuning.parse_workers() == 6
+    assert tuning.parse_backend() == 'thread'
+    assert tuning.regex_engine() == 're'
+
+def test_calibrate_recommends_a_measured_setting():
+    config = tuning.calibrate(
+        DEMO_PATTERNS,
+        DEMO_TARGETS,
+        sample_size=3,
+        worker_counts=[1, 2],
+        backends=('thread',),
+        repeats=1,
+        engines=['re']
+    )
+    assert set(config['measurements']) == {'thread/1', 'thread/2'}
+    assert f"{config['backend']}/{config['workers']}" in config['measurements']
+    assert config['engine'] == 're'
+    assert config['sample_files'] == 3